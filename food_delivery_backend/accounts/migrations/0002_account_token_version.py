@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
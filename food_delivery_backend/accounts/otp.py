@@ -0,0 +1,224 @@
+"""
+One OTP service for every login flow (customer, vendor, delivery partner).
+
+Each actor type gets its own key namespace, ``otp:<actor>:<phone>``, so a
+phone number registered as both customer and vendor holds two independent
+OTPs. Generate (with its resend rate limit) and verify (attempt counting,
+expiry, single use) are each one atomic operation:
+
+* ``RedisOTPBackend`` runs them as Lua scripts on the Redis server behind the
+  default django-redis cache, one round trip each;
+* ``LocMemOTPBackend`` does the same in process memory under a lock, for
+  tests and for caches that aren't Redis.
+
+``OTP_BACKEND`` picks one ('redis' or 'locmem'). Unset, Redis is used when
+the default cache is django-redis; with any other cache the in-process store
+must be asked for by name, since it only works for a single process.
+
+    otp, outcome = customer_otp.generate(phone)   # outcome: SENT, THROTTLED or UNAVAILABLE
+    is_valid, message = customer_otp.verify(phone, submitted)
+
+A live code is only ever kept here. An SMS queued in the outbox names the
+service and phone (``SERVICES[actor].current(phone)``) and gets the code
+when it is sent, so an expired or used code is never sent.
+"""
+import time
+import random
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+# verify() outcomes
+VERIFIED = 1
+INVALID = 0
+EXPIRED = -1
+TOO_MANY_ATTEMPTS = -2
+
+# generate() outcomes: only THROTTLED is the caller's doing; UNAVAILABLE means the store failed
+SENT = 'sent'
+THROTTLED = 'throttled'
+UNAVAILABLE = 'unavailable'
+
+MESSAGES = {
+    VERIFIED: "OTP verified",
+    INVALID: "Invalid OTP",
+    EXPIRED: "OTP has expired",
+    TOO_MANY_ATTEMPTS: "Too many attempts. Please request new OTP",
+    SENT: "OTP sent",
+    THROTTLED: "Please wait before requesting another OTP",
+    UNAVAILABLE: "Failed to generate OTP",
+}
+
+# KEYS: otp hash, rate-limit key. ARGV: code, ttl, resend interval.
+# Returns 1, or 0 if an OTP was sent within the resend interval.
+GENERATE_LUA = """
+if redis.call('SET', KEYS[2], 1, 'NX', 'EX', tonumber(ARGV[3])) == false then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'code', ARGV[1], 'attempts', 0)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+return 1
+"""
+
+# KEYS: otp hash. ARGV: submitted code, max attempts. Returns a verify() outcome.
+VERIFY_LUA = """
+local code = redis.call('HGET', KEYS[1], 'code')
+if not code then
+    return -1
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts > tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return -2
+end
+if code == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+
+class RedisOTPBackend:
+    def __init__(self, connection=None):
+        if connection is None:
+            from django_redis import get_redis_connection
+            connection = get_redis_connection('default')
+        self._connection = connection
+        self._generate = connection.register_script(GENERATE_LUA)
+        self._verify = connection.register_script(VERIFY_LUA)
+
+    def generate(self, key, rate_key, code, ttl, resend_interval):
+        return bool(self._generate(keys=[key, rate_key], args=[code, ttl, resend_interval]))
+
+    def verify(self, key, submitted, max_attempts):
+        return int(self._verify(keys=[key], args=[submitted, max_attempts]))
+
+    def peek(self, key):
+        code = self._connection.hget(key, 'code')
+        return code.decode() if code is not None else None
+
+
+class LocMemOTPBackend:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._store = {}  # key -> (value, expires at)
+
+    def _get(self, key, now):
+        entry = self._store.get(key)
+        if entry is None or entry[1] <= now:
+            self._store.pop(key, None)
+            return None
+        return entry[0]
+
+    def generate(self, key, rate_key, code, ttl, resend_interval):
+        now = time.monotonic()
+        with self._lock:
+            if self._get(rate_key, now) is not None:
+                return False
+            self._store[rate_key] = (1, now + resend_interval)
+            self._store[key] = ({'code': code, 'attempts': 0}, now + ttl)
+            return True
+
+    def verify(self, key, submitted, max_attempts):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._get(key, now)
+            if entry is None:
+                return EXPIRED
+            entry['attempts'] += 1
+            if entry['attempts'] > max_attempts:
+                del self._store[key]
+                return TOO_MANY_ATTEMPTS
+            if entry['code'] == submitted:
+                del self._store[key]
+                return VERIFIED
+            return INVALID
+
+    def peek(self, key):
+        with self._lock:
+            entry = self._get(key, time.monotonic())
+            return entry['code'] if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = getattr(settings, 'OTP_BACKEND', None)
+                if name is None and settings.CACHES['default']['BACKEND'].startswith('django_redis'):
+                    name = 'redis'
+                if name not in ('redis', 'locmem'):
+                    raise ImproperlyConfigured(
+                        f"Set OTP_BACKEND to 'redis', or 'locmem' for tests and single-process servers (got {name!r})"
+                    )
+                _backend = RedisOTPBackend() if name == 'redis' else LocMemOTPBackend()
+    return _backend
+
+
+# actor -> OTPService, for looking a service up from a queued SMS
+SERVICES = {}
+
+
+class OTPService:
+    def __init__(self, actor, ttl=300, max_attempts=3, resend_interval=60, backend=None):
+        SERVICES[actor] = self
+        self.actor = actor
+        self.ttl = ttl
+        self.max_attempts = max_attempts
+        self.resend_interval = resend_interval
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or get_backend()
+
+    def _keys(self, phone):
+        key = f"otp:{self.actor}:{phone}"
+        return key, f"{key}:resend"
+
+    def generate(self, phone):
+        """Return (otp, outcome); otp is None unless outcome is SENT. ``MESSAGES[outcome]`` explains it."""
+        key, rate_key = self._keys(phone)
+        otp = f"{random.SystemRandom().randint(0, 999999):06d}"
+        try:
+            if not self.backend.generate(key, rate_key, otp, self.ttl, self.resend_interval):
+                return None, THROTTLED
+        except Exception as e:
+            logger.error(f"Error generating {self.actor} OTP: {e}")
+            return None, UNAVAILABLE
+        return otp, SENT
+
+    def verify(self, phone, submitted_otp):
+        """Return (is_valid, message); a valid OTP is consumed."""
+        key, _ = self._keys(phone)
+        try:
+            outcome = self.backend.verify(key, str(submitted_otp).strip(), self.max_attempts)
+        except Exception as e:
+            logger.error(f"Error verifying {self.actor} OTP: {e}")
+            return False, "Error verifying OTP"
+        return outcome == VERIFIED, MESSAGES[outcome]
+
+    def current(self, phone):
+        """The live code for ``phone``, or None once it has expired or been used. Store errors propagate."""
+        key, _ = self._keys(phone)
+        return self.backend.peek(key)
+
+
+customer_otp = OTPService('customer')
+vendor_otp = OTPService('vendor')
+delivery_otp = OTPService('delivery', ttl=600, max_attempts=5)
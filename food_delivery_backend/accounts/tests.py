@@ -1,3 +1,89 @@
-from django.test import TestCase
+import time
 
-# Create your tests here.
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+
+from . import otp
+from .otp import (
+    OTPService, LocMemOTPBackend, SENT, THROTTLED, UNAVAILABLE,
+    VERIFIED, INVALID, EXPIRED, TOO_MANY_ATTEMPTS, MESSAGES,
+)
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class BrokenBackend:
+    def generate(self, *args):
+        raise ConnectionError("OTP store is down")
+
+    def verify(self, *args):
+        raise ConnectionError("OTP store is down")
+
+
+class OTPServiceTests(SimpleTestCase):
+    """OTPService over LocMemOTPBackend, the in-process store."""
+
+    def setUp(self):
+        self.service = OTPService('test', ttl=60, max_attempts=3, resend_interval=60, backend=LocMemOTPBackend())
+
+    def test_generated_code_verifies_once(self):
+        code, outcome = self.service.generate('9876543210')
+        self.assertEqual(outcome, SENT)
+        self.assertRegex(code, r'^\d{6}$')
+        self.assertEqual(self.service.verify('9876543210', code), (True, MESSAGES[VERIFIED]))
+        self.assertEqual(self.service.verify('9876543210', code), (False, MESSAGES[EXPIRED]))
+
+    def test_current_code_until_used(self):
+        self.assertIsNone(self.service.current('9876543210'))
+        code, _ = self.service.generate('9876543210')
+        self.assertEqual(self.service.current('9876543210'), code)
+        self.service.verify('9876543210', code)
+        self.assertIsNone(self.service.current('9876543210'))
+
+    def test_resend_is_throttled(self):
+        self.service.generate('9876543210')
+        self.assertEqual(self.service.generate('9876543210'), (None, THROTTLED))
+        # Other numbers and other actors are independent
+        self.assertEqual(self.service.generate('9876543211')[1], SENT)
+        other = OTPService('other', backend=self.service.backend)
+        self.assertEqual(other.generate('9876543210')[1], SENT)
+
+    def test_wrong_codes_use_up_the_attempts(self):
+        code, _ = self.service.generate('9876543210')
+        wrong = '000000' if code != '000000' else '111111'
+        for _ in range(3):
+            self.assertEqual(self.service.verify('9876543210', wrong), (False, MESSAGES[INVALID]))
+        self.assertEqual(self.service.verify('9876543210', code), (False, MESSAGES[TOO_MANY_ATTEMPTS]))
+        self.assertEqual(self.service.verify('9876543210', code), (False, MESSAGES[EXPIRED]))
+
+    def test_code_expires(self):
+        service = OTPService('test', ttl=0.05, backend=self.service.backend)
+        code, _ = service.generate('9876543210')
+        time.sleep(0.1)
+        self.assertEqual(service.verify('9876543210', code), (False, MESSAGES[EXPIRED]))
+
+    def test_store_failure_is_not_reported_as_throttling(self):
+        service = OTPService('test', backend=BrokenBackend())
+        self.assertEqual(service.generate('9876543210'), (None, UNAVAILABLE))
+        self.assertFalse(service.verify('9876543210', '123456')[0])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class GetBackendTests(SimpleTestCase):
+    def setUp(self):
+        otp._backend = None
+        self.addCleanup(setattr, otp, '_backend', None)
+
+    @override_settings(OTP_BACKEND=None)
+    def test_no_silent_fallback_without_redis(self):
+        with self.assertRaises(ImproperlyConfigured):
+            otp.get_backend()
+
+    @override_settings(OTP_BACKEND='memory')
+    def test_unknown_backend_is_refused(self):
+        with self.assertRaises(ImproperlyConfigured):
+            otp.get_backend()
+
+    @override_settings(OTP_BACKEND='locmem')
+    def test_locmem_when_asked_for(self):
+        self.assertIsInstance(otp.get_backend(), LocMemOTPBackend)
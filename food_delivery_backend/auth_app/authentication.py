@@ -1,3 +1,4 @@
+from django.core.cache import cache
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
 from django.utils.translation import gettext_lazy as _
@@ -6,19 +7,49 @@ from .models import Vendor
 import logging
 logger = logging.getLogger(__name__)
 
+# Active vendors resolved from a token's vendor_id claim: vendor_id -> Vendor pk.
+# Dropped from the Vendor post_save/post_delete signals (auth_app.signals), so a
+# deactivated vendor is locked out on its next request; the TTL only bounds
+# changes that bypass signals, such as queryset.update().
+PRINCIPAL_KEY_PREFIX = 'vendor_principal'
+PRINCIPAL_TTL = 60 * 10  # 10 minutes
+
+
+def _principal_key(vendor_id):
+    return f"{PRINCIPAL_KEY_PREFIX}:{vendor_id}"
+
+
+def forget_vendor_principal(vendor_id):
+    try:
+        cache.delete(_principal_key(vendor_id))
+    except Exception as e:
+        logger.warning(f"Could not drop cached principal for vendor {vendor_id}: {e}")
+
+
 # Define a simple proxy class
 class VendorUserProxy:
     # Mimics necessary attributes for DRF checks
     is_authenticated = True
     is_anonymous = False
     # Add attributes to hold vendor info
-    vendor_instance = None
     vendor_id = None
+    pk = None  # Vendor primary key, for filtering (e.g. Order.objects.filter(vendor_id=request.user.pk))
 
-    def __init__(self, vendor=None):
+    def __init__(self, vendor=None, vendor_id=None, pk=None):
+        self._vendor = vendor
         if vendor:
-            self.vendor_instance = vendor
             self.vendor_id = vendor.vendor_id
+            self.pk = vendor.pk
+        else:
+            self.vendor_id = vendor_id
+            self.pk = pk
+
+    @property
+    def vendor_instance(self):
+        """The full Vendor row, loaded on first use; views that only filter by vendor never pay for it."""
+        if self._vendor is None and self.pk is not None:
+            self._vendor = Vendor.objects.get(pk=self.pk)
+        return self._vendor
 
     # Add other methods if needed by permissions (e.g., has_perm)
     def __str__(self):
@@ -28,9 +59,10 @@ class VendorUserProxy:
 class VendorJWTAuthentication(JWTAuthentication):
     """
     Authenticates Vendor based on vendor_id claim in JWT.
-    Attaches the corresponding Vendor model instance to request.user.vendor_instance
-    and the vendor_id to request.user.vendor_id for convenience.
-    Sets request.user to an authenticated VendorUserProxy instance.
+    Sets request.user to an authenticated VendorUserProxy carrying the vendor_id
+    and the Vendor pk; request.user.vendor_instance loads the full Vendor lazily.
+    The vendor lookup is cached (see PRINCIPAL_TTL), so steady polling costs no
+    auth queries.
     """
     def authenticate(self, request):
         header = self.get_header(request)
@@ -62,21 +94,37 @@ class VendorJWTAuthentication(JWTAuthentication):
             logger.warning("Token validation succeeded but 'vendor_id' claim is missing.")
             raise AuthenticationFailed(_("Token is missing required vendor identification."), code="token_claim_missing")
 
+        key = _principal_key(vendor_id_claim)
         try:
-            # Fetch the active vendor based on the claim
-            vendor_instance = Vendor.objects.get(vendor_id=vendor_id_claim, is_active=True)
-            logger.debug(f"Vendor found for vendor_id claim {vendor_id_claim}: {vendor_instance}")
-        except Vendor.DoesNotExist:
-            logger.warning(f"Vendor with vendor_id {vendor_id_claim} from token not found or not active.")
-            raise AuthenticationFailed(_("Vendor account associated with this token not found or is disabled."), code="vendor_not_found")
+            vendor_pk = cache.get(key)
         except Exception as e:
-            logger.error(f"Database error fetching vendor {vendor_id_claim}: {e}", exc_info=True)
-            raise AuthenticationFailed(_("Could not retrieve vendor details for authentication."), code="vendor_fetch_error")
+            # A cache outage costs a query per request, not a failed login
+            logger.warning(f"Vendor principal cache unavailable: {e}")
+            return (VendorUserProxy(vendor_id=vendor_id_claim, pk=self._load(vendor_id_claim)), validated_token)
+        if vendor_pk is None:
+            vendor_pk = self._load(vendor_id_claim)
+            try:
+                cache.set(key, vendor_pk, PRINCIPAL_TTL)
+            except Exception as e:
+                logger.warning(f"Could not cache principal for vendor {vendor_id_claim}: {e}")
 
         # Use the new VendorUserProxy class
-        user_proxy = VendorUserProxy(vendor=vendor_instance)
+        user_proxy = VendorUserProxy(vendor_id=vendor_id_claim, pk=vendor_pk)
         # No need to set is_authenticated manually, it's True by default
 
         logger.debug(f"Authentication successful for vendor {vendor_id_claim}. Attaching vendor proxy to request.user.")
         # Return the user proxy and the validated token
         return (user_proxy, validated_token)
+
+    def _load(self, vendor_id):
+        try:
+            # Fetch the active vendor based on the claim
+            vendor_pk = Vendor.objects.filter(vendor_id=vendor_id, is_active=True).values_list('pk', flat=True).get()
+            logger.debug(f"Vendor found for vendor_id claim {vendor_id}: {vendor_pk}")
+        except Vendor.DoesNotExist:
+            logger.warning(f"Vendor with vendor_id {vendor_id} from token not found or not active.")
+            raise AuthenticationFailed(_("Vendor account associated with this token not found or is disabled."), code="vendor_not_found")
+        except Exception as e:
+            logger.error(f"Database error fetching vendor {vendor_id}: {e}", exc_info=True)
+            raise AuthenticationFailed(_("Could not retrieve vendor details for authentication."), code="vendor_fetch_error")
+        return vendor_pk
@@ -0,0 +1,155 @@
+"""
+Delivery fee quotes per (vendor, pincode).
+
+The fee rule lives in ``delivery_fee_for_distance``; ``DeliveryFeeView``,
+the batch quote endpoint and ``PlaceOrderView`` all go through
+``quote_vendors``/``quote_vendor`` so they return identical numbers.
+
+Quotes are cached under a per-vendor version number that is bumped from the
+Vendor post_save/post_delete signals whenever its coordinates may have
+changed, so stale distances are never served. Warm lookups need no database
+query and no geo work; a batch of vendors costs two cache round trips.
+"""
+import logging
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .geo import distances_km
+from .pincodes import normalize_pincode, resolve_pincode
+
+logger = logging.getLogger(__name__)
+
+BASE_DELIVERY_FEE = 20.0
+FREE_RADIUS_KM = 5.0
+FEE_PER_EXTRA_KM = 5.0
+
+
+QUOTE_KEY_PREFIX = 'delivery_quote:v1'  # Bump when the fee rule changes
+QUOTE_TTL = 60 * 60 * 6  # 6 hours
+MAX_BATCH_VENDORS = 100
+
+DeliveryQuote = namedtuple('DeliveryQuote', ['vendor_id', 'pincode', 'distance_km', 'delivery_fee'])
+
+
+class QuoteUnavailable(Exception):
+    """The delivery pincode could not be located."""
+
+
+def delivery_fee_for_distance(distance):
+    """20 within 5 km, plus 5 per km beyond that; rounded to 2 places."""
+    if distance <= FREE_RADIUS_KM:
+        fee = BASE_DELIVERY_FEE
+    else:
+        fee = BASE_DELIVERY_FEE + (distance - FREE_RADIUS_KM) * FEE_PER_EXTRA_KM
+    return round(fee, 2)
+
+
+def is_test_pincode(pincode):
+    """True for settings.DELIVERY_TEST_PINCODE, which gets the flat base fee (app test builds only)."""
+    test_pincode = getattr(settings, 'DELIVERY_TEST_PINCODE', '')
+    return bool(test_pincode) and pincode == test_pincode
+
+
+def _version_key(vendor_id):
+    return f"{QUOTE_KEY_PREFIX}:version:{vendor_id}"
+
+
+def _quote_key(vendor_id, version, pincode):
+    return f"{QUOTE_KEY_PREFIX}:{vendor_id}:{version}:{pincode}"
+
+
+def invalidate_vendor_quotes(vendor_id):
+    """Orphan every cached quote for the vendor (called from signals)."""
+    try:
+        if not cache.add(_version_key(vendor_id), 1, timeout=None):
+            cache.incr(_version_key(vendor_id))
+    except Exception as e:
+        logger.warning(f"Could not invalidate delivery quotes for vendor {vendor_id}: {e}")
+
+
+def _compute(rows, pincode):
+    """Quote ``[(vendor_id, lat, lng), ...]`` for one pincode in one pass."""
+    quotes = {}
+    located = [row for row in rows if row[1] is not None and row[2] is not None]
+    for vendor_id, lat, lng in rows:
+        if lat is None or lng is None:
+            quotes[vendor_id] = None  # Vendor has no location yet
+    if not located:
+        return quotes
+
+    if is_test_pincode(pincode):
+        for vendor_id, _, _ in located:
+            quotes[vendor_id] = DeliveryQuote(vendor_id, pincode, 0.0, BASE_DELIVERY_FEE)
+        return quotes
+
+    coords = resolve_pincode(pincode)
+    if not coords:
+        raise QuoteUnavailable(f"Could not locate pincode {pincode}")
+    _, lats, lngs = zip(*located)
+    distances = distances_km(coords[0], coords[1], lats, lngs)
+    for (vendor_id, _, _), distance in zip(located, distances.tolist()):
+        quotes[vendor_id] = DeliveryQuote(vendor_id, pincode, round(distance, 2), delivery_fee_for_distance(distance))
+    return quotes
+
+
+def quote_vendors(vendor_ids, pincode, vendors=None):
+    """
+    Return ``{vendor_id: DeliveryQuote or None}`` for one delivery pincode.
+
+    ``None`` marks a vendor without coordinates; unknown vendor_ids are left
+    out. ``vendors`` may pass already loaded Vendor instances to skip the
+    database on a cache miss. Raises QuoteUnavailable if the pincode can't be
+    located.
+    """
+    pincode = normalize_pincode(pincode)
+    if not pincode:
+        raise QuoteUnavailable("Invalid pincode")
+    vendor_ids = list(dict.fromkeys(str(v) for v in vendor_ids))
+    if not vendor_ids:
+        return {}
+
+    keys, cached = {}, {}
+    # Test pincode quotes skip the cache, so turning the setting off takes effect at once
+    if not is_test_pincode(pincode):
+        try:
+            versions = cache.get_many([_version_key(v) for v in vendor_ids])
+            keys = {v: _quote_key(v, versions.get(_version_key(v), 0), pincode) for v in vendor_ids}
+            cached = cache.get_many(list(keys.values()))
+        except Exception as e:
+            logger.warning(f"Delivery quote cache unavailable: {e}")
+            keys, cached = {}, {}
+
+    quotes = {}
+    missing = []
+    for vendor_id in vendor_ids:
+        value = cached.get(keys.get(vendor_id))
+        if value is not None:
+            quotes[vendor_id] = DeliveryQuote(*value) if value else None
+        else:
+            missing.append(vendor_id)
+    if not missing:
+        return quotes
+
+    known = {v.vendor_id: v for v in (vendors or [])}
+    rows = [(v, known[v].latitude, known[v].longitude) for v in missing if v in known]
+    to_load = [v for v in missing if v not in known]
+    if to_load:
+        from .models import Vendor  # Avoid circular import at module load
+        rows.extend(Vendor.objects.filter(vendor_id__in=to_load).values_list('vendor_id', 'latitude', 'longitude'))
+
+    fresh = _compute(rows, pincode)
+    quotes.update(fresh)
+    if keys:
+        try:
+            # Store vendors without coordinates as an empty tuple (falsy, not None)
+            cache.set_many({keys[v]: tuple(q) if q else () for v, q in fresh.items()}, timeout=QUOTE_TTL)
+        except Exception as e:
+            logger.warning(f"Could not store delivery quotes: {e}")
+    return quotes
+
+
+def quote_vendor(vendor, pincode):
+    """Quote a single Vendor instance; returns a DeliveryQuote or None."""
+    return quote_vendors([vendor.vendor_id], pincode, vendors=[vendor]).get(vendor.vendor_id)
@@ -0,0 +1,206 @@
+"""
+Order events pushed to connected apps (see auth_app.realtime for the
+WebSocket and server-sent-event endpoints).
+
+Events are published to channels named after who should hear them:
+
+* ``vendor:<Vendor pk>``
+* ``customer:<CustomerProfile pk>``
+* ``rider:<DeliveryUser id>``
+
+Publishing is fire-and-forget and happens after the transaction commits
+(``publish_on_commit``); a broker failure is logged and never fails the
+request. Apps that miss an event catch up with their normal list endpoint.
+
+``EVENTS_BACKEND`` picks the broker:
+
+* ``redis`` - Redis pub/sub on ``EVENTS_REDIS_URL``, so events reach
+  subscribers connected to any server process;
+* ``local`` - in-process fan-out, for tests and single-process servers.
+
+Unset, Redis is used when the default cache is django-redis; with any other
+cache ``local`` must be asked for by name, since it only reaches subscribers
+in the same process.
+"""
+import json
+import asyncio
+import logging
+import threading
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'events:'
+
+
+def vendor_channel(vendor_pk):
+    return f"vendor:{vendor_pk}"
+
+
+def customer_channel(customer_profile_pk):
+    return f"customer:{customer_profile_pk}"
+
+
+def rider_channel(rider_id):
+    return f"rider:{rider_id}"
+
+
+class LocalBroker:
+    """
+    Fan-out inside this process. Subscribers live on an asyncio loop;
+    ``publish`` may be called from any thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}  # channel -> set of LocalSubscription
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.deliver(message)
+        return len(subscribers)
+
+    async def subscribe(self, channels):
+        subscription = LocalSubscription(self, channels, asyncio.get_running_loop())
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+
+class LocalSubscription:
+    def __init__(self, broker, channels, loop):
+        self.broker = broker
+        self.channels = list(channels)
+        self.loop = loop
+        self.queue = asyncio.Queue()
+
+    def deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, message)
+        except RuntimeError:
+            pass  # Loop already closed; close() is on its way
+
+    async def get(self, timeout):
+        """The next message, or None after ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def close(self):
+        self.broker._unsubscribe(self)
+
+
+class RedisBroker:
+    def __init__(self, url):
+        import redis
+
+        self.url = url
+        self._client = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        return self._client.publish(CHANNEL_PREFIX + channel, json.dumps(message))
+
+    async def subscribe(self, channels):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(*[CHANNEL_PREFIX + channel for channel in channels])
+        return RedisSubscription(client, pubsub)
+
+
+class RedisSubscription:
+    def __init__(self, client, pubsub):
+        self.client = client
+        self.pubsub = pubsub
+
+    async def get(self, timeout):
+        message = await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+    async def close(self):
+        await self.pubsub.aclose()
+        await self.client.aclose()
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                name = settings.EVENTS_BACKEND
+                if name is None and settings.CACHES['default']['BACKEND'].startswith('django_redis'):
+                    name = 'redis'
+                if name not in ('redis', 'local'):
+                    raise ImproperlyConfigured(
+                        f"Set EVENTS_BACKEND to 'redis', or 'local' for tests and single-process servers (got {name!r})"
+                    )
+                _broker = RedisBroker(settings.EVENTS_REDIS_URL) if name == 'redis' else LocalBroker()
+    return _broker
+
+
+def order_event(event, order, **extra):
+    return {
+        'event': event,
+        'order_number': order.order_number,
+        'status': order.status,
+        'at': timezone.now().isoformat(),
+        **extra,
+    }
+
+
+def track_status(instance):
+    """Remember the status an order was loaded with (post_init), to spot changes on save."""
+    instance._published_status = instance.__dict__.get('status')  # Never load a deferred field
+
+
+def status_event(instance, created):
+    """'order.created', 'order.status_changed' or None for a just-saved order."""
+    previous = instance.__dict__.get('_published_status')
+    instance._published_status = instance.status
+    if created:
+        return 'order.created'
+    if previous is not None and previous != instance.status:
+        return 'order.status_changed'
+    return None
+
+
+def publish(channels, message):
+    if callable(message):
+        message = message()
+    broker = get_broker()
+    for channel in channels:
+        try:
+            broker.publish(channel, message)
+        except Exception as e:
+            logger.warning(f"Could not publish {message.get('event')} to {channel}: {e}")
+
+
+def publish_on_commit(channels, message):
+    """``message`` may be a callable, to build it from what the transaction ends up committing."""
+    channels = [channel for channel in channels if channel]
+    if channels:
+        transaction.on_commit(lambda: publish(channels, message))
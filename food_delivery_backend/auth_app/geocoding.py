@@ -0,0 +1,267 @@
+"""
+Cached geocoding.
+
+Every upstream (Nominatim) lookup goes through ``geocode_cache``, a two-tier
+cache keyed on the normalized address or pincode:
+
+1. a small in-process LRU, answering repeat lookups without any I/O;
+2. the shared Django cache (``CACHES['default']``, Redis), so all workers
+   benefit from a lookup done by any one of them.
+
+Found and not-found results are cached with separate TTLs. Concurrent misses
+for the same key are coalesced: within a process the first thread registers
+an in-flight call that the others wait on and take the result from, and
+across processes through a short-lived cache lock, so a burst of requests
+for one pincode produces a single upstream call.
+"""
+import hashlib
+import re
+import threading
+import time
+import logging
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from geopy.geocoders import Nominatim
+from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+
+logger = logging.getLogger(__name__)
+
+NOMINATIM_USER_AGENT = "food_delivery_app"
+NOMINATIM_TIMEOUT = 5  # seconds
+
+GEOCODE_CACHE_DEFAULTS = {
+    'LRU_SIZE': 4096,
+    'POSITIVE_TTL': 60 * 60 * 24 * 30,  # 30 days
+    'NEGATIVE_TTL': 60 * 60,  # 1 hour
+    'LOCK_TIMEOUT': NOMINATIM_TIMEOUT + 5,
+}
+
+_NEGATIVE = 'NOT_FOUND'  # Stored for "upstream has no result"
+_MISSING = object()
+
+
+class GeocoderUnavailable(Exception):
+    """The upstream geocoder failed; the result must not be cached."""
+
+
+def normalize_address(address):
+    """Lowercase, drop punctuation noise and collapse whitespace."""
+    text = re.sub(r'[\s,;.]+', ' ', str(address).lower())
+    return text.strip()
+
+
+_nominatim = None
+
+
+def nominatim_geocode(query):
+    """
+    Return (latitude, longitude) for ``query`` or None if Nominatim has no
+    match. Raises GeocoderUnavailable on timeouts and service errors.
+    """
+    global _nominatim
+    if _nominatim is None:
+        _nominatim = Nominatim(user_agent=NOMINATIM_USER_AGENT, timeout=NOMINATIM_TIMEOUT)
+    try:
+        location = _nominatim.geocode(query)
+    except (GeocoderTimedOut, GeocoderServiceError) as e:
+        raise GeocoderUnavailable(str(e)) from e
+    if not location:
+        return None
+    return location.latitude, location.longitude
+
+
+class _InFlight:
+    """One in-process fetch that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class GeocodeCache:
+    def __init__(self, prefix='geocode'):
+        self.prefix = prefix
+        self._lru = OrderedDict()  # key -> (expires_at, value)
+        self._lru_lock = threading.Lock()
+        self._inflight = {}  # key -> _InFlight
+        self._inflight_guard = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    # --- configuration ---
+    def _config(self, name):
+        overrides = getattr(settings, 'GEOCODE_CACHE', {})
+        return overrides.get(name, GEOCODE_CACHE_DEFAULTS[name])
+
+    # --- monitoring ---
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {
+                'local_hits': 0,
+                'shared_hits': 0,
+                'negative_hits': 0,
+                'misses': 0,
+                'coalesced': 0,
+                'upstream_calls': 0,
+                'upstream_errors': 0,
+            }
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def stats(self):
+        with self._stats_lock:
+            data = dict(self._stats)
+        with self._lru_lock:
+            data['local_entries'] = len(self._lru)
+        lookups = data['local_hits'] + data['shared_hits'] + data['misses']
+        data['hit_ratio'] = round((data['local_hits'] + data['shared_hits']) / lookups, 4) if lookups else None
+        return data
+
+    # --- tiers ---
+    def _shared_key(self, key):
+        return f"{self.prefix}:{hashlib.sha1(key.encode('utf-8')).hexdigest()}"
+
+    def _local_get(self, key):
+        with self._lru_lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._lru[key]
+                return _MISSING
+            self._lru.move_to_end(key)
+            return value
+
+    def _local_set(self, key, value, ttl):
+        with self._lru_lock:
+            self._lru[key] = (time.monotonic() + ttl, value)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self._config('LRU_SIZE'):
+                self._lru.popitem(last=False)
+
+    def _shared_get(self, key):
+        try:
+            return cache.get(self._shared_key(key), _MISSING)
+        except Exception as e:
+            logger.warning(f"Geocode cache read failed for {key}: {e}")
+            return _MISSING
+
+    def _store(self, key, result):
+        value = list(result) if result else _NEGATIVE
+        ttl = self._config('POSITIVE_TTL') if result else self._config('NEGATIVE_TTL')
+        self._local_set(key, value, ttl)
+        try:
+            cache.set(self._shared_key(key), value, timeout=ttl)
+        except Exception as e:
+            logger.warning(f"Geocode cache write failed for {key}: {e}")
+
+    def _lookup(self, key):
+        """Check both tiers; returns _MISSING on a miss."""
+        value = self._local_get(key)
+        if value is not _MISSING:
+            self._count('local_hits')
+            return value
+        value = self._shared_get(key)
+        if value is not _MISSING:
+            self._count('shared_hits')
+            ttl = self._config('POSITIVE_TTL') if value != _NEGATIVE else self._config('NEGATIVE_TTL')
+            self._local_set(key, value, ttl)
+        return value
+
+    @staticmethod
+    def _result(value):
+        return None if value == _NEGATIVE else tuple(value)
+
+    # --- public API ---
+    def get_or_fetch(self, key, fetch):
+        """
+        Return the cached result for ``key`` or call ``fetch()`` once to get
+        it. ``fetch`` returns (lat, lng) or None, and raises
+        GeocoderUnavailable for errors that must not be cached.
+        """
+        value = self._lookup(key)
+        if value is not _MISSING:
+            if value == _NEGATIVE:
+                self._count('negative_hits')
+            return self._result(value)
+
+        with self._inflight_guard:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+        if not leader:
+            # Another thread in this process is already fetching this key;
+            # its result is handed over directly, never re-read from the cache
+            self._count('coalesced')
+            call.done.wait()
+            return call.result
+
+        try:
+            # The previous leader may have stored the result after our lookup
+            value = self._local_get(key)
+            if value is not _MISSING:
+                call.result = self._result(value)
+            else:
+                self._count('misses')
+                call.result = self._fetch_coalesced(key, fetch)
+            return call.result
+        finally:
+            with self._inflight_guard:
+                del self._inflight[key]
+            call.done.set()
+
+    def _fetch_coalesced(self, key, fetch):
+        lock_key = f"{self._shared_key(key)}:lock"
+        lock_timeout = self._config('LOCK_TIMEOUT')
+        try:
+            have_lock = cache.add(lock_key, 1, timeout=lock_timeout)
+        except Exception:
+            have_lock = True  # Shared cache down; just fetch
+        if not have_lock:
+            # Another worker is fetching; wait for its result to land
+            self._count('coalesced')
+            deadline = time.monotonic() + lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                value = self._shared_get(key)
+                if value is not _MISSING:
+                    ttl = self._config('POSITIVE_TTL') if value != _NEGATIVE else self._config('NEGATIVE_TTL')
+                    self._local_set(key, value, ttl)
+                    return self._result(value)
+            logger.warning(f"Timed out waiting for concurrent geocode of {key}; fetching directly")
+        try:
+            self._count('upstream_calls')
+            try:
+                result = fetch()
+            except GeocoderUnavailable as e:
+                self._count('upstream_errors')
+                logger.error(f"Geocoder unavailable for {key}: {e}")
+                return None
+            self._store(key, result)
+            return tuple(result) if result else None
+        finally:
+            if have_lock:
+                try:
+                    cache.delete(lock_key)
+                except Exception:
+                    pass
+
+
+geocode_cache = GeocodeCache()
+
+
+def geocode_address(address):
+    """Cached free-text address geocoding; returns (lat, lng) or None."""
+    key = f"address:{normalize_address(address)}"
+    return geocode_cache.get_or_fetch(key, lambda: nominatim_geocode(address))
+
+
+def geocode_pincode(pincode):
+    """Cached pincode geocoding via Nominatim; returns (lat, lng) or None."""
+    return geocode_cache.get_or_fetch(f"pincode:{pincode}", lambda: nominatim_geocode(f"{pincode}, India"))
@@ -0,0 +1,78 @@
+"""
+Index audit for the hot query shapes.
+
+``query_shapes()`` lists the ORM queries the apps issue on every poll or page
+view, written the way the views write them (parameter values don't matter).
+``python manage.py audit_indexes`` runs each through the database's query
+planner (``QuerySet.explain()``, i.e. EXPLAIN QUERY PLAN on SQLite) and fails
+if any of them reads a whole table, so a dropped index or a new unindexed
+filter is caught before deploy.
+
+When adding a hot query to a view, add its shape here too.
+"""
+import re
+import uuid
+from collections import namedtuple
+
+from django.db.models import Q
+from django.utils import timezone
+
+QueryShape = namedtuple('QueryShape', ['name', 'build'])
+AuditResult = namedtuple('AuditResult', ['shape', 'plan', 'full_scans', 'sorts'])
+
+# A table read row by row: SQLite's "SCAN <table>" without "USING ... INDEX",
+# PostgreSQL's "Seq Scan on <table>". "SCAN <table> USING INDEX" is a walk in
+# index order, which is what serves ORDER BY ... LIMIT, so it isn't flagged.
+FULL_SCAN_RE = re.compile(r'\bSCAN (?!CONSTANT ROW)\S+$|\bSeq Scan on\b')
+# Ordering not served by an index: fine for small results, worth a look otherwise
+SORT_RE = re.compile(r'USE TEMP B-TREE FOR ORDER BY|\bSort\b')
+
+
+def query_shapes():
+    from auth_app.models import Vendor, FoodListing, Notification, OutboxMessage
+    from auth_app.models import Order as VendorOrder
+    from customer_app.models import Order as CustomerOrder
+
+    return [
+        QueryShape('customer order history',
+                   lambda: CustomerOrder.objects.filter(customer_id=1).order_by('-created_at')),
+        QueryShape('rider order list',
+                   lambda: CustomerOrder.objects.filter(assigned_partner_id=uuid.UUID(int=1)).order_by('-created_at')),
+        QueryShape('vendor order list',
+                   lambda: VendorOrder.objects.filter(vendor_id=1).order_by('-created_at')),
+        QueryShape('vendor order list by status',
+                   lambda: VendorOrder.objects.filter(vendor_id=1, status='Pending').order_by('-created_at')),
+        QueryShape('vendor order sync',
+                   lambda: VendorOrder.objects.filter(Q(updated_at__gt=timezone.now()) | Q(updated_at=timezone.now(), id__gt=1),
+                                                      vendor_id=1, updated_at__gte=timezone.now())
+                   .order_by('updated_at', 'id')[:201]),
+        QueryShape('vendor notifications',
+                   lambda: Notification.objects.filter(vendor_id=1)),
+        QueryShape('vendor available items',
+                   lambda: FoodListing.objects.filter(vendor_id=1, is_available=True)),
+        QueryShape('newest available items',
+                   lambda: FoodListing.objects.filter(is_available=True).order_by('-created_at')[:10]),
+        QueryShape('top rated vendors',
+                   lambda: Vendor.objects.filter(is_active=True).order_by('-rating', 'id')[:20]),
+        QueryShape('vendor list keyset page',
+                   lambda: Vendor.objects.filter(Q(rating__lt=4.5) | Q(rating=4.5, id__gt=1), is_active=True)
+                   .order_by('-rating', 'id')[:21]),
+        QueryShape('outbox claim',
+                   lambda: OutboxMessage.objects.filter(status=OutboxMessage.STATUS_PENDING,
+                                                        available_at__lte=timezone.now()).order_by('available_at')[:50]),
+    ]
+
+
+def audit(shapes=None):
+    """Explain every shape; returns a list of AuditResult."""
+    results = []
+    for shape in shapes if shapes is not None else query_shapes():
+        plan = shape.build().explain()
+        lines = plan.splitlines()
+        results.append(AuditResult(
+            shape=shape,
+            plan=plan,
+            full_scans=[line.strip() for line in lines if FULL_SCAN_RE.search(line)],
+            sorts=[line.strip() for line in lines if SORT_RE.search(line)],
+        ))
+    return results
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from auth_app.index_audit import audit
+
+
+class Command(BaseCommand):
+    help = "Explain the hot query shapes (auth_app.index_audit) and fail if any of them scans a whole table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', action='store_true', help="Print every query plan, not only the flagged ones")
+
+    def handle(self, *args, **options):
+        results = audit()
+        flagged = [result for result in results if result.full_scans]
+        for result in results:
+            if result.full_scans:
+                self.stdout.write(self.style.ERROR(f"FULL SCAN  {result.shape.name}"))
+                for line in result.full_scans:
+                    self.stdout.write(f"    {line}")
+            else:
+                note = "  (sorts without an index)" if result.sorts else ""
+                self.stdout.write(f"ok         {result.shape.name}{note}")
+            if options['plans'] or result.full_scans:
+                self.stdout.write(f"    SQL: {result.shape.build().query}")
+                for line in result.plan.splitlines():
+                    self.stdout.write(f"    | {line}")
+        if flagged:
+            raise CommandError(f"{len(flagged)} of {len(results)} query shapes scan a whole table on {connection.vendor}")
+        self.stdout.write(self.style.SUCCESS(f"All {len(results)} query shapes use an index on {connection.vendor}"))
@@ -0,0 +1,76 @@
+import csv
+from collections import defaultdict
+from statistics import median
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auth_app.models import PincodeLocation
+from auth_app.pincodes import CSV_PATH, CSV_FIELDS, normalize_pincode
+
+# India's bounding box; directory exports carry swapped and mis-keyed coordinates
+LATITUDE_RANGE = (6.0, 37.5)
+LONGITUDE_RANGE = (68.0, 97.5)
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the bundled pincode centroid CSV from a post-office directory export "
+        "(any CSV with pincode/latitude/longitude columns, one row per office). "
+        "Each pincode's centroid is the median of its offices, so a few mis-keyed "
+        "offices don't drag it away; coordinates outside India are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', help="Path to the source CSV")
+        parser.add_argument('--output', default=str(CSV_PATH), help="Where to write the gazetteer CSV")
+        parser.add_argument(
+            '--include-learned', action='store_true',
+            help="Also fold in centroids stored in PincodeLocation (e.g. from Nominatim)",
+        )
+
+    def handle(self, *args, **options):
+        offices = defaultdict(list)
+        skipped = 0
+        try:
+            with open(options['source'], newline='', encoding='utf-8-sig') as fh:
+                reader = csv.DictReader(fh)
+                columns = {name.lower().strip(): name for name in (reader.fieldnames or [])}
+                missing = [c for c in CSV_FIELDS if c not in columns]
+                if missing:
+                    raise CommandError(f"Source CSV is missing columns: {', '.join(missing)}")
+                for row in reader:
+                    pincode = normalize_pincode(row[columns['pincode']])
+                    try:
+                        latitude = float(row[columns['latitude']])
+                        longitude = float(row[columns['longitude']])
+                    except (TypeError, ValueError):
+                        skipped += 1
+                        continue
+                    in_india = (LATITUDE_RANGE[0] <= latitude <= LATITUDE_RANGE[1]
+                                and LONGITUDE_RANGE[0] <= longitude <= LONGITUDE_RANGE[1])
+                    if not pincode or not in_india:
+                        skipped += 1
+                        continue
+                    offices[pincode].append((latitude, longitude))
+        except FileNotFoundError:
+            raise CommandError(f"Source file not found: {options['source']}")
+
+        centroids = {
+            pincode: (median(lat for lat, _ in coords), median(lng for _, lng in coords))
+            for pincode, coords in offices.items()
+        }
+
+        if options['include_learned']:
+            for pincode, lat, lng in PincodeLocation.objects.values_list('pincode', 'latitude', 'longitude'):
+                centroids.setdefault(pincode, (lat, lng))
+
+        with open(options['output'], 'w', newline='', encoding='utf-8') as fh:
+            writer = csv.writer(fh)
+            writer.writerow(CSV_FIELDS)
+            for pincode in sorted(centroids):
+                lat, lng = centroids[pincode]
+                writer.writerow([pincode, f"{lat:.6f}", f"{lng:.6f}"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(centroids)} pincode centroids to {options['output']} ({skipped} rows skipped)"
+        ))
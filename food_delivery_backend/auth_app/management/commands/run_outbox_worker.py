@@ -0,0 +1,53 @@
+import os
+import time
+import socket
+import signal
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from auth_app import outbox
+
+logger = logging.getLogger(__name__)
+
+PURGE_INTERVAL = 60 * 60  # seconds between purges of finished messages
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued outbox messages (vendor notifications, FCM pushes, SMS). "
+        "Runs until interrupted; start as many as needed, they claim disjoint batches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help="Messages claimed per batch")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds to sleep when the outbox is empty")
+        parser.add_argument('--once', action='store_true', help="Drain what is due now, then exit")
+
+    def handle(self, *args, **options):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        self.stdout.write(f"Outbox worker {worker_id} started")
+
+        total = failed = 0
+        last_purge = 0.0
+        try:
+            while not stopping:
+                close_old_connections()
+                claimed, succeeded = outbox.drain(worker_id, options['batch_size'])
+                total += claimed
+                failed += claimed - succeeded
+                if time.monotonic() - last_purge > PURGE_INTERVAL:
+                    purged = outbox.purge_done()
+                    if purged:
+                        logger.info(f"Purged {purged} delivered outbox messages")
+                    last_purge = time.monotonic()
+                if not claimed:
+                    if options['once']:
+                        break
+                    time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Processed {total} message(s), {failed} not delivered"))
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:37
+
+from django.db import migrations, models
+
+# Copied from auth_app.geo as it was when this migration was written,
+# so later changes to that module can't change what this migration does.
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 8
+
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lng_range = [-180.0, 180.0]
+    chars = []
+    bit = 0
+    ch = 0
+    even = True  # even bits refine longitude, odd bits latitude
+    while len(chars) < precision:
+        rng, value = (lng_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            ch = (ch << 1) | 1
+            rng[0] = mid
+        else:
+            ch = ch << 1
+            rng[1] = mid
+        even = not even
+        bit += 1
+        if bit == 5:
+            chars.append(GEOHASH_ALPHABET[ch])
+            bit = 0
+            ch = 0
+    return ''.join(chars)
+
+
+def backfill_geohash(apps, schema_editor):
+    Vendor = apps.get_model('auth_app', 'Vendor')
+    vendors = Vendor.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for vendor in vendors.iterator():
+        vendor.geohash = encode_geohash(vendor.latitude, vendor.longitude)
+        vendor.save(update_fields=['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0009_vendor_closing_time_vendor_is_open_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Derived from latitude/longitude on save', max_length=12, null=True),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0010_vendor_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PincodeLocation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pincode', models.CharField(max_length=6, unique=True)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('source', models.CharField(choices=[('nominatim', 'Nominatim'), ('manual', 'Manual')], default='nominatim', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
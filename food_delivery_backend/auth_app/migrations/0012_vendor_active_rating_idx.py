@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0011_pincodelocation'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(fields=['is_active', '-rating', 'id'], name='vendor_active_rating_idx'),
+        ),
+    ]
@@ -0,0 +1,145 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:51
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copied from auth_app.schedule as it was when this migration was written,
+# so later changes to that module can't change what this migration does.
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+ALWAYS_OPEN = [[0, MINUTES_PER_WEEK]]
+DAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+WINDOW_RE = re.compile(r'(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})')
+DAY_RANGE_RE = re.compile(r'([a-z]{3})[a-z]*(?:\s*-\s*([a-z]{3})[a-z]*)?')
+
+
+class ScheduleError(ValueError):
+    pass
+
+
+def _minute(hours, minutes):
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or (hours == 24 and minutes):
+        raise ScheduleError(f"Invalid time {hours:02d}:{minutes:02d}")
+    return hours * 60 + minutes
+
+
+def _parse_days(text):
+    text = text.strip().lower()
+    if not text:
+        return list(range(7))
+    days = []
+    for part in text.split(','):
+        match = DAY_RANGE_RE.fullmatch(part.strip())
+        if not match or match.group(1) not in DAY_NAMES or (match.group(2) and match.group(2) not in DAY_NAMES):
+            raise ScheduleError(f"Invalid days '{part.strip()}'")
+        first = DAY_NAMES.index(match.group(1))
+        last = DAY_NAMES.index(match.group(2)) if match.group(2) else first
+        day = first
+        while True:  # Ranges may wrap, e.g. Sat-Mon
+            days.append(day)
+            if day == last:
+                break
+            day = (day + 1) % 7
+    return days
+
+
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def daily_window(day, open_minute, close_minute):
+    if close_minute == open_minute:
+        close_minute = open_minute + MINUTES_PER_DAY
+    elif close_minute < open_minute:
+        close_minute += MINUTES_PER_DAY
+    start = day * MINUTES_PER_DAY + open_minute
+    end = day * MINUTES_PER_DAY + close_minute
+    if end <= MINUTES_PER_WEEK:
+        return [[start, end]]
+    return [[start, MINUTES_PER_WEEK], [0, end - MINUTES_PER_WEEK]]
+
+
+def parse_open_hours(text):
+    intervals = []
+    for group in re.split(r'[;\n]', text):
+        group = group.strip()
+        if not group:
+            continue
+        first_digit = re.search(r'\d', group)
+        if not first_digit:
+            raise ScheduleError(f"No hours in '{group}'")
+        days = _parse_days(group[:first_digit.start()])
+        windows = WINDOW_RE.findall(group[first_digit.start():])
+        if not windows:
+            raise ScheduleError(f"Invalid hours '{group}'")
+        for oh, om, ch, cm in windows:
+            open_minute, close_minute = _minute(oh, om), _minute(ch, cm)
+            for day in days:
+                intervals.extend(daily_window(day, open_minute, close_minute))
+    if not intervals:
+        raise ScheduleError("Empty schedule")
+    return merge_intervals(intervals)
+
+
+def compile_schedule(vendor):
+    if vendor.open_hours and vendor.open_hours.strip():
+        try:
+            return parse_open_hours(vendor.open_hours)
+        except ScheduleError:
+            return [list(i) for i in ALWAYS_OPEN]  # Unreadable hours don't hide the restaurant
+    if vendor.opening_time and vendor.closing_time:
+        open_minute = vendor.opening_time.hour * 60 + vendor.opening_time.minute
+        close_minute = vendor.closing_time.hour * 60 + vendor.closing_time.minute
+        return merge_intervals(
+            interval for day in range(7) for interval in daily_window(day, open_minute, close_minute)
+        )
+    return [list(i) for i in ALWAYS_OPEN]
+
+
+def backfill_open_schedule(apps, schema_editor):
+    Vendor = apps.get_model('auth_app', 'Vendor')
+    VendorOpenWindow = apps.get_model('auth_app', 'VendorOpenWindow')
+    for vendor in Vendor.objects.iterator():
+        vendor.open_schedule = compile_schedule(vendor)
+        vendor.save(update_fields=['open_schedule'])
+        VendorOpenWindow.objects.bulk_create(
+            VendorOpenWindow(vendor=vendor, start_minute=start, end_minute=end)
+            for start, end in vendor.open_schedule
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0012_vendor_active_rating_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vendor',
+            name='open_schedule',
+            field=models.JSONField(blank=True, default=list, editable=False, help_text='Compiled from the hour fields on save'),
+        ),
+        migrations.CreateModel(
+            name='VendorOpenWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_minute', models.PositiveSmallIntegerField()),
+                ('end_minute', models.PositiveSmallIntegerField()),
+                ('vendor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='open_windows', to='auth_app.vendor')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['start_minute', 'end_minute'], name='vendor_open_window_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_open_schedule, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_account_token_version'),
+        ('auth_app', '0014_outbox_message'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='vendor',
+            name='vendor_active_rating_idx',
+        ),
+        migrations.AddIndex(
+            model_name='foodlisting',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['vendor', 'name'], name='food_vendor_available_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='foodlisting',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['-created_at'], name='food_available_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['vendor', '-created_at'], name='notification_vendor_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['vendor', '-created_at'], name='order_vendor_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['vendor', 'status', '-created_at'], name='order_vendor_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vendor',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-rating', 'id'], name='vendor_top_rated_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_account_token_version'),
+        ('auth_app', '0015_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['vendor', 'updated_at', 'id'], name='order_vendor_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,98 @@
+"""
+Local stand-in for the FCM HTTP v1 endpoint.
+
+Accepts ``POST /v1/projects/<project>/messages:send`` with one
+``{"message": {"token": ...}}`` per request and a bearer token, and answers
+in FCM's format. Tokens starting with "invalid" get UNREGISTERED, tokens
+starting with "malformed" get INVALID_ARGUMENT and tokens starting with
+"flaky" get UNAVAILABLE, so error handling can be exercised. Point
+``FCM_ENDPOINT`` at ``MockFCM.url`` (any project id and access token work).
+Used by the outbox tests (auth_app.tests) and benchmarks/bench_push.py.
+
+    with MockFCM(latency=0.02) as fcm:
+        settings.FCM_ENDPOINT = fcm.url
+        ...
+        print(fcm.requests, fcm.messages)
+"""
+import json
+import re
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PATH_RE = re.compile(r'^/v1/projects/(?P<project>[^/]+)/messages:send$')
+
+# Token prefix -> (HTTP status, gRPC status, FCM error code)
+ERRORS = {
+    'invalid': (404, 'NOT_FOUND', 'UNREGISTERED'),
+    'malformed': (400, 'INVALID_ARGUMENT', 'INVALID_ARGUMENT'),
+    'flaky': (503, 'UNAVAILABLE', 'UNAVAILABLE'),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, like the real endpoint
+    disable_nagle_algorithm = True  # Headers and body are separate writes
+
+    def _reply(self, status, payload):
+        payload = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _error(self, status, grpc_status, error_code=None):
+        error = {'code': status, 'message': error_code or grpc_status, 'status': grpc_status}
+        if error_code:
+            error['details'] = [{'@type': 'type.googleapis.com/google.firebase.fcm.v1.FcmError', 'errorCode': error_code}]
+        self._reply(status, {'error': error})
+
+    def do_POST(self):
+        server = self.server
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        match = PATH_RE.match(self.path)
+        if not match:
+            return self._error(404, 'NOT_FOUND')
+        if not self.headers.get('Authorization', '').startswith('Bearer '):
+            return self._error(401, 'UNAUTHENTICATED')
+        if server.latency:
+            time.sleep(server.latency)
+        with server.lock:
+            server.requests += 1
+            server.messages += 1
+            server.connections.add(self.client_address)
+            server.received.append(body)
+        token = str((body.get('message') or {}).get('token'))
+        for prefix, error in ERRORS.items():
+            if token.startswith(prefix):
+                return self._error(*error)
+        self._reply(200, {'name': f"projects/{match['project']}/messages/{time.time_ns()}"})
+
+    def log_message(self, *args):
+        pass
+
+
+class MockFCM:
+    def __init__(self, latency=0.0):
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.latency = latency
+        self.server.lock = threading.Lock()
+        self.server.requests = self.server.messages = 0
+        self.server.connections = set()
+        self.server.received = []
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    requests = property(lambda self: self.server.requests)
+    messages = property(lambda self: self.server.messages)
+    connections = property(lambda self: len(self.server.connections))
+    received = property(lambda self: self.server.received)
+
+    def __enter__(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 import logging
 import random
+from . import geo
+from . import schedule
 # Remove password hasher imports if no longer needed
 # from django.contrib.auth.hashers import make_password, check_password
 
@@ -12,6 +14,18 @@ logger = logging.getLogger(__name__)
 # --- Remove Vendor Manager ---
 # class VendorManager(BaseUserManager): ...
 
+class VendorQuerySet(models.QuerySet):
+    def open_at(self, minute):
+        """Vendors open at ``minute`` of the week (see auth_app.schedule)."""
+        windows = VendorOpenWindow.objects.filter(
+            vendor=models.OuterRef('pk'), start_minute__lte=minute, end_minute__gt=minute
+        )
+        return self.filter(models.Exists(windows), is_open=True)
+
+    def open_now(self):
+        return self.open_at(schedule.minute_of_week())
+
+
 # --- Reverted Vendor Model ---
 class Vendor(models.Model):
     vendor_id = models.CharField(max_length=20, unique=True, blank=True)
@@ -25,6 +39,7 @@ class Vendor(models.Model):
     rating = models.FloatField(default=0.0)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, null=True, blank=True, db_index=True, editable=False, help_text="Derived from latitude/longitude on save")
     pincode = models.CharField(max_length=10, null=True, blank=True)
     cuisine_type = models.CharField(max_length=100, null=True, blank=True)
     fcm_token = models.CharField(max_length=255, null=True, blank=True)
@@ -36,16 +51,37 @@ class Vendor(models.Model):
     # Optionally, add fields for more granular control
     opening_time = models.TimeField(null=True, blank=True, help_text="Opening time (optional)")
     closing_time = models.TimeField(null=True, blank=True, help_text="Closing time (optional)")
+    open_schedule = models.JSONField(default=list, blank=True, editable=False, help_text="Compiled from the hour fields on save")
+
+    objects = VendorQuerySet.as_manager()
 
     # Remove Django auth fields: is_staff, date_joined, groups, user_permissions
     # Remove USERNAME_FIELD, REQUIRED_FIELDS, objects = VendorManager()
 
+    class Meta:
+        indexes = [
+            # Top-rated lists and keyset pages: WHERE is_active ORDER BY rating DESC, id.
+            # Partial, because SQLite can't use (is_active, ...) for Django's bare "WHERE is_active".
+            models.Index(fields=['-rating', 'id'], condition=models.Q(is_active=True), name='vendor_top_rated_idx'),
+        ]
+
     # Keep custom save logic for vendor_id generation
     def save(self, *args, **kwargs):
         if not self.vendor_id:
             timestamp_part = timezone.now().strftime('%Y%m%d')
             count_part = str(Vendor.objects.count() + 1).zfill(4) # Pad to 4 digits
             self.vendor_id = f'V-{timestamp_part}-{count_part}'
+        # Keep the spatial cell in sync with the coordinates
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geo.encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = None
+        self.open_schedule = schedule.compile_schedule(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
+        if update_fields is not None and schedule.SCHEDULE_FIELDS & set(update_fields):
+            kwargs['update_fields'] = set(kwargs['update_fields']) | {'open_schedule'}
         # No password setting needed here anymore
         super().save(*args, **kwargs)
 
@@ -56,6 +92,34 @@ class Vendor(models.Model):
     def __str__(self):
         return f"{self.restaurant_name} ({self.phone})"
 
+    def is_open_now(self, minute=None):
+        return schedule.vendor_is_open(self, minute)
+
+    def sync_open_windows(self):
+        """Mirror ``open_schedule`` into VendorOpenWindow rows if they differ."""
+        current = list(self.open_windows.order_by('start_minute').values_list('start_minute', 'end_minute'))
+        wanted = [tuple(interval) for interval in self.open_schedule]
+        if current == wanted:
+            return
+        self.open_windows.all().delete()
+        VendorOpenWindow.objects.bulk_create(
+            VendorOpenWindow(vendor=self, start_minute=start, end_minute=end) for start, end in wanted
+        )
+
+class VendorOpenWindow(models.Model):
+    """One compiled opening interval, in minutes since Monday 00:00."""
+    vendor = models.ForeignKey(Vendor, related_name='open_windows', on_delete=models.CASCADE)
+    start_minute = models.PositiveSmallIntegerField()
+    end_minute = models.PositiveSmallIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['start_minute', 'end_minute'], name='vendor_open_window_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.vendor_id}: {self.start_minute}-{self.end_minute}"
+
 class Menu(models.Model):
     vendor = models.ForeignKey(Vendor, related_name='menus', on_delete=models.CASCADE)
     name = models.CharField(max_length=100)
@@ -86,6 +150,12 @@ class FoodListing(models.Model):
     class Meta:
         ordering = ['name']
         unique_together = ('menu', 'name') # Prevent duplicate item names within the same menu
+        indexes = [
+            # A vendor's available items in menu order (partial for the same reason as vendor_top_rated_idx)
+            models.Index(fields=['vendor', 'name'], condition=models.Q(is_available=True), name='food_vendor_available_idx'),
+            # Newest available items (home feed, popular foods)
+            models.Index(fields=['-created_at'], condition=models.Q(is_available=True), name='food_available_created_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if self.menu and not self.vendor_id: self.vendor = self.menu.vendor
@@ -122,6 +192,15 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Vendor order list, newest first, with and without a status filter
+            models.Index(fields=['vendor', '-created_at'], name='order_vendor_created_idx'),
+            models.Index(fields=['vendor', 'status', '-created_at'], name='order_vendor_status_idx'),
+            # Delta sync: changes since a (updated_at, id) cursor, see auth_app.order_sync
+            models.Index(fields=['vendor', 'updated_at', 'id'], name='order_vendor_updated_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         is_new = self._state.adding # Check if this is a new instance
         if not self.order_number:
@@ -131,14 +210,16 @@ class Order(models.Model):
             # We need the PK for guaranteed uniqueness if saving first
             pass # Generate after first save if needed
 
-        super().save(*args, **kwargs) # Call the original save method
+        # One transaction, so nothing sees (or publishes) the order before it has its number
+        with transaction.atomic():
+            super().save(*args, **kwargs) # Call the original save method
 
-        if is_new and not self.order_number:
-            # Now self.id should be available
-            timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
-            self.order_number = f'ORD-{timestamp}-{self.id}'
-            # Save again only to update the order_number field
-            super().save(update_fields=['order_number'])
+            if is_new and not self.order_number:
+                # Now self.id should be available
+                timestamp = timezone.now().strftime('%Y%m%d%H%M%S')
+                self.order_number = f'ORD-{timestamp}-{self.id}'
+                # Save again only to update the order_number field (and updated_at, so delta sync sees it)
+                super().save(update_fields=['order_number', 'updated_at'])
 
     def __str__(self):
         return f"Order {self.order_number} for {self.vendor.restaurant_name}"
@@ -152,6 +233,73 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['vendor', '-created_at'], name='notification_vendor_idx'),
+        ]
 
     def __str__(self):
         return f"Notification for {self.vendor.restaurant_name}: {self.title}"
+
+class PincodeLocation(models.Model):
+    """Pincode centroids learned at runtime, supplementing the bundled gazetteer CSV."""
+    SOURCE_NOMINATIM = 'nominatim'
+    SOURCE_MANUAL = 'manual'
+    SOURCE_CHOICES = [
+        (SOURCE_NOMINATIM, 'Nominatim'),
+        (SOURCE_MANUAL, 'Manual'),
+    ]
+
+    pincode = models.CharField(max_length=6, unique=True)
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default=SOURCE_NOMINATIM)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.pincode} ({self.latitude}, {self.longitude})"
+
+class OutboxMessage(models.Model):
+    """
+    A side effect (notification row, push, SMS) recorded in the same
+    transaction as the change that caused it and performed later by
+    ``python manage.py run_outbox_worker`` (see auth_app.outbox).
+    """
+    KIND_VENDOR_NOTIFICATION = 'vendor_notification'
+    KIND_FCM_PUSH = 'fcm_push'
+    KIND_SMS = 'sms'
+    KIND_CHOICES = [
+        (KIND_VENDOR_NOTIFICATION, 'Vendor notification'),
+        (KIND_FCM_PUSH, 'FCM push'),
+        (KIND_SMS, 'SMS'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_PROCESSING, 'Processing'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)  # Not retried before this
+    locked_by = models.CharField(max_length=64, null=True, blank=True)
+    locked_until = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
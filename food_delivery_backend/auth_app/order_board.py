@@ -0,0 +1,289 @@
+"""
+The vendor order board: each vendor's active orders, kept up to date as
+orders are placed and move through the kitchen.
+
+"What is Pending, Accepted or Preparing right now" is answered from a small
+per-vendor map of ``order id -> compact entry`` instead of a query over the
+vendor's order history, so ``GET vendor/orders/active/`` costs about as much
+as the vendor has orders on the go. An order leaves the board once it is
+picked up, delivered or cancelled.
+
+The Order post_save signal (auth_app.signals) updates the board after the
+transaction commits. A board is built from the database on first use - after
+a restart, for the local store - and rebuilt every ``BOARD_TTL`` seconds, so
+a missed update can't stay on screen for long.
+
+Writes can land out of order, and a rebuild's query can miss an update that
+commits while it runs, so every entry carries the order's ``updated_at`` and
+the write number (``seq``) it was stored under:
+
+* a write never overwrites an entry with a later ``updated_at``; an order
+  that left the board stays as a tombstone, so a late write can't bring it
+  back;
+* a rebuild notes the vendor's write number before it queries, and keeps
+  anything written since then over its own rows unless its row is newer.
+
+``ORDER_BOARD_BACKEND`` picks the store:
+
+* ``redis`` - a hash per vendor on the Redis server behind the default
+  django-redis cache, shared by every server process; writes and rebuilds
+  are Lua scripts, so each is atomic;
+* ``local`` - process memory, for tests and single-process servers.
+
+Unset, Redis is used when the default cache is django-redis; with any other
+cache ``local`` must be asked for by name, since each process would keep its
+own board.
+"""
+import json
+import time
+import logging
+import threading
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+BOARD_STATUSES = ('Pending', 'Accepted', 'Preparing', 'ReadyForPickup')
+BOARD_TTL = 60
+ENTRY_FIELDS = ('id', 'order_number', 'status', 'total_price', 'customer_name', 'items', 'created_at', 'updated_at')
+
+# KEYS: board hash, write counter. ARGV: order id, entry JSON, updated_at, ttl.
+# Returns 1, or 0 if the board already holds a later version of the order.
+PUT_LUA = """
+local current = redis.call('HGET', KEYS[1], ARGV[1])
+if current and cjson.decode(current)['updated_at'] > ARGV[3] then
+    return 0
+end
+local entry = cjson.decode(ARGV[2])
+entry['seq'] = redis.call('INCR', KEYS[2])
+redis.call('HSET', KEYS[1], ARGV[1], cjson.encode(entry))
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[4]))
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[4]))
+return 1
+"""
+
+# KEYS: board hash, write counter, built flag. ARGV: write number the rebuild
+# started at, ttl, then (order id, entry JSON, updated_at) for each loaded order.
+# Returns the entries now on the board, tombstones left out.
+REPLACE_LUA = """
+local since = tonumber(ARGV[1])
+local board = {}
+local current = redis.call('HGETALL', KEYS[1])
+for i = 1, #current, 2 do
+    local entry = cjson.decode(current[i + 1])
+    if (entry['seq'] or 0) > since then
+        board[current[i]] = {current[i + 1], entry['updated_at'], entry['removed']}
+    end
+end
+for i = 3, #ARGV, 3 do
+    local kept = board[ARGV[i]]
+    if not kept or kept[2] < ARGV[i + 2] then
+        board[ARGV[i]] = {ARGV[i + 1], ARGV[i + 2], false}
+    end
+end
+redis.call('DEL', KEYS[1])
+local active = {}
+for order_id, entry in pairs(board) do
+    redis.call('HSET', KEYS[1], order_id, entry[1])
+    if not entry[3] then
+        active[#active + 1] = entry[1]
+    end
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]) * 2)
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[2]) * 2)
+redis.call('SET', KEYS[3], 1, 'EX', tonumber(ARGV[2]))
+return active
+"""
+
+
+def _stamp(value):
+    # Fixed width, so the stamps of two versions compare as strings in Lua too
+    return value.isoformat(timespec='microseconds')
+
+
+def board_entry(order):
+    items = order.items if isinstance(order.items, list) else []
+    return {
+        'id': order.id,
+        'order_number': order.order_number,
+        'status': order.status,
+        'total_price': f"{Decimal(str(order.total_price)):.2f}",  # Same text before and after a database round trip
+        'customer_name': order.customer_name,
+        'item_count': len(items),
+        'created_at': order.created_at.isoformat(),
+        'updated_at': _stamp(order.updated_at),
+    }
+
+
+def tombstone(order_id, updated_at):
+    return {'id': order_id, 'updated_at': updated_at, 'removed': True}
+
+
+def _visible(entries):
+    return [
+        {field: value for field, value in entry.items() if field != 'seq'}
+        for entry in entries if not entry.get('removed')
+    ]
+
+
+class RedisOrderBoard:
+    def __init__(self, connection=None):
+        if connection is None:
+            from django_redis import get_redis_connection
+            connection = get_redis_connection('default')
+        self._redis = connection
+        self._put = connection.register_script(PUT_LUA)
+        self._replace = connection.register_script(REPLACE_LUA)
+
+    @staticmethod
+    def _keys(vendor_pk):
+        key = f"order_board:{vendor_pk}"
+        return key, f"{key}:seq", f"{key}:built"
+
+    def get(self, vendor_pk):
+        """The vendor's entries, or None if the board needs building."""
+        key, _, built_key = self._keys(vendor_pk)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.exists(built_key)
+        pipe.hvals(key)
+        built, values = pipe.execute()
+        if not built:
+            return None
+        return _visible(json.loads(value) for value in values)
+
+    def put(self, vendor_pk, entry):
+        key, seq_key, _ = self._keys(vendor_pk)
+        self._put(keys=[key, seq_key], args=[entry['id'], json.dumps(entry), entry['updated_at'], BOARD_TTL * 2])
+
+    def discard(self, vendor_pk, order_id, updated_at):
+        self.put(vendor_pk, tombstone(order_id, updated_at))
+
+    def mark(self, vendor_pk):
+        """The vendor's current write number; call before reading the database for replace()."""
+        return int(self._redis.get(self._keys(vendor_pk)[1]) or 0)
+
+    def replace(self, vendor_pk, entries, since):
+        args = [since, BOARD_TTL]
+        for entry in entries:
+            args += [entry['id'], json.dumps(entry), entry['updated_at']]
+        return _visible(json.loads(value) for value in self._replace(keys=list(self._keys(vendor_pk)), args=args))
+
+
+class LocalOrderBoard:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards = {}  # vendor pk -> {'built_at', 'seq', 'entries': {order id: entry}}
+
+    def get(self, vendor_pk):
+        with self._lock:
+            board = self._boards.get(vendor_pk)
+            if board is None or board['built_at'] is None or board['built_at'] + BOARD_TTL <= time.monotonic():
+                return None
+            return _visible(board['entries'].values())
+
+    def put(self, vendor_pk, entry):
+        with self._lock:
+            board = self._boards.get(vendor_pk)
+            if board is None:  # Unbuilt boards come from the database on first read
+                return
+            current = board['entries'].get(entry['id'])
+            if current is not None and current['updated_at'] > entry['updated_at']:
+                return
+            board['seq'] += 1
+            board['entries'][entry['id']] = {**entry, 'seq': board['seq']}
+
+    def discard(self, vendor_pk, order_id, updated_at):
+        self.put(vendor_pk, tombstone(order_id, updated_at))
+
+    def mark(self, vendor_pk):
+        with self._lock:
+            board = self._boards.setdefault(vendor_pk, {'built_at': None, 'seq': 0, 'entries': {}})
+            return board['seq']
+
+    def replace(self, vendor_pk, entries, since):
+        with self._lock:
+            board = self._boards.setdefault(vendor_pk, {'built_at': None, 'seq': 0, 'entries': {}})
+            merged = {order_id: entry for order_id, entry in board['entries'].items() if entry['seq'] > since}
+            for entry in entries:
+                kept = merged.get(entry['id'])
+                if kept is None or kept['updated_at'] < entry['updated_at']:
+                    merged[entry['id']] = {**entry, 'seq': 0}
+            board['entries'] = merged
+            board['built_at'] = time.monotonic()
+            return _visible(merged.values())
+
+    def clear(self):
+        with self._lock:
+            self._boards.clear()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = settings.ORDER_BOARD_BACKEND
+                if name is None and settings.CACHES['default']['BACKEND'].startswith('django_redis'):
+                    name = 'redis'
+                if name not in ('redis', 'local'):
+                    raise ImproperlyConfigured(
+                        f"Set ORDER_BOARD_BACKEND to 'redis', or 'local' for tests and single-process servers (got {name!r})"
+                    )
+                _backend = RedisOrderBoard() if name == 'redis' else LocalOrderBoard()
+    return _backend
+
+
+def _load(vendor_pk):
+    orders = Order.objects.filter(vendor_id=vendor_pk, status__in=BOARD_STATUSES).only(*ENTRY_FIELDS)
+    return [board_entry(order) for order in orders]
+
+
+def rebuild(vendor_pk):
+    backend = get_backend()
+    since = backend.mark(vendor_pk)
+    return backend.replace(vendor_pk, _load(vendor_pk), since)
+
+
+def active_orders(vendor_pk):
+    """The vendor's active orders as board entries, oldest first."""
+    try:
+        entries = get_backend().get(vendor_pk)
+        if entries is None:
+            entries = rebuild(vendor_pk)
+    except Exception as e:
+        logger.warning(f"Order board unavailable for vendor {vendor_pk}, reading the database: {e}")
+        entries = _load(vendor_pk)
+    return sorted(entries, key=lambda entry: (entry['created_at'], entry['id']))
+
+
+def record(order):
+    """Put ``order`` on its vendor's board, or take it off if it is no longer active."""
+    try:
+        if order.status in BOARD_STATUSES:
+            get_backend().put(order.vendor_id, board_entry(order))
+        else:
+            get_backend().discard(order.vendor_id, order.id, _stamp(order.updated_at))
+    except Exception as e:
+        logger.warning(f"Could not update the order board for order {order.order_number}: {e}")
+
+
+def record_on_commit(order):
+    transaction.on_commit(lambda: record(order))
+
+
+def forget(order):
+    try:
+        # Nothing written after the delete can be a newer version of the order
+        get_backend().discard(order.vendor_id, order.id, _stamp(timezone.now()))
+    except Exception as e:
+        logger.warning(f"Could not remove order {order.order_number} from the order board: {e}")
@@ -0,0 +1,249 @@
+"""
+Transactional outbox for side effects of writes (vendor notifications, FCM
+pushes, SMS).
+
+Request code calls ``enqueue``/``enqueue_many`` inside its transaction, so a
+message exists exactly when the change that caused it was committed, and
+returns without doing any I/O. ``python manage.py run_outbox_worker`` claims
+due messages in batches (a lease, so a crashed worker's batch is picked up
+again), runs the handler for each and either marks it done or reschedules it
+with exponential backoff. Kinds in ``BATCH_HANDLERS`` (FCM pushes) get the
+whole claimed batch at once so they can be coalesced and sent concurrently. Handlers signal "don't retry" by raising an
+exception with ``retryable = False``, and "not now" (e.g. a rate limit) with
+one carrying ``retry_after`` seconds: the message is put back for that long
+without counting as an attempt.
+"""
+import random
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import OutboxMessage, Notification, Vendor
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name):
+    return settings.OUTBOX[name]
+
+
+def _available_at(kind, now):
+    delay = DELAYS.get(kind)
+    return now + timedelta(seconds=delay()) if delay else now
+
+
+def enqueue(kind, payload):
+    return OutboxMessage.objects.create(kind=kind, payload=payload, available_at=_available_at(kind, timezone.now()))
+
+
+def enqueue_many(messages):
+    """``messages`` is an iterable of (kind, payload)."""
+    now = timezone.now()
+    return OutboxMessage.objects.bulk_create(
+        OutboxMessage(kind=kind, payload=payload, available_at=_available_at(kind, now)) for kind, payload in messages
+    )
+
+
+# --- Handlers ---
+def send_vendor_notification(payload):
+    Notification.objects.create(vendor_id=payload['vendor_id'], title=payload['title'], body=payload['body'])
+
+
+def send_fcm_pushes(messages):
+    """
+    Batch handler: resolve vendor tokens in one query, coalesce pushes per
+    token and hand them to the pooled dispatcher. Returns {message id: error or None}.
+    """
+    from .push import Push, InvalidToken, coalesce, get_dispatcher
+
+    # Read tokens now rather than at enqueue time so a refreshed token is used
+    vendor_ids = {message.payload['vendor_id'] for message in messages}
+    tokens = dict(Vendor.objects.filter(pk__in=vendor_ids).values_list('pk', 'fcm_token'))
+    outcome, pushes, owners = {}, [], []
+    for message in messages:
+        payload = message.payload
+        token = tokens.get(payload['vendor_id'])
+        if not token:
+            outcome[message.id] = None  # Nothing to deliver to
+            continue
+        pushes.append(Push(token, payload['title'], payload['body'], payload.get('data')))
+        owners.append(message.id)
+    if not pushes:
+        return outcome
+
+    merged = coalesce(pushes)
+    errors = get_dispatcher().send([push for push, _ in merged])
+    dead_tokens = set()
+    for (push, indexes), error in zip(merged, errors):
+        if isinstance(error, InvalidToken):
+            dead_tokens.add(push.token)
+            error = None  # Retrying can't help; the token is pruned below
+        for index in indexes:
+            outcome[owners[index]] = error
+    if dead_tokens:
+        pruned = Vendor.objects.filter(fcm_token__in=dead_tokens).update(fcm_token=None)
+        logger.warning(f"Pruned {pruned} invalid FCM token(s)")
+    return outcome
+
+
+def send_sms(payload):
+    from .sms import send_sms as deliver
+
+    # An OTP that expired while queued is useless to the recipient
+    expires_at = payload.get('expires_at')
+    if expires_at and parse_datetime(expires_at) <= timezone.now():
+        logger.warning(f"Dropped expired SMS to {payload['to']}")
+        return
+    body = payload['body']
+    if 'otp' in payload:
+        # OTP codes are never stored in the outbox; fetch the live one now
+        from accounts.otp import SERVICES
+        code = SERVICES[payload['otp']['actor']].current(payload['otp']['phone'])
+        if code is None:
+            logger.warning(f"Dropped OTP SMS to {payload['to']}: the code expired or was used")
+            return
+        body = body.format(otp=code)
+    deliver(payload['to'], body)
+
+
+HANDLERS = {
+    OutboxMessage.KIND_VENDOR_NOTIFICATION: send_vendor_notification,
+    OutboxMessage.KIND_SMS: send_sms,
+}
+# Kinds whose handler takes the whole claimed batch of that kind
+BATCH_HANDLERS = {
+    OutboxMessage.KIND_FCM_PUSH: send_fcm_pushes,
+}
+# Pushes wait briefly after enqueue so a burst for one vendor is coalesced
+DELAYS = {
+    OutboxMessage.KIND_FCM_PUSH: lambda: settings.FCM_COALESCE_SECONDS,
+}
+
+
+# --- Worker ---
+def backoff_seconds(attempts):
+    """Exponential backoff with +/-20% jitter so failed batches don't retry in lockstep."""
+    delay = min(_setting('BACKOFF_BASE') * 2 ** max(attempts - 1, 0), _setting('BACKOFF_MAX'))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _claimable(now):
+    # Due pending messages, plus messages whose worker's lease ran out
+    return (
+        Q(status=OutboxMessage.STATUS_PENDING, available_at__lte=now)
+        | Q(status=OutboxMessage.STATUS_PROCESSING, locked_until__lt=now)
+    )
+
+
+def claim_batch(worker_id, batch_size):
+    now = timezone.now()
+    ids = list(
+        OutboxMessage.objects.filter(_claimable(now))
+        .order_by('available_at', 'id').values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+    # The status re-check makes the claim safe against a concurrent worker
+    OutboxMessage.objects.filter(_claimable(now), id__in=ids).update(
+        status=OutboxMessage.STATUS_PROCESSING, locked_by=worker_id,
+        locked_until=now + timedelta(seconds=_setting('LEASE_SECONDS')),
+        attempts=F('attempts') + 1,
+    )
+    return list(OutboxMessage.objects.filter(
+        id__in=ids, status=OutboxMessage.STATUS_PROCESSING, locked_by=worker_id,
+    ).order_by('id'))
+
+
+def _record(message, error):
+    """Mark a claimed message done, or reschedule/fail it after ``error``."""
+    if error is None:
+        OutboxMessage.objects.filter(pk=message.pk, locked_by=message.locked_by).update(
+            status=OutboxMessage.STATUS_DONE, processed_at=timezone.now(),
+            locked_by=None, locked_until=None, last_error=None,
+        )
+        return True
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is not None:
+        OutboxMessage.objects.filter(pk=message.pk, locked_by=message.locked_by).update(
+            status=OutboxMessage.STATUS_PENDING, available_at=timezone.now() + timedelta(seconds=retry_after),
+            attempts=F('attempts') - 1, locked_by=None, locked_until=None,
+        )
+        logger.debug(f"Outbox {message} deferred {retry_after:.2f}s: {error}")
+        return False
+    retryable = getattr(error, 'retryable', not isinstance(error, LookupError))
+    last_error = f"{type(error).__name__}: {error}"
+    if retryable and message.attempts < _setting('MAX_ATTEMPTS'):
+        changes = {
+            'status': OutboxMessage.STATUS_PENDING,
+            'available_at': timezone.now() + timedelta(seconds=backoff_seconds(message.attempts)),
+        }
+    else:
+        changes = {'status': OutboxMessage.STATUS_FAILED, 'processed_at': timezone.now()}
+    # Only the lease holder may record the outcome: if our lease expired and
+    # another worker re-claimed the message, its result wins.
+    updated = OutboxMessage.objects.filter(pk=message.pk, locked_by=message.locked_by).update(
+        locked_by=None, locked_until=None, last_error=last_error, **changes,
+    )
+    if not updated:
+        logger.warning(f"Outbox {message} lease lost before recording its failure: {error}")
+    elif changes['status'] == OutboxMessage.STATUS_PENDING:
+        logger.warning(f"Outbox {message} attempt {message.attempts} failed, retrying: {error}")
+    else:
+        logger.error(f"Outbox {message} failed permanently after {message.attempts} attempt(s): {error}")
+    return False
+
+
+def process(message):
+    """Run one claimed message; returns True if it is done."""
+    handler = HANDLERS.get(message.kind)
+    try:
+        if handler is None:
+            raise LookupError(f"No outbox handler for {message.kind!r}")
+        handler(message.payload)
+    except Exception as e:
+        return _record(message, e)
+    return _record(message, None)
+
+
+def process_batch(kind, messages):
+    """Run a batch handler over claimed messages of one kind; returns how many are done."""
+    try:
+        outcome = BATCH_HANDLERS[kind](messages)
+    except Exception as e:
+        outcome = {message.id: e for message in messages}
+    done = [message.id for message in messages if outcome.get(message.id) is None]
+    OutboxMessage.objects.filter(id__in=done, locked_by=messages[0].locked_by).update(
+        status=OutboxMessage.STATUS_DONE, processed_at=timezone.now(),
+        locked_by=None, locked_until=None, last_error=None,
+    )
+    for message in messages:
+        if outcome.get(message.id) is not None:
+            _record(message, outcome[message.id])
+    return len(done)
+
+
+def drain(worker_id, batch_size=None):
+    """Process one batch; returns (claimed, succeeded)."""
+    batch = claim_batch(worker_id, batch_size or _setting('BATCH_SIZE'))
+    succeeded = 0
+    batched = {}
+    for message in batch:
+        if message.kind in BATCH_HANDLERS:
+            batched.setdefault(message.kind, []).append(message)
+        else:
+            succeeded += process(message)
+    for kind, messages in batched.items():
+        succeeded += process_batch(kind, messages)
+    return len(batch), succeeded
+
+
+def purge_done(older_than_days=None):
+    days = older_than_days if older_than_days is not None else _setting('RETAIN_DONE_DAYS')
+    deleted, _ = OutboxMessage.objects.filter(
+        status=OutboxMessage.STATUS_DONE, processed_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
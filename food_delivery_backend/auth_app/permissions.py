@@ -6,13 +6,13 @@ logger = logging.getLogger(__name__)
 
 class IsVendorUser(permissions.BasePermission):
     """
-    Grants permission if request.user is authenticated and has a 'vendor_instance'.
+    Grants permission if request.user is authenticated and carries a vendor_id.
     Relies on VendorJWTAuthentication populating request.user correctly.
     """
     message = "User is not associated with a vendor account."
 
     def has_permission(self, request, view):
-        has_instance = request.user and request.user.is_authenticated and hasattr(request.user, 'vendor_instance')
+        has_instance = request.user and request.user.is_authenticated and getattr(request.user, 'vendor_id', None) is not None
         # logger.debug(f"[Permission Check - IsVendorUser - has_permission] User: {request.user}, IsAuthenticated: {request.user.is_authenticated if request.user else 'N/A'}, Has Vendor Instance: {has_instance}")
         return has_instance
 
@@ -26,7 +26,7 @@ class IsVendorOwnerOrReadOnly(permissions.BasePermission):
 
     def has_permission(self, request, view):
         # Check if the user is an authenticated vendor first
-        is_vendor = request.user and request.user.is_authenticated and hasattr(request.user, 'vendor_instance')
+        is_vendor = request.user and request.user.is_authenticated and getattr(request.user, 'vendor_id', None) is not None
         # logger.debug(f"[Permission Check - IsVendorOwnerOrReadOnly - has_permission] IsVendor: {is_vendor}, Method: {request.method}")
         return is_vendor
 
@@ -37,26 +37,27 @@ class IsVendorOwnerOrReadOnly(permissions.BasePermission):
             return True
 
         # Write permissions require ownership.
-        if not hasattr(request.user, 'vendor_instance'):
-            logger.warning("[Permission Check - IsVendorOwnerOrReadOnly - has_object_permission] Write denied - user has no vendor_instance.")
+        if getattr(request.user, 'pk', None) is None:
+            logger.warning("[Permission Check - IsVendorOwnerOrReadOnly - has_object_permission] Write denied - user has no vendor.")
             return False # Should not happen if has_permission passed, but safe check
 
-        authenticated_vendor = request.user.vendor_instance
-        # logger.debug(f"[Permission Check - IsVendorOwnerOrReadOnly - has_object_permission] Authenticated Vendor: {authenticated_vendor.vendor_id}, Object Type: {type(obj)}")
+        # Compare primary keys so the check never loads the full Vendor row
+        authenticated_vendor_pk = request.user.pk
+        # logger.debug(f"[Permission Check - IsVendorOwnerOrReadOnly - has_object_permission] Authenticated Vendor: {request.user.vendor_id}, Object Type: {type(obj)}")
 
         # Check direct ownership (e.g., Menu, Order)
         if hasattr(obj, 'vendor'):
-            is_owner = obj.vendor == authenticated_vendor
+            is_owner = obj.vendor_id == authenticated_vendor_pk
             # logger.debug(f"[Permission Check - IsVendorOwnerOrReadOnly - has_object_permission] Checking obj.vendor: {obj.vendor.vendor_id if obj.vendor else 'None'}, Is Owner: {is_owner}")
             return is_owner
         # Check ownership via Menu (e.g., FoodListing)
-        if hasattr(obj, 'menu') and hasattr(obj.menu, 'vendor'):
-            is_owner = obj.menu.vendor == authenticated_vendor
+        if hasattr(obj, 'menu') and hasattr(obj.menu, 'vendor_id'):
+            is_owner = obj.menu.vendor_id == authenticated_vendor_pk
             # logger.debug(f"[Permission Check - IsVendorOwnerOrReadOnly - has_object_permission] Checking obj.menu.vendor: {obj.menu.vendor.vendor_id if obj.menu.vendor else 'None'}, Is Owner: {is_owner}")
             return is_owner
         # Check for profile update (obj is Vendor instance)
         if isinstance(obj, Vendor):
-            is_owner = obj == authenticated_vendor
+            is_owner = obj.pk == authenticated_vendor_pk
             # logger.debug(f"[Permission Check - IsVendorOwnerOrReadOnly - has_object_permission] Checking Vendor instance: {obj.vendor_id}, Is Owner: {is_owner}")
             return is_owner
 
@@ -70,13 +71,13 @@ class IsOrderVendorOwner(permissions.BasePermission):
 
     def has_permission(self, request, view):
         # Check if user is authenticated and is a vendor
-        return request.user and request.user.is_authenticated and hasattr(request.user, 'vendor_instance')
+        return request.user and request.user.is_authenticated and getattr(request.user, 'vendor_id', None) is not None
 
     def has_object_permission(self, request, view, obj):
         # Check if the order's vendor matches the requesting user's vendor instance
-        if isinstance(obj, Order) and hasattr(request.user, 'vendor_instance'):
-            is_owner = obj.vendor == request.user.vendor_instance
+        if isinstance(obj, Order) and getattr(request.user, 'pk', None) is not None:
+            is_owner = obj.vendor_id == request.user.pk
             # logger.debug(f"[Permission Check - IsOrderVendorOwner - has_object_permission] OrderVendor: {obj.vendor.vendor_id}, RequestingVendor: {request.user.vendor_instance.vendor_id}, Is Owner: {is_owner}")
             return is_owner
-        logger.warning("[Permission Check - IsOrderVendorOwner - has_object_permission] Denied - Object not Order or user has no vendor_instance.")
+        logger.warning("[Permission Check - IsOrderVendorOwner - has_object_permission] Denied - Object not Order or user has no vendor.")
         return False
@@ -0,0 +1,140 @@
+"""
+Offline pincode -> centroid gazetteer.
+
+Centroids are loaded once per process from the bundled CSV
+(``auth_app/data/pincode_centroids.csv``, rebuilt with the
+``build_pincode_gazetteer`` management command) into sorted NumPy arrays,
+so a lookup is a binary search. The bundled table covers every pincode with
+a located office in the India Post pincode directory (data.gov.in, Open
+Government Data Licence - India), as packaged by ``indiapins``. Pincodes
+missing from the CSV fall back to ``PincodeLocation`` rows and, if
+``PINCODE_NOMINATIM_FALLBACK`` is on, to a live Nominatim lookup (through
+``geocoding.geocode_cache``) whose result is written back to
+``PincodeLocation`` for every later request.
+"""
+import csv
+import re
+import threading
+import logging
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from .geocoding import geocode_pincode
+
+logger = logging.getLogger(__name__)
+
+CSV_PATH = Path(__file__).resolve().parent / 'data' / 'pincode_centroids.csv'
+CSV_FIELDS = ['pincode', 'latitude', 'longitude']
+PINCODE_RE = re.compile(r'^\d{6}$')
+
+
+def normalize_pincode(value):
+    """Return the 6-digit pincode as a string, or None if it is not one."""
+    if value is None:
+        return None
+    pincode = str(value).replace(' ', '').strip()
+    return pincode if PINCODE_RE.match(pincode) else None
+
+
+def read_centroids(path=CSV_PATH):
+    """Yield (pincode, latitude, longitude) rows from a gazetteer CSV."""
+    with open(path, newline='', encoding='utf-8') as fh:
+        for row in csv.DictReader(fh):
+            pincode = normalize_pincode(row.get('pincode'))
+            try:
+                latitude = float(row['latitude'])
+                longitude = float(row['longitude'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if pincode:
+                yield pincode, latitude, longitude
+
+
+class PincodeGazetteer:
+    def __init__(self, csv_path=CSV_PATH):
+        self.csv_path = csv_path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._codes = np.empty(0, dtype=np.int32)
+        self._coords = np.empty((0, 2), dtype=np.float64)
+        # Centroids learned at runtime (PincodeLocation rows / write-backs)
+        self._overlay = {}
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                rows = sorted(read_centroids(self.csv_path))
+            except FileNotFoundError:
+                logger.warning(f"Pincode gazetteer CSV not found at {self.csv_path}")
+                rows = []
+            if rows:
+                self._codes = np.array([int(r[0]) for r in rows], dtype=np.int32)
+                self._coords = np.array([(r[1], r[2]) for r in rows], dtype=np.float64)
+            self._loaded = True
+            logger.info(f"Loaded {len(rows)} pincode centroids from {self.csv_path}")
+
+    def lookup_local(self, pincode):
+        """Resolve from the bundled table and learned centroids only."""
+        if not self._loaded:
+            self._load()
+        code = int(pincode)
+        i = int(np.searchsorted(self._codes, code))
+        if i < self._codes.size and self._codes[i] == code:
+            lat, lng = self._coords[i]
+            return float(lat), float(lng)
+        return self._overlay.get(pincode)
+
+    def remember(self, pincode, latitude, longitude):
+        self._overlay[pincode] = (latitude, longitude)
+
+    def __len__(self):
+        if not self._loaded:
+            self._load()
+        return int(self._codes.size) + len(self._overlay)
+
+
+gazetteer = PincodeGazetteer()
+
+
+def resolve_pincode(value, allow_remote=None):
+    """
+    Return the (latitude, longitude) centroid for a pincode, or None.
+
+    Tries the in-memory gazetteer, then ``PincodeLocation``, then (when
+    ``allow_remote`` or ``settings.PINCODE_NOMINATIM_FALLBACK`` is true)
+    Nominatim, persisting any remote result. Remote lookups, including
+    pincodes Nominatim does not know, are cached by ``geocode_pincode``.
+    """
+    pincode = normalize_pincode(value)
+    if not pincode:
+        return None
+
+    coords = gazetteer.lookup_local(pincode)
+    if coords:
+        return coords
+
+    from .models import PincodeLocation  # Avoid circular import at module load
+
+    stored = PincodeLocation.objects.filter(pincode=pincode).values_list('latitude', 'longitude').first()
+    if stored:
+        gazetteer.remember(pincode, *stored)
+        return stored
+
+    if allow_remote is None:
+        allow_remote = getattr(settings, 'PINCODE_NOMINATIM_FALLBACK', False)
+    if not allow_remote:
+        return None
+
+    coords = geocode_pincode(pincode)
+    if coords:
+        PincodeLocation.objects.update_or_create(
+            pincode=pincode,
+            defaults={'latitude': coords[0], 'longitude': coords[1], 'source': PincodeLocation.SOURCE_NOMINATIM},
+        )
+        gazetteer.remember(pincode, *coords)
+        logger.info(f"Stored Nominatim centroid for pincode {pincode}: {coords}")
+    return coords
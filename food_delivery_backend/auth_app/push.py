@@ -0,0 +1,204 @@
+"""
+FCM push delivery over the HTTP v1 API.
+
+Each message goes to ``{FCM_ENDPOINT}/v1/projects/{FCM_PROJECT_ID}/messages:send``
+for exactly one device token, authorized with an OAuth2 access token minted
+from the service account in ``FCM_CREDENTIALS_FILE`` (``ServiceAccountToken``,
+needs the google-auth package). ``FCM_ENDPOINT`` is overridable so a local stub
+server such as ``auth_app.mock_fcm`` can stand in for Google.
+``PushDispatcher`` is what the outbox worker uses for a batch:
+
+* pending notifications for the same token are coalesced into one push
+  ("3 new notifications") instead of buzzing the device once per order;
+* v1 has no multicast, so the per-token requests are fanned out concurrently
+  (``FCM_POOL_SIZE`` at a time);
+* all requests share one pooled keep-alive session per process;
+* per-token results are mapped back, and tokens FCM reports as dead
+  (UNREGISTERED, INVALID_ARGUMENT, SENDER_ID_MISMATCH) are returned as
+  InvalidToken so the caller can prune them.
+
+Called from the outbox worker, never from a request.
+"""
+import logging
+import threading
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+FCM_SCOPE = 'https://www.googleapis.com/auth/firebase.messaging'
+
+# FCM v1 error codes meaning the token will never work again
+INVALID_TOKEN_ERRORS = {'UNREGISTERED', 'INVALID_ARGUMENT', 'SENDER_ID_MISMATCH'}
+# Error codes worth retrying later
+RETRYABLE_ERRORS = {'UNAVAILABLE', 'INTERNAL', 'QUOTA_EXCEEDED'}
+
+MAX_COALESCED_BODY = 200
+
+Push = namedtuple('Push', ['token', 'title', 'body', 'data'])
+
+
+class PushError(Exception):
+    """Delivery failed; ``retryable`` says whether trying again may help."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class InvalidToken(PushError):
+    def __init__(self, message):
+        super().__init__(message, retryable=False)
+
+
+class ServiceAccountToken:
+    """
+    OAuth2 access tokens for the FCM scope from a service-account JSON file.
+    Calling it returns a current token; google-auth marks it invalid a few
+    minutes before it expires, and one thread at a time refreshes it.
+    """
+
+    def __init__(self, credentials_file):
+        from google.oauth2 import service_account  # google-auth, only needed when pushing
+
+        self._credentials = service_account.Credentials.from_service_account_file(credentials_file, scopes=[FCM_SCOPE])
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if not self._credentials.valid:
+                from google.auth.transport.requests import Request
+
+                self._credentials.refresh(Request())
+            return self._credentials.token
+
+    def invalidate(self):
+        """Force a refresh on the next call (FCM answered 401)."""
+        with self._lock:
+            self._credentials.token = None
+
+
+def _error_code(response):
+    """The FCM error code of a failed v1 response, falling back to the gRPC status."""
+    try:
+        error = response.json().get('error') or {}
+    except ValueError:
+        return None
+    for detail in error.get('details') or []:
+        if detail.get('errorCode'):
+            return detail['errorCode']
+    return error.get('status')
+
+
+def coalesce(pushes):
+    """
+    Merge pushes addressed to the same token, keeping first-seen order.
+    Returns a list of (Push, [indexes into ``pushes``]).
+    """
+    grouped = OrderedDict()
+    for index, push in enumerate(pushes):
+        grouped.setdefault(push.token, []).append(index)
+    merged = []
+    for token, indexes in grouped.items():
+        if len(indexes) == 1:
+            merged.append((pushes[indexes[0]], indexes))
+            continue
+        group = [pushes[i] for i in indexes]
+        body = '; '.join(push.title for push in group)
+        if len(body) > MAX_COALESCED_BODY:
+            body = body[:MAX_COALESCED_BODY - 1] + '…'
+        data = dict(group[-1].data or {})
+        data['count'] = str(len(group))  # FCM data values must be strings
+        merged.append((Push(token, f"{len(group)} new notifications", body, data), indexes))
+    return merged
+
+
+class PushDispatcher:
+    def __init__(self, endpoint, project_id, access_token, timeout=10, pool_size=10):
+        """``access_token`` is a callable returning a current OAuth2 token, e.g. a ServiceAccountToken."""
+        self.url = f"{endpoint.rstrip('/')}/v1/projects/{project_id}/messages:send" if project_id else None
+        self.access_token = access_token
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='fcm')
+
+    @staticmethod
+    def _message(push):
+        message = {'token': push.token, 'notification': {'title': push.title, 'body': push.body}}
+        if push.data:
+            message['data'] = {key: str(value) for key, value in push.data.items()}  # v1 data values must be strings
+        return {'message': message}
+
+    def _post(self, push, access_token):
+        """One FCM request for one token; returns a PushError or None."""
+        try:
+            response = self.session.post(
+                self.url, json=self._message(push), timeout=self.timeout,
+                headers={'Authorization': f"Bearer {access_token}"},
+            )
+        except requests.RequestException as e:
+            return PushError(f"FCM request failed: {e}")
+        if response.status_code == 200:
+            return None
+        code = _error_code(response)
+        if code in INVALID_TOKEN_ERRORS:
+            return InvalidToken(f"FCM token rejected: {code}")
+        if response.status_code == 401:
+            # Revoked or expired early; mint a new one for the retry
+            getattr(self.access_token, 'invalidate', lambda: None)()
+            return PushError(f"FCM refused the access token: {code}")
+        retryable = code in RETRYABLE_ERRORS or response.status_code == 429 or response.status_code >= 500
+        return PushError(f"FCM error: HTTP {response.status_code} {code}", retryable=retryable)
+
+    def send(self, pushes):
+        """
+        Deliver ``pushes`` (already coalesced, one per token) and return a
+        PushError or None for each, in order.
+        """
+        if not self.url or self.access_token is None:
+            return [PushError("FCM_PROJECT_ID and FCM_CREDENTIALS_FILE must be configured", retryable=False)] * len(pushes)
+        try:
+            access_token = self.access_token()
+        except Exception as e:
+            logger.error(f"Could not get an FCM access token: {e}")
+            return [PushError(f"FCM access token unavailable: {e}")] * len(pushes)
+
+        futures = [self.executor.submit(self._post, push, access_token) for push in pushes]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.session.close()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """The process-wide dispatcher, built from settings on first use."""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                credentials = settings.FCM_CREDENTIALS_FILE
+                _dispatcher = PushDispatcher(
+                    settings.FCM_ENDPOINT, settings.FCM_PROJECT_ID,
+                    ServiceAccountToken(credentials) if credentials else None,
+                    timeout=settings.FCM_TIMEOUT, pool_size=settings.FCM_POOL_SIZE,
+                )
+    return _dispatcher
+
+
+def send_notification_to_device(token, title, body, data=None):
+    """Send one notification to one device token; raises PushError on failure."""
+    error = get_dispatcher().send([Push(token, title, body, data)])[0]
+    if error is not None:
+        raise error
@@ -0,0 +1,199 @@
+"""
+Live order events for the vendor, customer and delivery apps, served under
+ASGI (food_delivery_backend/asgi.py). Two transports carry the same JSON
+events (auth_app.events) and accept the app's usual access token:
+
+* WebSocket ``/ws/events/<role>/`` - token in the Authorization header or,
+  for clients that can't set headers, ``?ticket=<ticket>`` from
+  ``POST /events/<role>/ticket/``;
+* server-sent events ``GET /events/<role>/`` - token in the Authorization
+  header.
+
+Access tokens never go in a URL, where access logs would keep them: a
+ticket is good for one connection within ``TICKET_TTL`` seconds.
+
+``role`` is ``vendor``, ``customer`` or ``delivery``. Idle connections get a
+ping every ``EVENTS_KEEPALIVE`` seconds so proxies keep them open, and the
+token is checked again at that interval: once it expires or its user is
+deactivated, a WebSocket is closed with code 4401 and an event stream ends
+with an ``unauthorized`` event.
+"""
+import re
+import json
+import asyncio
+import logging
+import secrets
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import AuthenticationFailed
+
+from .events import get_broker, vendor_channel, customer_channel, rider_channel
+
+logger = logging.getLogger(__name__)
+
+WEBSOCKET_PATH = re.compile(r'^/ws/events/(?P<role>vendor|customer|delivery)/?$')
+PING = {'event': 'ping'}
+TICKET_TTL = 30
+UNAUTHORIZED = 'Authentication credentials were not provided or are invalid.'
+
+
+def resolve_channels(role, authorization):
+    """The event channels the bearer of ``authorization`` may follow, or None."""
+    from accounts.models import CustomerProfile
+    from customer_app.authentication import CustomerJWTAuthentication
+    from delivery_auth.authentication import DeliveryUserJWTAuthentication
+    from .authentication import VendorJWTAuthentication
+
+    authenticators = {
+        'vendor': VendorJWTAuthentication,
+        'customer': CustomerJWTAuthentication,
+        'delivery': DeliveryUserJWTAuthentication,
+    }
+    if role not in authenticators or not authorization:
+        return None
+    request = HttpRequest()
+    request.META['HTTP_AUTHORIZATION'] = authorization
+    try:
+        result = authenticators[role]().authenticate(request)
+    except AuthenticationFailed as e:
+        logger.info(f"Rejected {role} event subscription: {e.detail}")
+        return None
+    if result is None:
+        return None
+    user = result[0]
+    if role == 'vendor':
+        return [vendor_channel(user.pk)]
+    if role == 'delivery':
+        return [rider_channel(user.id)]
+    profile_id = CustomerProfile.objects.filter(user_id=user.id).values_list('id', flat=True).first()
+    return [customer_channel(profile_id)] if profile_id else None
+
+
+def _ticket_key(ticket):
+    return f"events_ticket:{ticket}"
+
+
+def redeem_ticket(role, ticket):
+    """The Authorization header a ticket was issued for; each ticket works once."""
+    key = _ticket_key(ticket)
+    issued = cache.get(key)
+    if not issued or not cache.delete(key):  # delete() is false for whoever lost the race
+        return ''
+    issued_role, authorization = issued
+    return authorization if issued_role == role else ''
+
+
+@csrf_exempt
+@require_POST
+def event_ticket(request, role):
+    """POST /events/<role>/ticket/: a one-time ticket for ``?ticket=`` on the WebSocket."""
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    if not resolve_channels(role, authorization):
+        return JsonResponse({'detail': UNAUTHORIZED}, status=401)
+    ticket = secrets.token_urlsafe(24)
+    cache.set(_ticket_key(ticket), (role, authorization), TICKET_TTL)
+    return JsonResponse({'ticket': ticket, 'expires_in': TICKET_TTL})
+
+
+class _Reauthorizer:
+    """Re-runs resolve_channels at most once per keepalive interval."""
+
+    def __init__(self, role, authorization, channels):
+        self.role = role
+        self.authorization = authorization
+        self.channels = channels
+        self._check_at = asyncio.get_running_loop().time() + settings.EVENTS_KEEPALIVE
+
+    async def still_authorized(self):
+        loop = asyncio.get_running_loop()
+        if loop.time() < self._check_at:
+            return True
+        self._check_at = loop.time() + settings.EVENTS_KEEPALIVE
+        channels = await sync_to_async(resolve_channels)(self.role, self.authorization)
+        if channels != self.channels:
+            logger.info(f"Closing {self.role} event subscription for {self.channels}: no longer authorized")
+            return False
+        return True
+
+
+async def websocket_application(scope, receive, send):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    match = WEBSOCKET_PATH.match(scope['path'])
+    channels = None
+    if match:
+        headers = dict(scope.get('headers') or [])
+        authorization = headers.get(b'authorization', b'').decode('latin-1')
+        if not authorization:
+            ticket = parse_qs(scope.get('query_string', b'').decode()).get('ticket')
+            authorization = await sync_to_async(redeem_ticket)(match['role'], ticket[0]) if ticket else ''
+        channels = await sync_to_async(resolve_channels)(match['role'], authorization)
+    if not channels:
+        await send({'type': 'websocket.close', 'code': 4401})  # Before accept: the server answers 403
+        return
+
+    await send({'type': 'websocket.accept'})
+    subscription = await get_broker().subscribe(channels)
+    reauthorizer = _Reauthorizer(match['role'], authorization, channels)
+
+    async def forward():
+        while True:
+            event = await subscription.get(settings.EVENTS_KEEPALIVE)
+            if not await reauthorizer.still_authorized():
+                await send({'type': 'websocket.close', 'code': 4401})
+                return
+            await send({'type': 'websocket.send', 'text': json.dumps(event or PING)})
+
+    async def until_disconnect():
+        while (await receive())['type'] != 'websocket.disconnect':
+            pass  # Clients have nothing to say; ignore anything they send
+
+    tasks = [asyncio.ensure_future(forward()), asyncio.ensure_future(until_disconnect())]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            if task.exception() is not None:
+                logger.warning(f"Event socket for {channels} ended: {task.exception()}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        await subscription.close()
+
+
+async def _server_sent_events(role, authorization, channels):
+    subscription = await get_broker().subscribe(channels)
+    reauthorizer = _Reauthorizer(role, authorization, channels)
+    try:
+        yield "retry: 5000\n\n"
+        while True:
+            event = await subscription.get(settings.EVENTS_KEEPALIVE)
+            if not await reauthorizer.still_authorized():
+                yield "event: unauthorized\ndata: {}\n\n"
+                return
+            if event is None:
+                yield ": ping\n\n"
+            else:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        await subscription.close()
+
+
+async def event_stream(request, role):
+    """GET /events/<role>/ as text/event-stream."""
+    authorization = request.META.get('HTTP_AUTHORIZATION', '')
+    channels = await sync_to_async(resolve_channels)(role, authorization)
+    if not channels:
+        return JsonResponse({'detail': UNAUTHORIZED}, status=401)
+    response = StreamingHttpResponse(
+        _server_sent_events(role, authorization, channels), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+    return response
@@ -0,0 +1,160 @@
+"""
+Vendor opening-hours schedules.
+
+``Vendor.open_hours`` (or, when it is empty, ``opening_time``/``closing_time``)
+is compiled on save into sorted, non-overlapping ``[start, end)`` intervals
+of minutes since Monday 00:00 (0..10080), stored on ``Vendor.open_schedule``
+and mirrored into ``VendorOpenWindow`` rows for SQL filtering. "Is it open
+now?" is then a couple of integer comparisons, or ``Vendor.objects.open_now()``.
+
+Accepted ``open_hours`` formats (times are local, see VENDOR_SCHEDULE_TIME_ZONE)::
+
+    09:00-22:00                       every day
+    11:00-15:00, 18:30-23:00          several windows a day
+    22:00-02:00                       overnight, closes next day
+    Mon-Fri 09:00-22:00; Sat,Sun 10:00-23:30
+
+A vendor without any hours is treated as always open; ``Vendor.is_open`` set
+to False closes it regardless of the schedule.
+"""
+import re
+import bisect
+import logging
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+ALWAYS_OPEN = [[0, MINUTES_PER_WEEK]]
+
+# Vendor fields the compiled schedule is derived from
+SCHEDULE_FIELDS = {'open_hours', 'opening_time', 'closing_time'}
+
+DAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+WINDOW_RE = re.compile(r'(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})')
+DAY_RANGE_RE = re.compile(r'([a-z]{3})[a-z]*(?:\s*-\s*([a-z]{3})[a-z]*)?')
+
+
+class ScheduleError(ValueError):
+    """``open_hours`` could not be parsed."""
+
+
+def _minute(hours, minutes):
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours <= 24 and 0 <= minutes < 60) or (hours == 24 and minutes):
+        raise ScheduleError(f"Invalid time {hours:02d}:{minutes:02d}")
+    return hours * 60 + minutes
+
+
+def _parse_days(text):
+    text = text.strip().lower()
+    if not text:
+        return list(range(7))
+    days = []
+    for part in text.split(','):
+        match = DAY_RANGE_RE.fullmatch(part.strip())
+        if not match or match.group(1) not in DAY_NAMES or (match.group(2) and match.group(2) not in DAY_NAMES):
+            raise ScheduleError(f"Invalid days '{part.strip()}'")
+        first = DAY_NAMES.index(match.group(1))
+        last = DAY_NAMES.index(match.group(2)) if match.group(2) else first
+        day = first
+        while True:  # Ranges may wrap, e.g. Sat-Mon
+            days.append(day)
+            if day == last:
+                break
+            day = (day + 1) % 7
+    return days
+
+
+def merge_intervals(intervals):
+    """Sort and merge overlapping or touching [start, end) intervals."""
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def daily_window(day, open_minute, close_minute):
+    """Week intervals for one window on ``day``; overnight windows spill into the next day."""
+    if close_minute == open_minute:
+        close_minute = open_minute + MINUTES_PER_DAY  # Same open/close time means 24 hours
+    elif close_minute < open_minute:
+        close_minute += MINUTES_PER_DAY
+    start = day * MINUTES_PER_DAY + open_minute
+    end = day * MINUTES_PER_DAY + close_minute
+    if end <= MINUTES_PER_WEEK:
+        return [[start, end]]
+    return [[start, MINUTES_PER_WEEK], [0, end - MINUTES_PER_WEEK]]  # Sunday night into Monday
+
+
+def parse_open_hours(text):
+    """Compile an ``open_hours`` string into week intervals; raises ScheduleError."""
+    intervals = []
+    for group in re.split(r'[;\n]', text):
+        group = group.strip()
+        if not group:
+            continue
+        first_digit = re.search(r'\d', group)
+        if not first_digit:
+            raise ScheduleError(f"No hours in '{group}'")
+        days = _parse_days(group[:first_digit.start()])
+        windows = WINDOW_RE.findall(group[first_digit.start():])
+        if not windows:
+            raise ScheduleError(f"Invalid hours '{group}'")
+        for oh, om, ch, cm in windows:
+            open_minute, close_minute = _minute(oh, om), _minute(ch, cm)
+            for day in days:
+                intervals.extend(daily_window(day, open_minute, close_minute))
+    if not intervals:
+        raise ScheduleError("Empty schedule")
+    return merge_intervals(intervals)
+
+
+def compile_schedule(vendor):
+    """Return the week intervals for a vendor's current hour fields."""
+    if vendor.open_hours and vendor.open_hours.strip():
+        try:
+            return parse_open_hours(vendor.open_hours)
+        except ScheduleError as e:
+            # Same as before: unreadable hours don't hide the restaurant
+            logger.warning(f"Vendor {vendor.vendor_id}: could not parse open_hours '{vendor.open_hours}': {e}")
+            return [list(i) for i in ALWAYS_OPEN]
+    if vendor.opening_time and vendor.closing_time:
+        open_minute = vendor.opening_time.hour * 60 + vendor.opening_time.minute
+        close_minute = vendor.closing_time.hour * 60 + vendor.closing_time.minute
+        return merge_intervals(
+            interval for day in range(7) for interval in daily_window(day, open_minute, close_minute)
+        )
+    return [list(i) for i in ALWAYS_OPEN]
+
+
+def schedule_time_zone():
+    return ZoneInfo(getattr(settings, 'VENDOR_SCHEDULE_TIME_ZONE', settings.TIME_ZONE))
+
+
+def minute_of_week(when=None):
+    """Minutes since Monday 00:00 in the schedule time zone."""
+    when = timezone.localtime(when or timezone.now(), schedule_time_zone())
+    return when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+
+
+def is_open_at(intervals, minute):
+    """True if ``minute`` falls inside one of the sorted ``intervals``."""
+    i = bisect.bisect_right(intervals, [minute, MINUTES_PER_WEEK + 1]) - 1
+    return i >= 0 and intervals[i][0] <= minute < intervals[i][1]
+
+
+def vendor_is_open(vendor, minute=None):
+    """Open right now (or at ``minute`` of the week)? Honours ``Vendor.is_open``."""
+    if not vendor.is_open:
+        return False
+    if minute is None:
+        minute = minute_of_week()
+    return is_open_at(vendor.open_schedule or ALWAYS_OPEN, minute)
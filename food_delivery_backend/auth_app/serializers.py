@@ -139,11 +139,10 @@ class FoodListingSerializer(serializers.ModelSerializer):
     def validate_menu(self, menu_instance):
         """Ensure the menu belongs to the authenticated vendor."""
         request = self.context.get('request')
-        # Check if request.user and vendor_instance attribute exist (from custom auth backend)
-        if request and hasattr(request, 'user') and hasattr(request.user, 'vendor_instance'):
-            # Get the vendor instance attached by the custom authentication backend
-            authenticated_vendor = request.user.vendor_instance
-            if menu_instance.vendor != authenticated_vendor:
+        # Check if request.user carries a vendor (from custom auth backend)
+        if request and hasattr(request, 'user') and getattr(request.user, 'vendor_id', None) is not None:
+            # Compare against the vendor pk attached by the custom authentication backend
+            if menu_instance.vendor_id != request.user.pk:
                 raise serializers.ValidationError(f"Menu ID {menu_instance.id} does not belong to the authenticated vendor.")
         else:
             # This should ideally not be reached if view permissions are correct
@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+from .models import Vendor, Order
+from . import events, order_board
+from . import geo
+from .schedule import SCHEDULE_FIELDS
+from .delivery_quotes import invalidate_vendor_quotes
+from .authentication import forget_vendor_principal
+
+# Fields that affect which grid cell (if any) a vendor lives in
+GEO_INDEX_FIELDS = {'latitude', 'longitude', 'geohash', 'is_active'}
+# Fields that affect cached delivery quotes
+QUOTE_FIELDS = {'latitude', 'longitude'}
+# Fields behind a cached vendor principal (auth_app.authentication)
+PRINCIPAL_FIELDS = {'vendor_id', 'is_active'}
+
+
+@receiver(post_init, sender=Vendor)
+def vendor_loaded(sender, instance, **kwargs):
+    # The vendor_id tokens were issued for; never loads a deferred field
+    instance._principal_vendor_id = instance.__dict__.get('vendor_id')
+
+
+@receiver(post_save, sender=Vendor)
+def vendor_saved(sender, instance, created, update_fields=None, **kwargs):
+    changed = set(update_fields) if update_fields is not None else None
+    if changed is None or GEO_INDEX_FIELDS & changed:
+        # After commit, or another process could rebuild its index from the old rows
+        transaction.on_commit(geo.bump_index_version)
+    if not created and (changed is None or QUOTE_FIELDS & changed):
+        invalidate_vendor_quotes(instance.vendor_id)
+    if created or changed is None or SCHEDULE_FIELDS & changed:
+        instance.sync_open_windows()
+    if not created and (changed is None or PRINCIPAL_FIELDS & changed):
+        forget_vendor_principal(instance.vendor_id)
+        previous = instance.__dict__.get('_principal_vendor_id')
+        if previous and previous != instance.vendor_id:
+            forget_vendor_principal(previous)  # Tokens still carrying the old vendor_id
+    instance._principal_vendor_id = instance.vendor_id
+
+
+@receiver(post_delete, sender=Vendor)
+def vendor_deleted(sender, instance, **kwargs):
+    transaction.on_commit(geo.bump_index_version)
+    invalidate_vendor_quotes(instance.vendor_id)
+    forget_vendor_principal(instance.vendor_id)
+
+
+@receiver(post_init, sender=Order)
+def order_loaded(sender, instance, **kwargs):
+    events.track_status(instance)
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    event = events.status_event(instance, created)
+    if event:
+        channels = [events.vendor_channel(instance.vendor_id)]
+        if instance.customer_id:
+            channels.append(events.customer_channel(instance.customer_id))
+        # Built at commit time: Order.save fills in order_number after the first INSERT
+        events.publish_on_commit(channels, lambda: events.order_event(event, instance))
+        order_board.record_on_commit(instance)
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    order_board.forget(instance)
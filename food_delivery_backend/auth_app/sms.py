@@ -0,0 +1,134 @@
+"""
+SMS delivery with pluggable backends, in the spirit of Django's email backends.
+
+``SMS_BACKEND`` names the backend class:
+
+* ``auth_app.sms.TwilioBackend`` - one Twilio client per process, sharing a
+  pooled keep-alive HTTP session across sends;
+* ``auth_app.sms.ConsoleBackend`` - logs the message (development);
+* ``auth_app.sms.LocMemBackend`` - appends to ``auth_app.sms.outbox``, a fake
+  provider for tests.
+
+Requests never call ``send_sms`` themselves: they enqueue an outbox message
+(``auth_app.outbox``, kind ``sms``) and the worker sends it, at most
+``SMS_RATE_LIMIT`` messages per second per worker process. Over the limit,
+``send_sms`` raises ``SMSRateLimited`` instead of waiting, and the outbox
+puts the message back until a send is allowed, so the rest of the batch
+isn't held up.
+"""
+import time
+import logging
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Messages "sent" through LocMemBackend
+outbox = []
+
+
+class SMSError(Exception):
+    """Sending failed; ``retryable`` says whether trying again may help."""
+
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class SMSRateLimited(SMSError):
+    """Over ``SMS_RATE_LIMIT``; nothing was sent. Try again in ``retry_after`` seconds."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"SMS rate limit reached, retry in {retry_after:.2f}s")
+        self.retry_after = retry_after
+
+
+class ConsoleBackend:
+    def send(self, to, body):
+        logger.info(f"SMS to {to}: {body}")
+        return 'console'
+
+
+class LocMemBackend:
+    def send(self, to, body):
+        outbox.append({'to': to, 'body': body})
+        return f"locmem-{len(outbox)}"
+
+
+class TwilioBackend:
+    def __init__(self):
+        from twilio.rest import Client
+        from twilio.http.http_client import TwilioHttpClient
+
+        if not all([settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, settings.TWILIO_PHONE_NUMBER]):
+            raise SMSError("Twilio credentials missing in Django settings", retryable=False)
+        http_client = TwilioHttpClient(pool_connections=True, timeout=settings.SMS_TIMEOUT)
+        self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=http_client)
+        self.from_ = settings.TWILIO_PHONE_NUMBER
+
+    def send(self, to, body):
+        from twilio.base.exceptions import TwilioRestException
+
+        try:
+            message = self.client.messages.create(body=body, from_=self.from_, to=to)
+        except TwilioRestException as e:
+            # 4xx other than throttling means the request itself is bad (e.g. invalid number)
+            raise SMSError(f"Twilio error {e.code}: {e.msg}", retryable=e.status == 429 or e.status >= 500)
+        except Exception as e:
+            raise SMSError(f"Twilio request failed: {e}")
+        if message.status in ('failed', 'undelivered'):
+            raise SMSError(f"Twilio reported {message.status} for {message.sid}", retryable=False)
+        return message.sid
+
+
+class RateLimiter:
+    """Token bucket; ``take`` never blocks."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Take a token and return 0, or return the seconds until one is free (taking nothing)."""
+        if self.rate <= 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return (1 - self.tokens) / self.rate
+            self.tokens -= 1
+            return 0.0
+
+
+_backend = None
+_limiter = None
+_lock = threading.Lock()
+
+
+def get_backend():
+    """The process-wide backend instance (so Twilio's client and pool are reused)."""
+    global _backend, _limiter
+    if _backend is None:
+        with _lock:
+            if _backend is None:
+                _limiter = RateLimiter(settings.SMS_RATE_LIMIT)
+                _backend = import_string(settings.SMS_BACKEND)()
+    return _backend
+
+
+def send_sms(to, body):
+    """Send one SMS now; raises SMSError, or SMSRateLimited if over the rate limit. Used by the outbox worker."""
+    backend = get_backend()
+    wait = _limiter.take()
+    if wait:
+        raise SMSRateLimited(wait)
+    message_id = backend.send(to, body)
+    logger.info(f"SMS to {to} sent ({message_id})")
+    return message_id
@@ -1,3 +1,572 @@
-from django.test import TestCase
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import otp
+from accounts.models import Account, CustomerProfile
+from customer_app.models import Order as CustomerOrder
+from delivery_auth.denylist import deny_list
+from delivery_auth.models import DeliveryUser
+from delivery_auth.views import generate_delivery_jwt
+
+from . import events, geo, geocoding, order_board, outbox, pincodes, push, sms
+from .authentication import VendorJWTAuthentication
+from .delivery_quotes import QuoteUnavailable, quote_vendor
+from .mock_fcm import MockFCM
+from .models import FoodListing, Order, OutboxMessage, Vendor
+from .realtime import websocket_application
+
+# No Redis in tests: the in-process stores have to be named
+LOCAL_SERVICES = {
+    'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    'OTP_BACKEND': 'locmem',
+    'EVENTS_BACKEND': 'local',
+    'ORDER_BOARD_BACKEND': 'local',
+}
+TEST_PINCODE = '123456'
+
+
+def make_vendor(name='Dosa Corner', **fields):
+    return Vendor.objects.create(
+        restaurant_name=name, address='1 Main Road', contact_number=f"90{Vendor.objects.count():08d}",
+        latitude=12.97, longitude=77.59, **fields
+    )
+
+
+def reset_services():
+    otp._backend = None
+    events._broker = None
+    order_board._backend = None
+    if push._dispatcher is not None:
+        push._dispatcher.close()
+        push._dispatcher = None
+    sms._backend = sms._limiter = None
+    sms.outbox.clear()
+
+
+@override_settings(**LOCAL_SERVICES)
+class OutboxTestCase(TestCase):
+    def setUp(self):
+        reset_services()
+        self.addCleanup(reset_services)
+
+    def enqueue_due(self, kind, payload):
+        message = outbox.enqueue(kind, payload)
+        OutboxMessage.objects.filter(pk=message.pk).update(available_at=timezone.now())
+        return message
+
+    def reload(self, message):
+        return OutboxMessage.objects.get(pk=message.pk)
+
+
+@override_settings(ORDER_CONFIRMATION_SMS=True, DELIVERY_TEST_PINCODE=TEST_PINCODE)
+class OrderOutboxTests(OutboxTestCase):
+    """Placing an order records its notification, push and SMS in the order's transaction."""
+
+    def setUp(self):
+        super().setUp()
+        self.vendor = make_vendor()
+        self.food = FoodListing.objects.create(vendor=self.vendor, name='Masala Dosa', price='80.00')
+        self.account = Account.objects.create(email='asha@example.com', user_type='customer')
+        CustomerProfile.objects.create(user=self.account, phone='9876543210', full_name='Asha')
+        self.client = APIClient()
+        self.client.force_authenticate(self.account)
+
+    def place_order(self):
+        return self.client.post('/customer/api/place-order/', {
+            'payment_method': 'cod',
+            'order_details': {
+                'user_id': self.account.id,
+                'vendor_id': self.vendor.vendor_id,
+                'address': TEST_PINCODE,
+                'items': [{'food_id': str(self.food.id), 'quantity': 2, 'vendor_id': self.vendor.vendor_id}],
+            },
+        }, format='json')
+
+    def test_order_enqueues_its_messages(self):
+        response = self.place_order()
+        self.assertEqual(response.status_code, 201, response.content)
+        order_number = response.json()['order_id']
+        messages = {message.kind: message for message in OutboxMessage.objects.all()}
+        self.assertEqual(set(messages), {
+            OutboxMessage.KIND_VENDOR_NOTIFICATION, OutboxMessage.KIND_FCM_PUSH, OutboxMessage.KIND_SMS,
+        })
+        self.assertTrue(all(message.status == OutboxMessage.STATUS_PENDING for message in messages.values()))
+        self.assertEqual(messages[OutboxMessage.KIND_FCM_PUSH].payload['data'], {'order_number': order_number})
+        self.assertEqual(messages[OutboxMessage.KIND_SMS].payload['to'], '+919876543210')
+        # Nothing was sent while the request was running
+        self.assertEqual(sms.outbox, [])
+
+    def test_failed_enqueue_rolls_back_the_order(self):
+        with mock.patch.object(outbox, 'enqueue_many', side_effect=DatabaseError("disk full")):
+            response = self.place_order()
+        self.assertEqual(response.status_code, 500)
+        self.assertFalse(CustomerOrder.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+
+class ClaimTests(OutboxTestCase):
+    def setUp(self):
+        super().setUp()
+        self.messages = [
+            self.enqueue_due(OutboxMessage.KIND_VENDOR_NOTIFICATION, {'vendor_id': 1, 'title': f"t{i}", 'body': 'b'})
+            for i in range(3)
+        ]
+
+    def test_claim_leases_the_batch_to_one_worker(self):
+        claimed = outbox.claim_batch('worker-1', 2)
+        self.assertEqual([message.pk for message in claimed], [message.pk for message in self.messages[:2]])
+        for message in claimed:
+            self.assertEqual(message.status, OutboxMessage.STATUS_PROCESSING)
+            self.assertEqual(message.locked_by, 'worker-1')
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.locked_until, timezone.now())
+        # A second worker only gets what is left
+        self.assertEqual([message.pk for message in outbox.claim_batch('worker-2', 10)], [self.messages[2].pk])
+        self.assertEqual(outbox.claim_batch('worker-3', 10), [])
+
+    def test_expired_lease_is_claimed_again(self):
+        stale = outbox.claim_batch('worker-1', 1)[0]
+        OutboxMessage.objects.filter(pk=stale.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = [message for message in outbox.claim_batch('worker-2', 10) if message.pk == stale.pk]
+        self.assertEqual(len(reclaimed), 1)
+        self.assertEqual(reclaimed[0].attempts, 2)
+        # The first worker finishing late doesn't touch the new lease
+        outbox._record(stale, None)
+        message = self.reload(stale)
+        self.assertEqual(message.status, OutboxMessage.STATUS_PROCESSING)
+        self.assertEqual(message.locked_by, 'worker-2')
+
+    def test_messages_not_yet_due_are_left_alone(self):
+        OutboxMessage.objects.update(available_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(outbox.claim_batch('worker-1', 10), [])
+
+
+class RetryTests(OutboxTestCase):
+    def setUp(self):
+        super().setUp()
+        self.message = self.enqueue_due(OutboxMessage.KIND_VENDOR_NOTIFICATION, {'vendor_id': 1, 'title': 't', 'body': 'b'})
+
+    def drain_with(self, error):
+        def handler(payload):
+            raise error
+        with mock.patch.dict(outbox.HANDLERS, {OutboxMessage.KIND_VENDOR_NOTIFICATION: handler}):
+            return outbox.drain('worker-1')
+
+    def test_retryable_failure_is_rescheduled_with_backoff(self):
+        before = timezone.now()
+        self.assertEqual(self.drain_with(sms.SMSError("provider timeout")), (1, 0))
+        message = self.reload(self.message)
+        self.assertEqual(message.status, OutboxMessage.STATUS_PENDING)
+        self.assertEqual(message.attempts, 1)
+        self.assertIsNone(message.locked_by)
+        self.assertIn("provider timeout", message.last_error)
+        base = outbox._setting('BACKOFF_BASE')
+        self.assertGreaterEqual(message.available_at, before + timedelta(seconds=base * 0.8))
+        self.assertLessEqual(message.available_at, timezone.now() + timedelta(seconds=base * 1.2))
+
+    def test_gives_up_after_max_attempts(self):
+        OutboxMessage.objects.filter(pk=self.message.pk).update(attempts=outbox._setting('MAX_ATTEMPTS') - 1)
+        self.drain_with(sms.SMSError("provider timeout"))
+        message = self.reload(self.message)
+        self.assertEqual(message.status, OutboxMessage.STATUS_FAILED)
+        self.assertIsNotNone(message.processed_at)
+
+    def test_non_retryable_failure_fails_at_once(self):
+        self.drain_with(sms.SMSError("invalid number", retryable=False))
+        self.assertEqual(self.reload(self.message).status, OutboxMessage.STATUS_FAILED)
+
+    def test_late_failure_after_lease_expired_leaves_new_lease_alone(self):
+        stale = outbox.claim_batch('worker-1', 1)[0]
+        OutboxMessage.objects.filter(pk=stale.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        outbox.claim_batch('worker-2', 1)
+        for error in (sms.SMSError("provider timeout"), sms.SMSError("invalid number", retryable=False)):
+            outbox._record(stale, error)
+            message = self.reload(stale)
+            self.assertEqual(message.status, OutboxMessage.STATUS_PROCESSING)
+            self.assertEqual(message.locked_by, 'worker-2')
+            self.assertIsNone(message.last_error)
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        with mock.patch('auth_app.outbox.random.uniform', return_value=1.0):
+            delays = [outbox.backoff_seconds(attempts) for attempts in range(1, 30)]
+        base, cap = outbox._setting('BACKOFF_BASE'), outbox._setting('BACKOFF_MAX')
+        self.assertEqual(delays[:3], [base, base * 2, base * 4])
+        self.assertEqual(delays[-1], cap)
+        self.assertEqual(delays, sorted(delays))
+
+
+class FCMOutboxTests(OutboxTestCase):
+    """fcm_push messages against the stub FCM server."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fcm = cls.enterClassContext(MockFCM())
+
+    def setUp(self):
+        super().setUp()
+        self.enterContext(self.settings(
+            FCM_ENDPOINT=self.fcm.url, FCM_PROJECT_ID='test-project', FCM_CREDENTIALS_FILE='service-account.json',
+        ))
+        # No google-auth here: stand in for the service-account token
+        self.enterContext(mock.patch.object(push, 'ServiceAccountToken', return_value=lambda: 'test-token'))
+        self.fcm.server.received.clear()
+
+    def push_to(self, vendor, title='New order'):
+        return self.enqueue_due(OutboxMessage.KIND_FCM_PUSH, {
+            'vendor_id': vendor.id, 'title': title, 'body': 'New order received', 'data': {'order_number': title},
+        })
+
+    def tokens_received(self):
+        return sorted(body['message']['token'] for body in self.fcm.received)
+
+    def test_pushes_for_one_vendor_are_coalesced(self):
+        vendor = make_vendor(fcm_token='device-1')
+        messages = [self.push_to(vendor, f"Order {i}") for i in range(3)]
+        self.assertEqual(outbox.drain('worker-1'), (3, 3))
+        self.assertEqual(self.tokens_received(), ['device-1'])
+        self.assertEqual(self.fcm.received[0]['message']['notification']['title'], "3 new notifications")
+        self.assertEqual(self.fcm.received[0]['message']['data']['count'], '3')
+        self.assertTrue(all(self.reload(m).status == OutboxMessage.STATUS_DONE for m in messages))
+
+    def test_one_request_per_token(self):
+        vendors = [make_vendor(f"V{i}", fcm_token=f"device-{i}") for i in range(3)]
+        for vendor in vendors:
+            self.push_to(vendor)
+        self.assertEqual(outbox.drain('worker-1'), (3, 3))
+        self.assertEqual(self.tokens_received(), ['device-0', 'device-1', 'device-2'])
+
+    def test_dead_tokens_are_pruned_and_not_retried(self):
+        vendors = [make_vendor('A', fcm_token='invalid-device'), make_vendor('B', fcm_token='malformed-device')]
+        messages = [self.push_to(vendor) for vendor in vendors]
+        outbox.drain('worker-1')
+        for message, vendor in zip(messages, vendors):
+            self.assertEqual(self.reload(message).status, OutboxMessage.STATUS_DONE)
+            vendor.refresh_from_db()
+            self.assertIsNone(vendor.fcm_token)
+
+    def test_unavailable_is_retried(self):
+        healthy, flaky = make_vendor('A', fcm_token='device-1'), make_vendor('B', fcm_token='flaky-device')
+        ok, retried = self.push_to(healthy), self.push_to(flaky)
+        self.assertEqual(outbox.drain('worker-1'), (2, 1))
+        self.assertEqual(self.reload(ok).status, OutboxMessage.STATUS_DONE)
+        retried = self.reload(retried)
+        self.assertEqual(retried.status, OutboxMessage.STATUS_PENDING)
+        self.assertIn("UNAVAILABLE", retried.last_error)
+        self.assertGreater(retried.available_at, timezone.now())
+
+    @override_settings(FCM_PROJECT_ID='')
+    def test_unconfigured_fcm_fails_without_retrying(self):
+        message = self.push_to(make_vendor(fcm_token='device-1'))
+        outbox.drain('worker-1')
+        self.assertEqual(self.reload(message).status, OutboxMessage.STATUS_FAILED)
+        self.assertEqual(self.fcm.received, [])
+
+    def test_vendor_without_token_is_skipped(self):
+        message = self.push_to(make_vendor())
+        self.assertEqual(outbox.drain('worker-1'), (1, 1))
+        self.assertEqual(self.fcm.received, [])
+        self.assertEqual(self.reload(message).status, OutboxMessage.STATUS_DONE)
+
+
+@override_settings(SMS_BACKEND='auth_app.sms.LocMemBackend', SMS_RATE_LIMIT=0)
+class SMSOutboxTests(OutboxTestCase):
+    """sms messages through LocMemBackend."""
+
+    def send(self, to='+919876543210', **payload):
+        return self.enqueue_due(OutboxMessage.KIND_SMS, {'to': to, 'body': 'Your code is 123456', **payload})
+
+    def test_sms_is_sent_through_the_backend(self):
+        message = self.send()
+        self.assertEqual(outbox.drain('worker-1'), (1, 1))
+        self.assertEqual(sms.outbox, [{'to': '+919876543210', 'body': 'Your code is 123456'}])
+        self.assertEqual(self.reload(message).status, OutboxMessage.STATUS_DONE)
+
+    def test_expired_otp_is_dropped(self):
+        message = self.send(expires_at=(timezone.now() - timedelta(seconds=1)).isoformat())
+        outbox.drain('worker-1')
+        self.assertEqual(sms.outbox, [])
+        self.assertEqual(self.reload(message).status, OutboxMessage.STATUS_DONE)
+
+    @override_settings(SMS_RATE_LIMIT=1)
+    def test_rate_limited_sms_is_deferred_without_using_an_attempt(self):
+        messages = [self.send(to=f"+91987654321{i}") for i in range(3)]
+        self.assertEqual(outbox.drain('worker-1'), (3, 1))
+        self.assertEqual(len(sms.outbox), 1)
+        deferred = [self.reload(message) for message in messages if message.payload['to'] != sms.outbox[0]['to']]
+        for message in deferred:
+            self.assertEqual(message.status, OutboxMessage.STATUS_PENDING)
+            self.assertEqual(message.attempts, 0)
+            self.assertIsNone(message.last_error)
+            self.assertGreater(message.available_at, timezone.now())
+
+    def test_otp_code_is_read_at_send_time_not_stored(self):
+        response = self.client.post('/api/otp/send/', {'phone_number': '9876543210'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        message = OutboxMessage.objects.get(kind=OutboxMessage.KIND_SMS)
+        code = otp.delivery_otp.current('9876543210')
+        self.assertNotIn(code, str(message.payload))
+        OutboxMessage.objects.filter(pk=message.pk).update(available_at=timezone.now())
+        outbox.drain('worker-1')
+        self.assertEqual(sms.outbox, [{'to': '+919876543210', 'body': f"Your Food on Door verification code is: {code}"}])
+
+    def test_used_otp_is_not_sent(self):
+        self.client.post('/api/otp/send/', {'phone_number': '9876543210'}, format='json')
+        otp.delivery_otp.verify('9876543210', otp.delivery_otp.current('9876543210'))
+        OutboxMessage.objects.update(available_at=timezone.now())
+        self.assertEqual(outbox.drain('worker-1'), (1, 1))
+        self.assertEqual(sms.outbox, [])
+
+
+@override_settings(**LOCAL_SERVICES)
+class OrderBoardTests(TestCase):
+    def setUp(self):
+        reset_services()
+        self.addCleanup(reset_services)
+        self.vendor = make_vendor()
+
+    def create_order(self, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Order.objects.create(vendor=self.vendor, items=[], total_price=100, **fields)
+
+    def set_status(self, order, status):
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = status
+            order.save()
+
+    def board(self):
+        return [(entry['id'], entry['status']) for entry in order_board.active_orders(self.vendor.pk)]
+
+    def test_board_follows_the_kitchen(self):
+        order = self.create_order()
+        self.assertEqual(self.board(), [(order.id, 'Pending')])
+        self.set_status(order, 'Preparing')
+        self.assertEqual(self.board(), [(order.id, 'Preparing')])
+        self.set_status(order, 'PickedUp')
+        self.assertEqual(self.board(), [])
+
+    def test_rebuild_keeps_updates_that_commit_while_it_reads(self):
+        leaving, moving = self.create_order(), self.create_order()
+        order_board.get_backend().clear()
+        load = order_board._load
+
+        def racing_load(vendor_pk):
+            rows = load(vendor_pk)
+            self.set_status(leaving, 'PickedUp')
+            self.set_status(moving, 'Accepted')
+            self.placed = self.create_order()
+            return rows
+
+        with mock.patch.object(order_board, '_load', racing_load):
+            self.assertEqual(self.board(), [(moving.id, 'Accepted'), (self.placed.id, 'Pending')])
+
+    def test_late_write_does_not_bring_an_order_back(self):
+        order = self.create_order()
+        self.board()
+        stale = Order.objects.get(pk=order.pk)
+        self.set_status(order, 'Cancelled')
+        order_board.record(stale)  # An older version, applied after the newer one
+        self.assertEqual(self.board(), [])
+
+
+@override_settings(**LOCAL_SERVICES, EVENTS_KEEPALIVE=0.1)
+class RealtimeTests(TestCase):
+    """Live events over WebSockets, through the LocalBroker."""
+
+    def setUp(self):
+        reset_services()
+        self.addCleanup(reset_services)
+        self.vendor = make_vendor()
+        token = RefreshToken()
+        token['vendor_id'] = self.vendor.vendor_id
+        self.vendor_token = str(token.access_token)
+
+    def socket(self, role, query_string=b'', authorization=None):
+        headers = [(b'authorization', authorization.encode())] if authorization else []
+        return ApplicationCommunicator(websocket_application, {
+            'type': 'websocket', 'path': f"/ws/events/{role}/", 'query_string': query_string, 'headers': headers,
+        })
+
+    async def connect(self, socket):
+        await socket.send_input({'type': 'websocket.connect'})
+        return await socket.receive_output(1)
+
+    async def next_event(self, socket):
+        while True:
+            message = await socket.receive_output(1)
+            if message['type'] != 'websocket.send' or '"ping"' not in message['text']:
+                return message
+
+    def ticket(self, role, token):
+        response = self.client.post(f"/events/{role}/ticket/", HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(response.status_code, 200)
+        return response.json()['ticket']
+
+    def create_order(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Order.objects.create(vendor=self.vendor, order_number='ORD-1', items=[], total_price=100)
+
+    async def test_vendor_socket_receives_order_events(self):
+        socket = self.socket('vendor', authorization=f"Bearer {self.vendor_token}")
+        self.assertEqual((await self.connect(socket))['type'], 'websocket.accept')
+        await sync_to_async(self.create_order)()
+        message = await self.next_event(socket)
+        self.assertIn('"order.created"', message['text'])
+        self.assertIn('"ORD-1"', message['text'])
+        await socket.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await socket.wait(1)
+        self.assertEqual(events.get_broker()._subscribers, {})
+
+    async def test_bad_credentials_are_refused(self):
+        for socket in (
+            self.socket('vendor'),
+            self.socket('vendor', authorization="Bearer not-a-token"),
+            self.socket('customer', authorization=f"Bearer {self.vendor_token}"),
+            self.socket('vendor', query_string=f"token={self.vendor_token}".encode()),  # Tokens never go in URLs
+        ):
+            self.assertEqual(await self.connect(socket), {'type': 'websocket.close', 'code': 4401})
+
+    async def test_ticket_works_once_and_for_its_role(self):
+        ticket = await sync_to_async(self.ticket)('vendor', self.vendor_token)
+        first = self.socket('vendor', query_string=f"ticket={ticket}".encode())
+        self.assertEqual((await self.connect(first))['type'], 'websocket.accept')
+        again = self.socket('vendor', query_string=f"ticket={ticket}".encode())
+        self.assertEqual((await self.connect(again))['code'], 4401)
+        other_role = await sync_to_async(self.ticket)('vendor', self.vendor_token)
+        wrong = self.socket('customer', query_string=f"ticket={other_role}".encode())
+        self.assertEqual((await self.connect(wrong))['code'], 4401)
+        await first.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await first.wait(1)
+
+    def test_ticket_needs_valid_credentials(self):
+        self.assertEqual(self.client.post('/events/vendor/ticket/').status_code, 401)
+        self.assertEqual(self.client.get('/events/vendor/ticket/', HTTP_AUTHORIZATION=f"Bearer {self.vendor_token}").status_code, 405)
+
+    async def test_socket_is_closed_once_the_partner_is_deactivated(self):
+        rider = await sync_to_async(DeliveryUser.objects.create)(phone_number='9111111111', name='Ravi')
+        token = (await sync_to_async(generate_delivery_jwt)(rider))['access']
+        socket = self.socket('delivery', authorization=f"Bearer {token}")
+        self.assertEqual((await self.connect(socket))['type'], 'websocket.accept')
+        await sync_to_async(deny_list.deny)(str(rider.id))
+        self.addCleanup(deny_list.allow, str(rider.id))
+        self.assertEqual(await self.next_event(socket), {'type': 'websocket.close', 'code': 4401})
+        await socket.wait(1)
+        self.assertEqual(events.get_broker()._subscribers, {})
+
+
+@override_settings(**LOCAL_SERVICES)
+class VendorAuthenticationTests(TestCase):
+    def setUp(self):
+        self.vendor = make_vendor()
+        token = RefreshToken()
+        token['vendor_id'] = self.vendor.vendor_id
+        self.request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+
+    def authenticate(self):
+        return VendorJWTAuthentication().authenticate(self.request)[0]
+
+    def test_cache_outage_falls_back_to_the_database(self):
+        broken = mock.Mock(**{'get.side_effect': ConnectionError, 'delete.side_effect': ConnectionError})
+        with mock.patch('auth_app.authentication.cache', broken):
+            self.assertEqual(self.authenticate().pk, self.vendor.pk)
+            # Deactivating still saves, and the next request sees it
+            self.vendor.is_active = False
+            self.vendor.save()
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate()
+
+
+@override_settings(**LOCAL_SERVICES)
+class GeoIndexVersionTests(TestCase):
+    def version(self):
+        return cache.get(geo.INDEX_VERSION_CACHE_KEY, 0)
+
+    def test_version_is_bumped_only_once_the_vendor_commits(self):
+        before = self.version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            vendor = make_vendor()
+            vendor.latitude = 13.0
+            vendor.save(update_fields=['latitude'])
+        self.assertEqual(self.version(), before)
+        for callback in callbacks:
+            callback()
+        self.assertGreater(self.version(), before)
+
+
+@override_settings(**LOCAL_SERVICES)
+class TestPincodeTests(TestCase):
+    def setUp(self):
+        self.vendor = make_vendor()
+
+    @override_settings(DELIVERY_TEST_PINCODE=TEST_PINCODE)
+    def test_flat_fee_when_configured(self):
+        self.assertEqual(quote_vendor(self.vendor, TEST_PINCODE).delivery_fee, 20.0)
+
+    @override_settings(DELIVERY_TEST_PINCODE='')
+    def test_real_pincode_when_turned_off(self):
+        with mock.patch('auth_app.delivery_quotes.resolve_pincode', return_value=None):
+            with self.assertRaises(QuoteUnavailable):
+                quote_vendor(self.vendor, TEST_PINCODE)
+
+
+@override_settings(CACHES=LOCAL_SERVICES['CACHES'])
+class GeocodeCacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.geocodes = geocoding.GeocodeCache(prefix='test-geocode')
+        self.calls = 0
+        self.release = threading.Event()
+
+    def fetch(self, result):
+        def fetch():
+            self.calls += 1
+            self.release.wait(5)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        return fetch
+
+    def burst(self, result, threads=8):
+        with ThreadPoolExecutor(threads) as pool:
+            futures = [pool.submit(self.geocodes.get_or_fetch, 'pincode:560001', self.fetch(result)) for _ in range(threads)]
+            while self.geocodes.stats()['coalesced'] < threads - 1:
+                time.sleep(0.01)
+            self.release.set()
+            return [future.result() for future in futures]
+
+    def test_concurrent_misses_make_one_upstream_call(self):
+        self.assertEqual(self.burst((12.97, 77.59)), [(12.97, 77.59)] * 8)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.geocodes.get_or_fetch('pincode:560001', self.fetch(None)), (12.97, 77.59))
+        self.assertEqual(self.calls, 1)
+
+    def test_waiters_share_an_upstream_failure_instead_of_each_retrying(self):
+        self.assertEqual(self.burst(geocoding.GeocoderUnavailable("timeout")), [None] * 8)
+        self.assertEqual(self.calls, 1)
+        # Failures aren't cached: the next lookup tries again
+        self.assertEqual(self.geocodes.get_or_fetch('pincode:560001', self.fetch((12.97, 77.59))), (12.97, 77.59))
+        self.assertEqual(self.calls, 2)
+
+
+class PincodeTests(TestCase):
+    def test_bundled_gazetteer_locates_pincodes_offline(self):
+        with mock.patch('auth_app.pincodes.geocode_pincode') as remote:
+            latitude, longitude = pincodes.resolve_pincode('560001')
+            self.assertAlmostEqual(latitude, 12.98, places=1)
+            self.assertAlmostEqual(longitude, 77.59, places=1)
+            # Unknown pincodes don't reach Nominatim unless it is turned on
+            self.assertIsNone(pincodes.resolve_pincode('999999'))
+        remote.assert_not_called()
@@ -5,12 +5,13 @@ from .views import (
     VendorRegisterView, VendorLoginView, VendorProfileView,
     MenuListView, MenuDetailView,
     ItemListView, ItemDetailView,
-    OrderListView, OrderDetailView,
+    OrderListView, ActiveOrderBoardView, OrderDetailView,
     ImageUploadView,
     EarningsSummaryView,
     UpdateFCMTokenView,
     NotificationListView,
     VendorSendOTP, VendorVerifyOTP,
+    GeocodeCacheStatsView,
 )
 
 # Define URL patterns specifically for the vendor functionality within auth_app
@@ -41,6 +42,7 @@ urlpatterns = [
 
     # Orders
     path('vendor/orders/', OrderListView.as_view(), name='vendor-order-list'),
+    path('vendor/orders/active/', ActiveOrderBoardView.as_view(), name='vendor-order-board'), # Before the order_number route
     path('vendor/orders/<str:order_number>/', OrderDetailView.as_view(), name='vendor-order-detail'), # Supports PATCH for status
 
     # Earnings
@@ -52,6 +54,7 @@ urlpatterns = [
     # Utilities
     path('vendor/upload-image/', ImageUploadView.as_view(), name='vendor-upload-image'),
     path('vendor/fcm-token/', UpdateFCMTokenView.as_view(), name='vendor-update-fcm-token'), # No ID needed, uses logged-in user
+    path('geocode/stats/', GeocodeCacheStatsView.as_view(), name='geocode-cache-stats'), # Staff only, per-process counters
 
     # --- REMOVE CUSTOMER FACING URLS if auth_app is vendor only ---
 ]
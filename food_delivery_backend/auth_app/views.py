@@ -19,10 +19,10 @@ import logging
 import traceback # For detailed error logging
 from django.utils import timezone
 from rest_framework.exceptions import ValidationError # Add this if missing
-from accounts.utils import OTPManager # Assuming OTPManager exists or will be created in accounts.utils
+from accounts.otp import vendor_otp, SENT, THROTTLED, MESSAGES as OTP_MESSAGES
 import random
-from geopy.geocoders import Nominatim # <-- Import geocoder
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError # <-- Import exceptions
+from .geocoding import geocode_address, geocode_cache
+from . import order_sync, order_board
 
 logger = logging.getLogger(__name__)
 
@@ -87,20 +87,16 @@ class VendorRegisterView(APIView): # Changed from CreateAPIView
             serializer.is_valid(raise_exception=True)
 
             # --- Geocoding --- >
-            geolocator = Nominatim(user_agent="food_delivery_app") # Replace with your app name
             address_string = serializer.validated_data['address']
             latitude = None
             longitude = None
             try:
-                location = geolocator.geocode(address_string, timeout=10) # 10 second timeout
-                if location:
-                    latitude = location.latitude
-                    longitude = location.longitude
+                coords = geocode_address(address_string) # Cached; see auth_app.geocoding
+                if coords:
+                    latitude, longitude = coords
                     logger.info(f"Geocoding successful for address '{address_string}': Lat={latitude}, Lon={longitude}")
                 else:
                     logger.warning(f"Geocoding failed: Address not found for '{address_string}'")
-            except (GeocoderTimedOut, GeocoderServiceError) as geo_e:
-                logger.error(f"Geocoding service error for address '{address_string}': {geo_e}")
             except Exception as geo_exc:
                 logger.error(f"Unexpected error during geocoding for address '{address_string}': {geo_exc}")
             # --- End Geocoding ---
@@ -220,8 +216,8 @@ class VendorProfileView(generics.RetrieveUpdateAPIView):
 
     def get_object(self):
         # Retrieve the vendor instance attached by the custom authentication backend
-        if hasattr(self.request.user, 'vendor_instance'):
-            logger.debug(f"Fetching profile for vendor: {self.request.user.vendor_instance.vendor_id}")
+        if getattr(self.request.user, 'vendor_id', None) is not None:
+            logger.debug(f"Fetching profile for vendor: {self.request.user.vendor_id}")
             return self.request.user.vendor_instance
         else:
             # This should not happen if IsVendorUser permission works correctly
@@ -238,9 +234,8 @@ class MenuListView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         # Filter menus belonging to the authenticated vendor
-        vendor_instance = self.request.user.vendor_instance
-        logger.debug(f"Listing menus for vendor: {vendor_instance.vendor_id}")
-        return Menu.objects.filter(vendor=vendor_instance)
+        logger.debug(f"Listing menus for vendor: {self.request.user.vendor_id}")
+        return Menu.objects.filter(vendor_id=self.request.user.pk)
 
     def perform_create(self, serializer):
         # Assign the authenticated vendor automatically
@@ -259,8 +254,7 @@ class MenuDetailView(generics.RetrieveUpdateDestroyAPIView):
     def get_queryset(self):
         # Further filter to ensure the object lookup is scoped to the vendor
         # Although IsVendorOwnerOrReadOnly handles object check, pre-filtering is good practice
-        vendor_instance = self.request.user.vendor_instance
-        return Menu.objects.filter(vendor=vendor_instance)
+        return Menu.objects.filter(vendor_id=self.request.user.pk)
 
 
 # --- Food Listing (Item) Views ---
@@ -272,11 +266,10 @@ class ItemListView(generics.ListCreateAPIView):
 
     def get_queryset(self):
         # Filter items based on the menu_id from the URL and ensure menu belongs to vendor
-        vendor_instance = self.request.user.vendor_instance
         menu_id = self.kwargs.get('menu_id')
-        logger.debug(f"Listing items for menu_id: {menu_id} of vendor: {vendor_instance.vendor_id}")
+        logger.debug(f"Listing items for menu_id: {menu_id} of vendor: {self.request.user.vendor_id}")
         # Ensure the menu belongs to the vendor before listing items
-        return FoodListing.objects.filter(menu__id=menu_id, menu__vendor=vendor_instance)
+        return FoodListing.objects.filter(menu__id=menu_id, menu__vendor_id=self.request.user.pk)
 
     def perform_create(self, serializer):
         # Get the menu instance and check ownership before saving the item
@@ -305,20 +298,40 @@ class ItemDetailView(generics.RetrieveUpdateDestroyAPIView):
 
     def get_queryset(self):
         # Further filter items to ensure they belong to the vendor
-        vendor_instance = self.request.user.vendor_instance
-        return FoodListing.objects.filter(menu__vendor=vendor_instance)
+        return FoodListing.objects.filter(menu__vendor_id=self.request.user.pk)
 
 # --- Order Views ---
 class OrderListView(generics.ListAPIView):
-    """Lists orders for the authenticated vendor, supports status filtering."""
+    """
+    Lists orders for the authenticated vendor, supports status filtering.
+
+    With ``?since=<cursor>`` (empty for a first sync) only the orders changed
+    since the cursor are returned, see auth_app.order_sync.
+    """
     serializer_class = OrderSerializer
     authentication_classes = [VendorJWTAuthentication]
     permission_classes = [IsVendorUser]
 
+    def list(self, request, *args, **kwargs):
+        if 'since' not in request.query_params:
+            return super().list(request, *args, **kwargs)
+        cursor = request.query_params['since'] or None
+        try:
+            page = order_sync.changes_since(request.user.pk, cursor)
+        except ValueError:
+            return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+        if cursor and not page.orders and not page.tombstones:
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return Response({
+            'orders': self.get_serializer(page.orders, many=True).data,
+            'cancelled': page.tombstones,
+            'cursor': page.cursor,
+            'has_more': page.has_more,
+        })
+
     def get_queryset(self):
-        vendor_instance = self.request.user.vendor_instance
-        logger.debug(f"Listing orders for vendor: {vendor_instance.vendor_id}")
-        queryset = Order.objects.filter(vendor=vendor_instance).order_by('-created_at')
+        logger.debug(f"Listing orders for vendor: {self.request.user.vendor_id}")
+        queryset = Order.objects.filter(vendor_id=self.request.user.pk).order_by('-created_at')
 
         # Filter by status query parameter (e.g., /vendor/orders/?status=Pending)
         status_filter = self.request.query_params.get('status', None)
@@ -335,6 +348,18 @@ class OrderListView(generics.ListAPIView):
 
         return queryset
 
+class ActiveOrderBoardView(APIView):
+    """The vendor's orders still in the kitchen, from the order board (auth_app.order_board)."""
+    authentication_classes = [VendorJWTAuthentication]
+    permission_classes = [IsVendorUser]
+
+    def get(self, request):
+        orders = order_board.active_orders(request.user.pk)
+        counts = {status_name: 0 for status_name in order_board.BOARD_STATUSES}
+        for order in orders:
+            counts[order['status']] = counts.get(order['status'], 0) + 1
+        return Response({'orders': orders, 'counts': counts})
+
 class OrderDetailView(generics.RetrieveUpdateAPIView): # Changed to allow PATCH for status update
     """Retrieve order details or Update order status (via PATCH)."""
     queryset = Order.objects.all()
@@ -351,8 +376,7 @@ class OrderDetailView(generics.RetrieveUpdateAPIView): # Changed to allow PATCH
 
     def get_queryset(self):
         # Ensure lookup is scoped to the vendor's orders
-        vendor_instance = self.request.user.vendor_instance
-        return Order.objects.filter(vendor=vendor_instance)
+        return Order.objects.filter(vendor_id=self.request.user.pk)
 
     # PATCH is handled implicitly by RetrieveUpdateAPIView using the serializer's update method
 
@@ -407,11 +431,10 @@ class EarningsSummaryView(APIView):
     authentication_classes = [VendorJWTAuthentication]
     permission_classes = [IsVendorUser]
     def get(self, request):
-        vendor_instance = request.user.vendor_instance
-        logger.debug(f"Fetching earnings summary for vendor: {vendor_instance.vendor_id}")
+        logger.debug(f"Fetching earnings summary for vendor: {request.user.vendor_id}")
         # TODO: Implement logic to calculate earnings based on 'Delivered' or 'Paid' orders
         # Example: Calculate sum of total_price for orders with status 'Delivered'
-        # total_earned = Order.objects.filter(vendor=vendor_instance, status='Delivered').aggregate(Sum('total_price'))['total_price__sum'] or 0.00
+        # total_earned = Order.objects.filter(vendor_id=request.user.pk, status='Delivered').aggregate(Sum('total_price'))['total_price__sum'] or 0.00
         return Response({'total_earnings': "0.00", 'message': 'Earnings calculation not yet implemented.'})
 
 
@@ -443,10 +466,9 @@ class NotificationListView(generics.ListAPIView):
     permission_classes = [IsVendorUser]
 
     def get_queryset(self):
-        vendor_instance = self.request.user.vendor_instance
-        logger.debug(f"Fetching notifications for vendor: {vendor_instance.vendor_id}")
+        logger.debug(f"Fetching notifications for vendor: {self.request.user.vendor_id}")
         # TODO: Add filtering for read/unread if needed
-        return Notification.objects.filter(vendor=vendor_instance) # Already ordered by '-created_at' in model Meta
+        return Notification.objects.filter(vendor_id=self.request.user.pk) # Already ordered by '-created_at' in model Meta
 
 # --- Vendor OTP Views ---
 
@@ -463,10 +485,11 @@ class VendorSendOTP(APIView):
             if not phone.isdigit() or len(phone) < 10:
                  return Response({'error': 'Invalid phone number format.'}, status=status.HTTP_400_BAD_REQUEST)
 
-            otp, error = OTPManager.generate_otp(phone)
-            if error:
-                logger.error(f"Vendor OTP generation failed for {phone}: {error}")
-                return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+            otp, outcome = vendor_otp.generate(phone)
+            if outcome != SENT:
+                logger.error(f"Vendor OTP generation failed for {phone}: {OTP_MESSAGES[outcome]}")
+                code = status.HTTP_429_TOO_MANY_REQUESTS if outcome == THROTTLED else status.HTTP_503_SERVICE_UNAVAILABLE
+                return Response({'error': OTP_MESSAGES[outcome]}, status=code)
 
             logger.info(f"Vendor OTP for {phone}: {otp}") # Remove in production
             return Response({'message': 'OTP sent successfully', 'debug_otp': otp}, status=status.HTTP_200_OK)
@@ -487,7 +510,7 @@ class VendorVerifyOTP(APIView):
             if not all([phone, otp]):
                 return Response({'error': 'Phone and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-            is_valid, message = OTPManager.verify_otp(phone, otp)
+            is_valid, message = vendor_otp.verify(phone, otp)
             if not is_valid:
                 logger.warning(f"Vendor OTP verification failed for {phone}: {message}")
                 return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
@@ -531,4 +554,12 @@ class VendorVerifyOTP(APIView):
 # Remove these if auth_app is ONLY for vendors
 # class ActiveRestaurantsView(APIView): ...
 # class RestaurantDetailView(APIView): ...
-# etc...
\ No newline at end of file
+# etc...
+
+
+class GeocodeCacheStatsView(APIView):
+    """Hit/miss counters of this worker's geocode cache, for monitoring."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(geocode_cache.stats())
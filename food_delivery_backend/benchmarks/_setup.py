@@ -0,0 +1,62 @@
+"""
+Shared bootstrap for the benchmark scripts in this directory.
+
+Benchmarks run against a throwaway SQLite database and the local-memory cache
+so they never touch db.sqlite3 or Redis. Run them from the project root, e.g.
+
+    python benchmarks/bench_nearby.py
+"""
+import os
+import sys
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    """Configure Django against a scratch database and run migrations."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'food_delivery_backend.settings')
+
+    import django
+    from django.conf import settings
+
+    scratch_dir = tempfile.mkdtemp(prefix='fod_bench_')
+    settings.DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(scratch_dir, 'bench.sqlite3'),
+        }
+    }
+    settings.CACHES = {
+        'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+    }
+    # No Redis either: the in-process stores have to be named
+    settings.OTP_BACKEND = 'locmem'
+    settings.EVENTS_BACKEND = 'local'
+    settings.ORDER_BOARD_BACKEND = 'local'
+    settings.LOGGING = {'version': 1, 'disable_existing_loggers': False}
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def timed(func, repeat):
+    """Call ``func`` ``repeat`` times and return per-call latencies in ms."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return f"mean {statistics.mean(samples):8.3f} ms  p50 {statistics.median(samples):8.3f} ms  p95 {p95:8.3f} ms  p99 {p99:8.3f} ms"
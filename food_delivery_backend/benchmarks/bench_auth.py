@@ -0,0 +1,85 @@
+"""
+Per-request authentication overhead of CustomerJWTAuthentication and
+VendorJWTAuthentication.
+
+"per-request lookup" is what the authenticators used to do on every call
+(decode the token, then fetch the Account / Vendor row); "cached principal"
+is the current path, where repeat requests from the same customer are served
+from the per-process principal cache and repeat requests from the same
+vendor from the cached vendor principal.
+"""
+import jwt
+
+from _setup import setup_django, timed, summarize
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from accounts.models import Account, CustomerProfile  # noqa: E402
+from customer_app.authentication import CustomerJWTAuthentication, customer_principals  # noqa: E402
+from customer_app.utils import get_jwt_tokens_for_customer  # noqa: E402
+from django.db import connection, reset_queries  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+from auth_app.models import Vendor  # noqa: E402
+from auth_app.authentication import VendorJWTAuthentication  # noqa: E402
+
+CUSTOMERS = 1_000
+REPEAT = 20_000
+
+
+def per_request_lookup(token):
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=['HS256'], leeway=settings.SIMPLE_JWT['LEEWAY'])
+    return Account.objects.get(id=payload['user_id'], user_type='customer')
+
+
+def vendor_lookup(authenticator, raw_token):
+    token = authenticator.get_validated_token(raw_token)
+    return Vendor.objects.get(vendor_id=token['vendor_id'], is_active=True)
+
+
+def vendor_main():
+    Vendor.objects.bulk_create([
+        Vendor(vendor_id=f"VB{i:06d}", restaurant_name=f"V{i}", address="-", contact_number=f"8{i:09d}")
+        for i in range(CUSTOMERS)
+    ])
+    refresh = RefreshToken()
+    refresh['vendor_id'] = "VB000001"
+    token = str(refresh.access_token)
+    factory = APIRequestFactory()
+    request = Request(factory.get('/vendor_auth/vendor/orders/', HTTP_AUTHORIZATION=f"Bearer {token}"))
+    authenticator = VendorJWTAuthentication()
+
+    print(f"{CUSTOMERS} vendors, {REPEAT} authentications of one token")
+    print(f"per-request lookup  {summarize(timed(lambda: vendor_lookup(authenticator, token.encode()), REPEAT))}")
+    authenticator.authenticate(request)  # Warm the principal
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        samples = timed(lambda: authenticator.authenticate(request), REPEAT)
+    print(f"cached principal    {summarize(samples)}  ({len(queries)} queries)")
+
+
+def main():
+    Account.objects.bulk_create([Account(email=f"c{i}@bench", user_type='customer') for i in range(CUSTOMERS)])
+    CustomerProfile.objects.bulk_create([
+        CustomerProfile(user=account, phone=f"9{account.id:09d}", full_name=f"C{account.id}")
+        for account in Account.objects.all()
+    ])
+    profile = CustomerProfile.objects.select_related('user').first()
+    token = get_jwt_tokens_for_customer(profile)['access']
+    factory = APIRequestFactory()
+    request = Request(factory.get('/customer/api/orders/', HTTP_AUTHORIZATION=f"Bearer {token}"))
+    authenticator = CustomerJWTAuthentication()
+
+    print(f"{CUSTOMERS} customers, {REPEAT} authentications of one token")
+    print(f"per-request lookup  {summarize(timed(lambda: per_request_lookup(token), REPEAT))}")
+    customer_principals.clear()
+    print(f"cached principal    {summarize(timed(lambda: authenticator.authenticate(request), REPEAT))}")
+    print()
+    vendor_main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Autocomplete latency and index build time.
+
+Builds ``customer_app.autocomplete`` over generated vendors and food listings
+and times ``suggest()`` for short and long prefixes. Checks every result
+against a brute-force scan of the same entries.
+"""
+import random
+
+from _setup import setup_django, timed, summarize
+
+setup_django()
+
+import time  # noqa: E402
+from auth_app.models import Vendor, FoodListing  # noqa: E402
+from customer_app.autocomplete import autocomplete_index, normalize  # noqa: E402
+
+VENDORS = 10_000
+FOODS = 200_000
+PREFIXES = ['c', 'ch', 'chi', 'chicken b', 'bir', 'paneer tik', 'house 12', 'zzz']
+REPEAT = 2000
+
+DISHES = ['chicken', 'mutton', 'paneer', 'veg', 'egg', 'fish', 'prawn', 'aloo', 'gobi', 'mushroom', 'dal', 'rajma']
+STYLES = ['biryani', 'curry', 'tikka', 'masala', 'fried rice', 'noodles', 'roll', 'kebab', 'butter', 'korma', 'dosa', 'pulao']
+CATEGORIES = ['Starters', 'Main Course', 'Breads', 'Rice', 'Desserts', 'Beverages', 'Chinese', 'Tandoor']
+
+
+def populate(rng):
+    Vendor.objects.bulk_create([
+        Vendor(vendor_id=f"BENCH{i}", restaurant_name=f"{rng.choice(DISHES).title()} House {i}", address="-",
+               contact_number=f"9{i:09d}", rating=rng.uniform(0, 5))
+        for i in range(VENDORS)
+    ], batch_size=5000)
+    vendor_ids = list(Vendor.objects.values_list('id', flat=True))
+    FoodListing.objects.bulk_create([
+        FoodListing(vendor_id=rng.choice(vendor_ids), price=100, category=rng.choice(CATEGORIES),
+                    name=f"{rng.choice(DISHES).title()} {rng.choice(STYLES).title()} {rng.randint(1, 5000)}")
+        for _ in range(FOODS)
+    ], batch_size=20_000)
+
+
+def brute_force(entries, prefix, limit):
+    matches = [
+        e for e in entries
+        if any(' '.join(normalize(e[0]).split()[i:]).startswith(prefix) for i in range(len(normalize(e[0]).split())))
+    ]
+    return sorted(e[3] for e in matches)[::-1][:limit]
+
+
+def main():
+    populate(random.Random(3))
+    start = time.perf_counter()
+    autocomplete_index.ensure_fresh()
+    compiled = autocomplete_index._compiled
+    print(f"built {len(compiled.entries)} entries / {len(compiled.keys)} keys in {time.perf_counter() - start:.2f} s")
+    for prefix in PREFIXES:
+        got = [e[3] for e in autocomplete_index.suggest(prefix, 10)]
+        assert got == brute_force(compiled.entries, normalize(prefix), 10), prefix
+        samples = timed(lambda: autocomplete_index.suggest(prefix, 10), REPEAT)
+        print(f"{prefix!r:14} {summarize(samples)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Rider order polling (GET api/orders/) throughput, before and after moving the
+delivery-partner active check to the cached deny-list.
+
+"per-request lookup" authenticates the way DeliveryUserJWTAuthentication used
+to, fetching the DeliveryUser row on every call to check is_active; "deny-list"
+is the current token-only path. Both serve the same rider's orders through
+DeliveryOrderListView, so the difference is the authentication cost; the
+authentication step alone is timed as well.
+"""
+import time
+import uuid
+
+from _setup import setup_django, timed, summarize
+
+setup_django()
+
+from django.db import connection, reset_queries  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework import exceptions  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+from accounts.models import Account, CustomerProfile  # noqa: E402
+from auth_app.models import Vendor  # noqa: E402
+from customer_app.models import Order  # noqa: E402
+from delivery_auth.authentication import DeliveryUserJWTAuthentication  # noqa: E402
+from delivery_auth.denylist import deny_list  # noqa: E402
+from delivery_auth.models import DeliveryUser  # noqa: E402
+from delivery_auth.views import DeliveryOrderListView, generate_delivery_jwt  # noqa: E402
+
+RIDERS = 2_000
+ORDERS_PER_RIDER = 3
+REQUESTS = 5_000
+
+
+class PerRequestLookupAuthentication(DeliveryUserJWTAuthentication):
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            user = DeliveryUser.objects.get(id=result[0].id)
+            if not user.is_active:
+                raise exceptions.AuthenticationFailed('User account is disabled')
+        return result
+
+
+def seed():
+    account = Account.objects.create(email="bench@customer", user_type='customer')
+    customer = CustomerProfile.objects.create(user=account, phone="9000000000", full_name="Bench")
+    vendor = Vendor.objects.create(restaurant_name="Bench", address="-", contact_number="8000000000")
+    riders = DeliveryUser.objects.bulk_create([
+        DeliveryUser(id=uuid.uuid4(), phone_number=f"7{i:09d}", name=f"R{i}", is_active=i % 50 != 0)
+        for i in range(RIDERS)
+    ])
+    Order.objects.bulk_create([
+        Order(customer=customer, vendor=vendor, order_number=f"ORD{i}{j}", total_amount=100,
+              delivery_address="-", delivery_partner={'id': str(rider.id), 'name': rider.name}, assigned_partner=rider)
+        for i, rider in enumerate(riders) for j in range(ORDERS_PER_RIDER)
+    ])
+    deny_list.publish()
+    return next(rider for rider in riders if rider.is_active)
+
+
+def main():
+    rider = seed()
+    token = generate_delivery_jwt(rider)['access']
+    factory = APIRequestFactory()
+    before = DeliveryOrderListView.as_view(authentication_classes=[PerRequestLookupAuthentication])
+    after = DeliveryOrderListView.as_view()
+
+    print(f"{RIDERS} riders ({len(deny_list.shared())} deactivated), {REQUESTS} polls of one rider's orders")
+    for label, view in (("per-request lookup", before), ("deny-list", after)):
+        def poll():
+            response = view(factory.get('/api/orders/', HTTP_AUTHORIZATION=f"Bearer {token}"))
+            assert response.status_code == 200, response.status_code
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            poll()
+        query_count = len(queries)
+        start = time.perf_counter()
+        samples = timed(poll, REQUESTS)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<19} {REQUESTS / elapsed:7.0f} req/s  {summarize(samples)}  ({query_count} queries/request)")
+
+    request = Request(factory.get('/api/orders/', HTTP_AUTHORIZATION=f"Bearer {token}"))
+    print("authentication only")
+    for label, authenticator in (("per-request lookup", PerRequestLookupAuthentication()),
+                                 ("deny-list", DeliveryUserJWTAuthentication())):
+        print(f"{label:<19} {summarize(timed(lambda: authenticator.authenticate(request), REQUESTS * 4))}")
+
+
+if __name__ == '__main__':
+    main()
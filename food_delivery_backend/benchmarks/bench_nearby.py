@@ -0,0 +1,66 @@
+"""
+Nearby-vendor lookup latency as the vendor table grows.
+
+Compares the spatial index path used by HomeDataView/NearbyRestaurantsView
+(``auth_app.geo.nearby_vendors``) with the previous full scan that called
+geodesic() on every active vendor.
+"""
+import random
+
+from _setup import setup_django, timed, summarize
+
+setup_django()
+
+from geopy.distance import geodesic  # noqa: E402
+from auth_app.models import Vendor  # noqa: E402
+from auth_app import geo  # noqa: E402
+
+# Rough bounding box of India
+LAT_RANGE = (8.0, 35.0)
+LNG_RANGE = (68.0, 97.0)
+SIZES = [1_000, 10_000, 100_000]
+QUERIES = 200
+LEGACY_QUERIES = {1_000: 20, 10_000: 5, 100_000: 1}
+
+
+def populate(target, rng):
+    existing = Vendor.objects.count()
+    batch = []
+    for i in range(existing, target):
+        lat = rng.uniform(*LAT_RANGE)
+        lng = rng.uniform(*LNG_RANGE)
+        batch.append(Vendor(
+            vendor_id=f"BENCH{i}", restaurant_name=f"Bench {i}", address="-",
+            contact_number=f"9{i:09d}", latitude=lat, longitude=lng,
+            geohash=geo.encode_geohash(lat, lng), rating=rng.uniform(0, 5),
+        ))
+    Vendor.objects.bulk_create(batch, batch_size=5000)
+    geo.bump_index_version()
+    geo.vendor_index.invalidate()
+
+
+def legacy_nearby(lat, lng):
+    return [
+        v for v in Vendor.objects.filter(is_active=True)
+        if geodesic((lat, lng), (v.latitude, v.longitude)).km <= 5
+    ]
+
+
+def main():
+    rng = random.Random(42)
+    for size in SIZES:
+        populate(size, rng)
+        origins = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(QUERIES)]
+        geo.vendor_index.ensure_fresh()  # exclude the one-off index build
+
+        it = iter(origins * 2)
+        indexed = timed(lambda: geo.nearby_vendors(Vendor.objects.filter(is_active=True), *next(it), radius_km=5), QUERIES)
+        print(f"{size:>7} vendors  indexed  {summarize(indexed)}")
+
+        it = iter(origins)
+        legacy = timed(lambda: legacy_nearby(*next(it)), LEGACY_QUERIES[size])
+        print(f"{size:>7} vendors  full scan {summarize(legacy)}")
+
+
+if __name__ == '__main__':
+    main()
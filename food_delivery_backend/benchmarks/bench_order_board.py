@@ -0,0 +1,72 @@
+"""
+"What is on the go right now" for a vendor with a long order history: the
+status-filtered order list (table filter + OrderSerializer) against the
+order board (auth_app.order_board).
+
+Seeds HISTORY delivered orders plus ACTIVE open ones for one vendor (pass a
+smaller history as the first argument for a quick run), then times both
+endpoints through the test client.
+"""
+import sys
+
+from _setup import setup_django, timed, summarize
+
+setup_django()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection, reset_queries, transaction  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+from rest_framework_simplejwt.tokens import RefreshToken  # noqa: E402
+from auth_app.models import Vendor, Order  # noqa: E402
+
+HISTORY = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+ACTIVE = 30
+BATCH = 10_000
+REPEAT = 50
+ACTIVE_STATUSES = ['Pending', 'Accepted', 'Preparing']
+
+
+def seed():
+    vendor = Vendor.objects.create(restaurant_name="Bench", address="-", contact_number="8000000000")
+    items = [{'item_id': 1, 'name': 'Dosa', 'quantity': 2, 'price': '60.00'}]
+    for offset in range(0, HISTORY, BATCH):
+        with transaction.atomic():
+            Order.objects.bulk_create([
+                Order(vendor=vendor, order_number=f"H{i}", items=items, total_price=120, status='Delivered')
+                for i in range(offset, min(offset + BATCH, HISTORY))
+            ])
+    for i in range(ACTIVE):
+        Order.objects.create(vendor=vendor, order_number=f"A{i}", items=items, total_price=120,
+                             status=ACTIVE_STATUSES[i % len(ACTIVE_STATUSES)])
+    return vendor
+
+
+def main():
+    settings.ALLOWED_HOSTS.append('testserver')
+    vendor = seed()
+    token = RefreshToken()
+    token['vendor_id'] = vendor.vendor_id
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token.access_token}")
+
+    def status_lists():
+        for status_name in ACTIVE_STATUSES:
+            client.get('/vendor_auth/vendor/orders/', {'status': status_name})
+
+    shapes = (
+        ("status filters", status_lists),
+        ("order board", lambda: client.get('/vendor_auth/vendor/orders/active/')),
+    )
+    print(f"{HISTORY} delivered + {ACTIVE} active orders for one vendor")
+    for label, func in shapes:
+        func()  # Warm the principal cache and build the board
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        query_count = len(queries)
+        print(f"{label:<15} {summarize(timed(func, REPEAT))}  queries {query_count}")
+
+
+if __name__ == '__main__':
+    main()
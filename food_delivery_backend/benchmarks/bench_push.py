@@ -0,0 +1,79 @@
+"""
+Vendor push throughput against the local mock FCM server (auth_app.mock_fcm).
+
+A lunch-peak burst of order pushes spread over a few hundred vendor tokens is
+delivered three ways:
+
+* one-at-a-time: a fresh connection per push, sent serially (what the old inline send did)
+* pooled: PushDispatcher fanning the v1 requests out over keep-alive connections, no coalescing
+* coalesced: the outbox path, one push per vendor token for the whole burst
+
+The mock adds a fixed per-request latency to stand in for the FCM round trip;
+it runs in this process, so client and server share one interpreter.
+"""
+import random
+import time
+
+import requests
+
+from _setup import setup_django
+
+setup_django()
+
+from auth_app.push import Push, PushDispatcher, coalesce  # noqa: E402
+from auth_app.mock_fcm import MockFCM  # noqa: E402
+
+PUSHES = 1_000
+VENDORS = 300
+LATENCY = 0.005  # seconds per FCM request
+
+
+def burst(rng):
+    return [
+        Push(f"token-{rng.randrange(VENDORS)}", f"New Order #ORD{i}", f"New order received for ₹{rng.randint(100, 900)}",
+             {'order_number': f"ORD{i}"})
+        for i in range(PUSHES)
+    ]
+
+
+def one_at_a_time(url, pushes):
+    for push in pushes:
+        requests.post(f"{url}/v1/projects/bench/messages:send",
+                      json={'message': {'token': push.token, 'notification': {'title': push.title, 'body': push.body}}},
+                      headers={'Authorization': 'Bearer bench', 'Connection': 'close'}, timeout=10)
+
+
+def report(name, fcm, elapsed, delivered):
+    print(f"{name:15} {elapsed:7.2f} s  {delivered / elapsed:8.0f} notifications/s  "
+          f"{fcm.requests:5} requests  {fcm.connections:5} connections")
+
+
+def main():
+    pushes = burst(random.Random(7))
+    print(f"{PUSHES} notifications for {VENDORS} vendor tokens, {LATENCY * 1000:.0f} ms per FCM request")
+
+    with MockFCM(latency=LATENCY) as fcm:
+        start = time.perf_counter()
+        one_at_a_time(fcm.url, pushes)
+        report('one-at-a-time', fcm, time.perf_counter() - start, PUSHES)
+
+    with MockFCM(latency=LATENCY) as fcm:
+        dispatcher = PushDispatcher(fcm.url, 'bench', lambda: 'bench-token', pool_size=10)
+        start = time.perf_counter()
+        errors = dispatcher.send(pushes)
+        report('pooled', fcm, time.perf_counter() - start, PUSHES)
+        assert not any(errors)
+        dispatcher.close()
+
+    with MockFCM(latency=LATENCY) as fcm:
+        dispatcher = PushDispatcher(fcm.url, 'bench', lambda: 'bench-token', pool_size=10)
+        start = time.perf_counter()
+        merged = coalesce(pushes)
+        errors = dispatcher.send([push for push, _ in merged])
+        report('coalesced', fcm, time.perf_counter() - start, PUSHES)
+        assert not any(errors)
+        dispatcher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Rider order listing at scale: the old JSON lookup on Order.delivery_partner
+against the indexed Order.assigned_partner foreign key.
+
+Seeds ORDERS orders spread over RIDERS riders (1M by default; pass a smaller
+count as the first argument for a quick run), then lists one rider's orders,
+newest first, the way DeliveryOrderListView does.
+"""
+import sys
+import uuid
+import random
+
+from _setup import setup_django, timed, summarize
+
+setup_django()
+
+from django.db import transaction  # noqa: E402
+from accounts.models import Account, CustomerProfile  # noqa: E402
+from auth_app.models import Vendor  # noqa: E402
+from customer_app.models import Order  # noqa: E402
+from delivery_auth.models import DeliveryUser  # noqa: E402
+
+ORDERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+RIDERS = 5_000
+BATCH = 10_000
+REPEAT = 20
+
+
+def seed(rng):
+    account = Account.objects.create(email="bench@customer", user_type='customer')
+    customer = CustomerProfile.objects.create(user=account, phone="9000000000", full_name="Bench")
+    vendor = Vendor.objects.create(restaurant_name="Bench", address="-", contact_number="8000000000")
+    riders = DeliveryUser.objects.bulk_create([
+        DeliveryUser(id=uuid.uuid4(), phone_number=f"7{i:09d}", name=f"R{i}") for i in range(RIDERS)
+    ])
+    for offset in range(0, ORDERS, BATCH):
+        with transaction.atomic():
+            orders = []
+            for i in range(offset, min(offset + BATCH, ORDERS)):
+                rider = riders[rng.randrange(RIDERS)]
+                orders.append(Order(
+                    customer=customer, vendor=vendor, order_number=f"B{i}", total_amount=100, delivery_address="-",
+                    delivery_partner={'id': str(rider.id), 'name': rider.name}, assigned_partner=rider,
+                ))
+            Order.objects.bulk_create(orders)
+    return riders
+
+
+def main():
+    rng = random.Random(7)
+    riders = seed(rng)
+    rider = riders[0]
+    shapes = (
+        ("JSON lookup", Order.objects.filter(delivery_partner__id=str(rider.id)).order_by('-created_at')),
+        ("foreign key", Order.objects.filter(assigned_partner_id=rider.id).order_by('-created_at')),
+    )
+
+    print(f"{ORDERS} orders, {RIDERS} riders, listing one rider's {shapes[1][1].count()} orders")
+    for label, queryset in shapes:
+        print(f"{label:<12} {summarize(timed(lambda: list(queryset.all()), REPEAT))}")
+        plan = ' / '.join(line.split(' ', 3)[-1] for line in queryset.explain().splitlines())
+        print(f"             plan: {plan}")
+
+if __name__ == '__main__':
+    main()
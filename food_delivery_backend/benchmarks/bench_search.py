@@ -0,0 +1,68 @@
+"""
+SearchView lookup latency at 500k food listings.
+
+Compares the ranked FTS5 lookups in ``customer_app.search`` with the previous
+``icontains`` filters over name/description. Food text is generated from a
+small vocabulary so prefixes like "chi" match a realistic share of rows.
+"""
+import random
+
+from _setup import setup_django, timed, summarize
+
+setup_django()
+
+from django.db.models import Q  # noqa: E402
+from auth_app.models import Vendor, FoodListing  # noqa: E402
+from customer_app import search  # noqa: E402
+
+FOODS = 500_000
+VENDORS = 5_000
+QUERIES = ['chi', 'chicken bir', 'paneer', 'masala dosa', 'gulab', 'veg fried r', 'butter naan', 'xyzzy']
+REPEAT = 50
+
+DISHES = ['chicken', 'mutton', 'paneer', 'veg', 'egg', 'fish', 'prawn', 'aloo', 'gobi', 'mushroom', 'dal', 'rajma']
+STYLES = ['biryani', 'curry', 'tikka', 'masala', 'fried rice', 'noodles', 'roll', 'kebab', 'butter', 'korma', 'dosa', 'pulao']
+EXTRAS = ['spicy', 'classic', 'special', 'family pack', 'combo', 'with naan', 'gulab jamun', 'half', 'full', 'jumbo']
+
+
+def populate(rng):
+    Vendor.objects.bulk_create([
+        Vendor(vendor_id=f"BENCH{i}", restaurant_name=f"{rng.choice(DISHES).title()} House {i}", address="-",
+               contact_number=f"9{i:09d}")
+        for i in range(VENDORS)
+    ], batch_size=5000)
+    vendor_ids = list(Vendor.objects.values_list('id', flat=True))
+    batch = []
+    for i in range(FOODS):
+        name = f"{rng.choice(DISHES).title()} {rng.choice(STYLES).title()} {i}"
+        batch.append(FoodListing(
+            vendor_id=rng.choice(vendor_ids), name=name, price=100,
+            description=f"{rng.choice(EXTRAS)} {rng.choice(STYLES)} {rng.choice(EXTRAS)}",
+        ))
+        if len(batch) == 20_000:
+            FoodListing.objects.bulk_create(batch)
+            batch = []
+    FoodListing.objects.bulk_create(batch)
+    # bulk_create skips signals, so index the rows in one pass
+    search.rebuild(Vendor, FoodListing)
+
+
+def legacy(query):
+    foods = FoodListing.objects.filter(Q(name__icontains=query) | Q(description__icontains=query)).distinct()
+    return list(foods)
+
+
+def main():
+    populate(random.Random(7))
+    print(f"{FOODS} food listings, {VENDORS} vendors")
+    for query in QUERIES:
+        samples = timed(lambda: (search.search_vendors(Vendor.objects.all(), query, 21),
+                                 search.search_foods(FoodListing.objects.all(), query, 21)), REPEAT)
+        print(f"fts5     {query!r:16} {summarize(samples)}")
+    for query in QUERIES[:3]:
+        samples = timed(lambda: legacy(query), 3)
+        print(f"icontains {query!r:15} {summarize(samples)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,33 @@
+"""
+Delivery-partner assignment for customer orders.
+
+``Order.assigned_partner`` is the authoritative, indexed link from an order
+to its rider; ``Order.delivery_partner`` (JSON) is kept as the display
+snapshot the tracking endpoint returns. Assign, reassign or unassign by
+setting the foreign key and saving, from any code path or the admin:
+
+    order.assigned_partner = rider   # or None to unassign
+    order.save(update_fields=['assigned_partner'])
+
+The Order signals (customer_app.signals) keep the two in step and record an
+``OrderAssignment`` row for every assignment and status change:
+
+* setting ``assigned_partner`` refreshes the snapshot;
+* writers that still only set ``delivery_partner['id']`` get the foreign key
+  resolved from it, even with ``update_fields=['delivery_partner']``.
+"""
+import uuid
+
+
+def partner_snapshot(partner):
+    return {'id': str(partner.id), 'name': partner.name, 'phone': partner.phone_number}
+
+
+def snapshot_partner_id(snapshot):
+    """The DeliveryUser id (as a UUID) in a delivery_partner JSON value, or None."""
+    if not isinstance(snapshot, dict) or not snapshot.get('id'):
+        return None
+    try:
+        return uuid.UUID(str(snapshot['id']))
+    except ValueError:
+        return None
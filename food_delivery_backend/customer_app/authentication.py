@@ -1,95 +1,129 @@
+import copy
+import time
+import logging
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+import jwt
+from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from django.conf import settings
-import jwt
+
 from accounts.models import Account
-from datetime import timedelta, datetime, timezone # Import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+class PrincipalCache:
+    """
+    Small per-process LRU of resolved principals with a short TTL, keyed by
+    (user_id, token version). The process that saves an Account drops its
+    entries at once (customer_app.signals); every other process keeps
+    serving them for up to ``ttl`` seconds. So after a deactivation or a
+    ``token_version`` bump, a token that was already cached elsewhere keeps
+    working for up to a minute.
+
+    Each caller gets its own shallow copy of the cached principal, so what one
+    request sets on ``request.user`` doesn't leak into another's.
+    """
+
+    def __init__(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            self._entries.move_to_end(key)  # Evict the least recently used, not the oldest
+            return copy.copy(entry[0])
+
+    def put(self, key, principal):
+        with self._lock:
+            self._entries[key] = (copy.copy(principal), time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def forget(self, user_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+customer_principals = PrincipalCache(ttl=60, max_size=10_000)
+
+
+def _jwt_options():
+    jwt_settings = settings.SIMPLE_JWT
+    return {
+        'key': jwt_settings.get('SIGNING_KEY') or settings.SECRET_KEY,
+        'algorithms': [jwt_settings.get('ALGORITHM', 'HS256')],
+        'leeway': jwt_settings.get('LEEWAY', timedelta(seconds=0)),
+        'user_id_claim': jwt_settings.get('USER_ID_CLAIM', 'user_id'),
+    }
+
 
 class CustomerJWTAuthentication(BaseAuthentication):
     """
     Custom JWT Authentication for Customer using user_id claim.
+
+    The token is decoded once and the Account comes from ``customer_principals``,
+    so a steady stream of requests from one customer costs no queries. The
+    request body is never touched.
     """
-    def authenticate(self, request):
-        print(request.data)
-        print("[DEBUG] CustomerJWTAuthentication attempting authentication...") # Added
-        auth_header = request.headers.get('Authorization')
+    def __init__(self):
+        # DRF builds authenticators per request, so settings changes are picked up
+        self._options = _jwt_options()
 
+    def authenticate(self, request):
+        auth_header = request.META.get('HTTP_AUTHORIZATION')
         if not auth_header:
-            print("[DEBUG] No Authorization header found.") # Added
             return None  # No token provided
 
-        try:
-            # Expecting "Bearer <token>"
-            auth_type, token = auth_header.split(' ')
-            if auth_type.lower() != 'bearer':
-                print(f"[DEBUG] Invalid auth_type: {auth_type}") # Added
-                raise AuthenticationFailed('Invalid token header. No credentials provided.')
-            print(f"[DEBUG] Received token: {token[:10]}...{token[-10:]}") # Added - Log part of token
-        except ValueError:
-            print("[DEBUG] Invalid token header format (ValueError).") # Added
+        auth_type, _, token = auth_header.partition(' ')
+        if auth_type.lower() != 'bearer' or not token:
             raise AuthenticationFailed('Invalid token header format.')
-        except Exception as e:
-            print(f"[DEBUG] Error processing token header: {e}") # Added
-            raise AuthenticationFailed('Error processing token header.')
 
+        options = self._options
         try:
-            # Get leeway from settings
-            leeway_setting = settings.SIMPLE_JWT.get('LEEWAY', timedelta(seconds=0))
-            print(f"[DEBUG] Using leeway: {leeway_setting}") # Added
-
-            # Decode the token using the secret key and leeway
-            print("[DEBUG] Attempting jwt.decode...") # Added
-            payload = jwt.decode(
-                token,
-                settings.SECRET_KEY,
-                algorithms=settings.SIMPLE_JWT.get('ALGORITHM', "HS256"), # Use algorithm from settings
-                leeway=leeway_setting # Pass leeway here
-            )
-            print(f"[DEBUG] Token decoded successfully. Payload: {payload}") # Added
-
-            # Get user_id and user_type from the payload
-            user_id = payload.get(settings.SIMPLE_JWT.get('USER_ID_CLAIM', 'user_id')) # Use claim from settings
-            user_type = payload.get('user_type')
-            if not user_id or user_type != 'customer':
-                print("[DEBUG] Invalid token or user type.") # Added
-                raise AuthenticationFailed('Invalid token or user type.')
-            print(f"[DEBUG] Found user_id in token: {user_id}") # Added
-
-            # Fetch the user from the database
-            try:
-                user = Account.objects.get(id=user_id, user_type='customer')
-            except Account.DoesNotExist:
-                print(f"[DEBUG] Account with user_id {user_id} not found in DB.") # Added
-                raise AuthenticationFailed('No such customer account.')
-            print(f"[DEBUG] Account found: {user}") # Added
-
-            print(f"[DEBUG] Authentication successful for user {user_id}.") # Added
-            return (user, token)
-
+            payload = jwt.decode(token, options['key'], algorithms=options['algorithms'], leeway=options['leeway'])
         except jwt.ExpiredSignatureError:
-            print("[DEBUG] jwt.ExpiredSignatureError caught!") # Added
-            # Log current time vs expiry
-            try:
-                unverified_payload = jwt.decode(token, options={"verify_signature": False, "verify_exp": False}) # Decode without verification to get claims
-                exp_timestamp = unverified_payload.get('exp')
-                current_utc_time = datetime.now(timezone.utc)
-                current_timestamp = int(current_utc_time.timestamp())
-                print(f"[DEBUG] Token 'exp': {exp_timestamp} ({datetime.fromtimestamp(exp_timestamp, timezone.utc) if exp_timestamp else 'N/A'}) UTC")
-                print(f"[DEBUG] Current UTC time: {current_timestamp} ({current_utc_time}) UTC")
-                print(f"[DEBUG] Difference (current - exp): {current_timestamp - exp_timestamp if exp_timestamp else 'N/A'} seconds")
-                print(f"[DEBUG] Leeway applied: {leeway_setting.total_seconds()} seconds")
-            except Exception as e_inner:
-                print(f"[DEBUG] Could not decode token to check expiry details: {e_inner}")
             raise AuthenticationFailed('Token has expired.')
-        except jwt.DecodeError as e:
-            print(f"[DEBUG] jwt.DecodeError caught: {e}") # Added
-            raise AuthenticationFailed('Error decoding token.')
         except jwt.InvalidTokenError as e:
-            print(f"[DEBUG] jwt.InvalidTokenError caught: {e}") # Added
+            logger.debug(f"Rejected customer token: {e}")
             raise AuthenticationFailed('Invalid token.')
-        except Exception as e:
-            print(f"[DEBUG] Unexpected authentication error: {e}") # Log the error e for debugging
-            raise AuthenticationFailed('Could not authenticate user.')
+
+        user_id = payload.get(options['user_id_claim'])
+        if not user_id or payload.get('user_type') != 'customer':
+            raise AuthenticationFailed('Invalid token or user type.')
+
+        key = (user_id, payload.get('ver', 0))
+        user = customer_principals.get(key)
+        if user is None:
+            user = self._load(user_id, key[1])
+            customer_principals.put(key, user)
+        return (user, token)
+
+    def _load(self, user_id, version):
+        try:
+            user = Account.objects.get(id=user_id, user_type='customer')
+        except Account.DoesNotExist:
+            logger.info(f"Customer token for unknown account {user_id}")
+            raise AuthenticationFailed('No such customer account.')
+        if not user.is_active:
+            raise AuthenticationFailed('This account is inactive.')
+        if user.token_version != version:
+            raise AuthenticationFailed('Token has been revoked.')
+        return user
 
     def authenticate_header(self, request):
         """
@@ -0,0 +1,281 @@
+"""
+In-memory typeahead index for ``/customer/api/autocomplete/``.
+
+Every worker keeps restaurant names, dish names and categories in a sorted
+array of keys (one key per word position, so "bir" finds "Chicken Biryani"),
+with a segment tree over the entry weights. A prefix maps to a contiguous
+key range via binary search, and the k heaviest entries in that range are
+pulled from the tree in O(k log n), independent of how many keys match.
+
+Weights are popularity: orders for restaurants (plus rating), units ordered
+and number of listings for dishes, available listings for categories.
+
+The index is built from the database on first use. Afterwards it is
+refreshed in a background thread at most every REFRESH_INTERVAL seconds:
+rows whose ``updated_at`` moved are applied incrementally, while deletions
+(signalled through a cache version bump) and the periodic popularity
+refresh trigger a full rebuild. Suggestions never wait on the database
+once the first build is done.
+"""
+import re
+import bisect
+import heapq
+import threading
+import time
+import logging
+
+import numpy as np
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+KIND_RESTAURANT = 'restaurant'
+KIND_DISH = 'dish'
+KIND_CATEGORY = 'category'
+
+VERSION_CACHE_KEY = 'autocomplete_version'
+REFRESH_INTERVAL = 30  # seconds between incremental refreshes
+FULL_REBUILD_INTERVAL = 15 * 60  # seconds; picks up new popularity numbers
+MAX_SUGGESTIONS = 20
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text):
+    return ' '.join(WORD_RE.findall((text or '').lower()))
+
+
+def bump_version():
+    """Force a full rebuild in every worker (used when rows are deleted)."""
+    try:
+        if not cache.add(VERSION_CACHE_KEY, 1, timeout=None):
+            cache.incr(VERSION_CACHE_KEY)
+    except Exception as e:
+        logger.warning(f"Could not bump autocomplete version: {e}")
+
+
+class _Compiled:
+    """Immutable sorted-key arrays plus an argmax segment tree over weights."""
+
+    def __init__(self, entries):
+        keyed = []
+        for entry_id, (text, _kind, _ref, _weight) in enumerate(entries):
+            words = normalize(text).split()
+            for i in range(len(words)):
+                keyed.append((' '.join(words[i:]), entry_id))
+        keyed.sort()
+        self.entries = entries
+        self.keys = [key for key, _ in keyed]
+        self.entry_ids = np.array([entry_id for _, entry_id in keyed], dtype=np.int32)
+        weights = np.array([entries[i][3] for i in self.entry_ids], dtype=np.float64) if keyed else np.empty(0)
+        self.weights = weights
+
+        size = 1
+        while size < max(1, len(keyed)):
+            size *= 2
+        self.size = size
+        # tree[node] = index of the heaviest key under node; -1 for padding
+        tree = np.full(2 * size, -1, dtype=np.int64)
+        tree[size:size + len(keyed)] = np.arange(len(keyed))
+        padded = np.append(weights, -np.inf)  # tree value -1 reads -inf
+        level = size // 2
+        while level >= 1:  # Fill one tree level at a time
+            nodes = np.arange(level, 2 * level)
+            left, right = tree[2 * nodes], tree[2 * nodes + 1]
+            tree[nodes] = np.where(padded[left] >= padded[right], left, right)
+            level //= 2
+        self.tree = tree
+        self._padded = padded
+
+    def _argmax(self, lo, hi):
+        """Index of the heaviest key in [lo, hi), or -1."""
+        best = -1
+        padded, tree = self._padded, self.tree
+        lo += self.size
+        hi += self.size
+        while lo < hi:
+            if lo & 1:
+                if padded[tree[lo]] > padded[best]:
+                    best = tree[lo]
+                lo += 1
+            if hi & 1:
+                hi -= 1
+                if padded[tree[hi]] > padded[best]:
+                    best = tree[hi]
+            lo >>= 1
+            hi >>= 1
+        return int(best)
+
+    def top(self, prefix, limit):
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + '\uffff', lo)
+        results, seen = [], set()
+        heap = []
+
+        def push(a, b):
+            if a < b:
+                i = self._argmax(a, b)
+                if i >= 0:
+                    heapq.heappush(heap, (-self.weights[i], i, a, b))
+
+        push(lo, hi)
+        while heap and len(results) < limit:
+            _, i, a, b = heapq.heappop(heap)
+            entry_id = int(self.entry_ids[i])
+            if entry_id not in seen:  # An entry can match through several of its words
+                seen.add(entry_id)
+                results.append(self.entries[entry_id])
+            push(a, i)
+            push(i + 1, b)
+        return results
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._compiled = None
+        self._version = None
+        self._built_at = 0.0
+        self._checked_at = 0.0
+        self._synced_at = None  # DB time of the last snapshot/delta
+        self._refreshing = False
+        # Source data for incremental updates
+        self._restaurants = {}  # vendor pk -> (name, vendor_id, rating, orders)
+        self._foods = {}  # food pk -> (dish key, display name, category key, category name)
+        self._units = {}  # dish key -> units ordered (from the last full build)
+
+    # --- building ---
+    def _current_version(self):
+        try:
+            return cache.get(VERSION_CACHE_KEY, 0)
+        except Exception as e:
+            logger.warning(f"Could not read autocomplete version: {e}")
+            return self._version
+
+    def _restaurant_row(self, vendor_pk, name, vendor_id, rating, orders):
+        self._restaurants[vendor_pk] = (name, vendor_id, float(rating or 0), orders or 0)
+
+    def _food_row(self, food_pk, name, category):
+        self._foods[food_pk] = (normalize(name), name, normalize(category), category)
+
+    def _full_build(self, version):
+        from auth_app.models import Vendor, FoodListing  # Avoid import cycles at module load
+        from .models import OrderItem
+
+        started = timezone.now()
+        self._restaurants, self._foods = {}, {}
+        vendors = (
+            Vendor.objects.filter(is_active=True)
+            .annotate(order_count=Count('order'))  # customer_app.Order
+            .values_list('pk', 'restaurant_name', 'vendor_id', 'rating', 'order_count')
+        )
+        for row in vendors.iterator(chunk_size=5000):
+            self._restaurant_row(*row)
+        foods = FoodListing.objects.filter(is_available=True, vendor__is_active=True).values_list('pk', 'name', 'category')
+        for row in foods.iterator(chunk_size=5000):
+            self._food_row(*row)
+        units = OrderItem.objects.values_list('food__name').annotate(units=Sum('quantity'))
+        self._units = {}
+        for name, total in units.iterator(chunk_size=5000):
+            key = normalize(name)
+            self._units[key] = self._units.get(key, 0) + (total or 0)
+
+        self._compile()
+        self._version = version
+        self._built_at = time.monotonic()
+        self._synced_at = started
+        logger.info(f"Built autocomplete index: {len(self._restaurants)} restaurants, {len(self._foods)} food listings")
+
+    def _apply_delta(self):
+        """Apply Vendor/FoodListing rows changed since the last sync."""
+        from auth_app.models import Vendor, FoodListing
+
+        started = timezone.now()
+        since = self._synced_at
+        changed = 0
+        vendors = Vendor.objects.filter(updated_at__gte=since).values_list('pk', 'restaurant_name', 'vendor_id', 'rating', 'is_active')
+        for pk, name, vendor_id, rating, is_active in vendors:
+            changed += 1
+            if is_active:
+                orders = self._restaurants[pk][3] if pk in self._restaurants else 0
+                self._restaurant_row(pk, name, vendor_id, rating, orders)
+            else:
+                self._restaurants.pop(pk, None)
+        foods = FoodListing.objects.filter(updated_at__gte=since).values_list('pk', 'name', 'category', 'is_available')
+        for pk, name, category, is_available in foods:
+            changed += 1
+            if is_available:
+                self._food_row(pk, name, category)
+            else:
+                self._foods.pop(pk, None)
+        if changed:
+            self._compile()
+            logger.info(f"Applied {changed} autocomplete updates")
+        self._synced_at = started
+
+    def _compile(self):
+        entries = [
+            (name, KIND_RESTAURANT, vendor_id, float(orders) + rating)
+            for name, vendor_id, rating, orders in self._restaurants.values() if name
+        ]
+        dishes, categories = {}, {}
+        for dish_key, dish_name, category_key, category_name in self._foods.values():
+            if dish_key:
+                entry = dishes.setdefault(dish_key, [dish_name, 0])
+                entry[1] += 1  # Listed by another vendor
+            if category_key:
+                entry = categories.setdefault(category_key, [category_name, 0])
+                entry[1] += 1
+        entries.extend(
+            (name, KIND_DISH, None, float(listings + self._units.get(key, 0)))
+            for key, (name, listings) in dishes.items()
+        )
+        entries.extend((name, KIND_CATEGORY, None, float(listings)) for name, listings in categories.values())
+        self._compiled = _Compiled(entries)
+
+    def _refresh(self):
+        try:
+            version = self._current_version()
+            with self._lock:
+                if version != self._version or time.monotonic() - self._built_at > FULL_REBUILD_INTERVAL:
+                    self._full_build(version)
+                else:
+                    self._apply_delta()
+        except Exception as e:
+            logger.error(f"Autocomplete refresh failed: {e}")
+        finally:
+            self._refreshing = False
+            close_old_connections()
+
+    def ensure_fresh(self):
+        if self._compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    self._full_build(self._current_version())
+                    self._checked_at = time.monotonic()
+            return
+        now = time.monotonic()
+        if now - self._checked_at < REFRESH_INTERVAL or self._refreshing:
+            return
+        self._checked_at = now
+        self._refreshing = True
+        threading.Thread(target=self._refresh, name='autocomplete-refresh', daemon=True).start()
+
+    def invalidate(self):
+        with self._lock:
+            self._compiled = None
+
+    # --- queries ---
+    def suggest(self, text, limit=10):
+        """Return up to ``limit`` (text, kind, ref, weight) tuples, heaviest first."""
+        prefix = normalize(text)
+        if not prefix:
+            return []
+        self.ensure_fresh()
+        return self._compiled.top(prefix, min(limit, MAX_SUGGESTIONS))
+
+
+autocomplete_index = AutocompleteIndex()
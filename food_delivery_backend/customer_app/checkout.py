@@ -0,0 +1,77 @@
+"""
+Checkout helpers for PlaceOrderView.
+
+``validate_order_items`` resolves every line item of an order with a single
+``id__in`` query and checks them in memory, so checkout costs the same number
+of queries for 1 item or 50, and the client learns about every problem item
+in one response instead of one at a time.
+"""
+import logging
+from collections import namedtuple
+
+from auth_app.models import FoodListing
+
+logger = logging.getLogger(__name__)
+
+OrderLine = namedtuple('OrderLine', ['food', 'quantity'])
+
+# Reasons reported per problem item
+INVALID = 'invalid'
+NOT_FOUND = 'not_found'
+WRONG_VENDOR = 'wrong_vendor'
+UNAVAILABLE = 'unavailable'
+
+
+def _problem(food_id, reason, message, name=None):
+    problem = {'food_id': food_id, 'reason': reason, 'message': message}
+    if name:
+        problem['name'] = name
+    return problem
+
+
+def validate_order_items(items_data, vendor):
+    """
+    Return ``(lines, problems)`` for the ``items`` of an order payload.
+
+    Client-sent prices are ignored; ``customer_app.pricing`` prices the
+    returned lines from ``FoodListing.price``.
+
+    ``lines`` is a list of OrderLine for the valid items; ``problems`` lists
+    one dict (food_id, reason, message[, name]) per rejected item. Callers
+    should refuse the order if ``problems`` is non-empty.
+    """
+    problems = []
+    parsed = []  # (food_id, quantity)
+    for item_data in items_data:
+        food_id = item_data.get('food_id')
+        quantity = item_data.get('quantity')
+
+        # Convert quantity to int if it's a string
+        if isinstance(quantity, str):
+            try:
+                quantity = int(quantity)
+            except ValueError:
+                problems.append(_problem(food_id, INVALID, f"Invalid quantity value: {quantity}"))
+                continue
+        try:
+            food_pk = int(food_id)
+        except (TypeError, ValueError):
+            food_pk = None
+        if food_pk is None or not isinstance(quantity, int) or quantity <= 0:
+            problems.append(_problem(food_id, INVALID, "Each item must have food_id and positive integer quantity."))
+            continue
+        parsed.append((food_pk, quantity))
+
+    foods = FoodListing.objects.in_bulk({food_pk for food_pk, _ in parsed})
+    lines = []
+    for food_pk, quantity in parsed:
+        food = foods.get(food_pk)
+        if food is None:
+            problems.append(_problem(food_pk, NOT_FOUND, f"Food item with id {food_pk} not found."))
+        elif food.vendor_id != vendor.id:
+            problems.append(_problem(food_pk, WRONG_VENDOR, f"Food item with id {food_pk} not found for this vendor.", food.name))
+        elif not food.is_available:
+            problems.append(_problem(food_pk, UNAVAILABLE, f"{food.name} is unavailable.", food.name))
+        else:
+            lines.append(OrderLine(food, quantity))
+    return lines, problems
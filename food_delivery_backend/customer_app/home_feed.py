@@ -0,0 +1,105 @@
+"""
+Cached, versioned fragments for the customer home feed.
+
+The sections of ``HomeDataView`` that don't depend on the customer's location
+(banners, categories, popular foods, top-rated restaurants) are serialized
+once into a fragment stored in the default cache under the current feed
+version. Saving or deleting a Banner, FoodCategory, FoodListing or Vendor
+bumps the version (see ``customer_app.signals``), so the next request builds
+a fresh fragment; old ones simply expire.
+"""
+import hashlib
+import json
+import threading
+import logging
+
+from django.core.cache import cache
+
+from auth_app.models import Vendor, FoodListing
+from .models import Banner, FoodCategory
+from .serializers import BannerSerializer, FoodCategorySerializer, FoodListingSerializer, VendorSerializer
+
+logger = logging.getLogger(__name__)
+
+FEED_VERSION_KEY = 'home_feed_version'
+FRAGMENT_TTL = 60 * 60  # 1 hour; versions make explicit invalidation unnecessary
+TOP_RATED_LIMIT = 10
+POPULAR_FOODS_LIMIT = 10
+
+# Per-process copy of the latest fragment, keyed like the cache entry
+_local = {}
+_local_lock = threading.Lock()
+
+
+def bump_feed_version():
+    """Mark cached home-feed fragments as stale in every process."""
+    try:
+        if not cache.add(FEED_VERSION_KEY, 1, timeout=None):
+            cache.incr(FEED_VERSION_KEY)
+    except Exception as e:
+        logger.warning(f"Could not bump home feed version: {e}")
+
+
+def digest(data):
+    """Stable short hash of JSON-serializable data, used for ETags."""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _build(request):
+    context = {'request': request}
+    categories = FoodCategorySerializer(FoodCategory.objects.filter(is_active=True), many=True, context=context).data
+    sections = {
+        'banners': BannerSerializer(Banner.objects.filter(is_active=True), many=True, context=context).data,
+        'categories': categories,
+        'food_categories': categories,
+        'popular_foods': FoodListingSerializer(
+            FoodListing.objects.filter(is_available=True).select_related('vendor').order_by('-created_at')[:POPULAR_FOODS_LIMIT],
+            many=True,
+            context=context
+        ).data,
+        'top_rated_restaurants': VendorSerializer(
+            Vendor.objects.filter(is_active=True).order_by('-rating')[:TOP_RATED_LIMIT],
+            many=True,
+            context=context
+        ).data,
+    }
+    # ReturnList -> plain lists so the fragment pickles cleanly
+    sections = {name: [dict(item) for item in items] for name, items in sections.items()}
+    return {'sections': sections, 'digest': digest(sections)}
+
+
+def static_sections(request):
+    """
+    Return ``(sections, digest)`` for the location-independent part of the
+    home feed, building and caching it on a miss.
+    """
+    try:
+        version = cache.get(FEED_VERSION_KEY, 0)
+    except Exception as e:
+        logger.warning(f"Could not read home feed version: {e}")
+        version = None
+    # Image URLs are absolute, so fragments are per scheme and host
+    key = f"home_feed:{version}:{request.scheme}://{request.get_host()}"
+
+    fragment = _local.get(key) if version is not None else None
+    if fragment is None and version is not None:
+        try:
+            fragment = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Could not read home feed fragment: {e}")
+    if fragment is None:
+        fragment = _build(request)
+        if version is not None:
+            try:
+                cache.set(key, fragment, timeout=FRAGMENT_TTL)
+            except Exception as e:
+                logger.warning(f"Could not store home feed fragment: {e}")
+    if version is not None and key not in _local:
+        with _local_lock:
+            # Only the current version is worth keeping
+            prefix = f"home_feed:{version}:"
+            for stale in [k for k in _local if not k.startswith(prefix)]:
+                del _local[stale]
+            _local[key] = fragment
+    return fragment['sections'], fragment['digest']
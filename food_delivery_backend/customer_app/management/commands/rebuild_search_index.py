@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from auth_app.models import Vendor, FoodListing
+from customer_app import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search tables used by SearchView from the Vendor and FoodListing tables."
+
+    def handle(self, *args, **options):
+        if not search.fts_enabled():
+            raise CommandError(f"Full-text search needs SQLite FTS5; the '{connection.vendor}' backend uses icontains.")
+        with connection.cursor() as cursor:
+            for statement in search.create_tables_sql():
+                cursor.execute(statement)
+        with transaction.atomic():
+            vendors, foods = search.rebuild(Vendor, FoodListing)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {vendors} vendors and {foods} food listings"))
@@ -0,0 +1,50 @@
+from django.db import migrations
+
+# Copied from customer_app.search as it was when this migration was written,
+# so later changes to that module can't change what this migration does.
+VENDOR_TABLE = 'customer_search_vendor'
+FOOD_TABLE = 'customer_search_food'
+VENDOR_COLUMNS = ['restaurant_name', 'cuisine_type', 'address']
+FOOD_COLUMNS = ['name', 'category', 'description']
+TOKENIZER = "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3'"
+BATCH_SIZE = 2000
+
+
+def create_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, columns, model in (
+        (VENDOR_TABLE, VENDOR_COLUMNS, apps.get_model('auth_app', 'Vendor')),
+        (FOOD_TABLE, FOOD_COLUMNS, apps.get_model('auth_app', 'FoodListing')),
+    ):
+        schema_editor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({', '.join(columns)}, {TOKENIZER})")
+        sql = f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES ({', '.join(['%s'] * (len(columns) + 1))})"
+        rows = model.objects.values_list('pk', *columns).iterator(chunk_size=BATCH_SIZE)
+        with schema_editor.connection.cursor() as cursor:
+            batch = []
+            for row in rows:
+                batch.append([row[0], *(value or '' for value in row[1:])])
+                if len(batch) >= BATCH_SIZE:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+
+
+def drop_search_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f"DROP TABLE IF EXISTS {VENDOR_TABLE}")
+    schema_editor.execute(f"DROP TABLE IF EXISTS {FOOD_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_app', '0004_alter_cart_customer_alter_order_customer_and_more'),
+        ('auth_app', '0013_vendor_open_schedule'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+    ]
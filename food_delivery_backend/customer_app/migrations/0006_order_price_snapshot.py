@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:17
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations, models
+
+# Copied from customer_app.pricing as it was when this migration was written,
+# so later changes to that module can't change what this migration does.
+CENT = Decimal('0.01')
+
+
+def money(value):
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value or 0))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def backfill_order(order, OrderItem):
+    """Fill the snapshot columns and breakdown of an order; its recorded total_amount is kept as-is."""
+    items = list(OrderItem.objects.filter(order=order).select_related('food').order_by('id'))
+    for item in items:
+        item.line_total = money(item.price * item.quantity)
+        item.food_name = item.food.name or ''
+        images = item.food.images or []
+        item.food_image = images[0] if images else ''
+    OrderItem.objects.bulk_update(items, ['line_total', 'food_name', 'food_image'])
+    order.items_total = money(sum((item.line_total for item in items), Decimal('0')))
+    order.price_breakdown = {
+        'subtotal': float(order.items_total),
+        'delivery_fee': float(order.delivery_fee or 0),
+        'tax': float(order.tax),
+        'total': float(order.total_amount),
+        'items': [
+            {
+                'id': item.id,
+                'food_id': item.food_id,
+                'name': item.food_name,
+                'quantity': item.quantity,
+                'price': float(item.price),
+                'line_total': float(item.line_total),
+                'image': item.food_image or None,
+            }
+            for item in items
+        ],
+    }
+    order.save(update_fields=['items_total', 'price_breakdown'])
+
+
+def backfill_price_snapshots(apps, schema_editor):
+    Order = apps.get_model('customer_app', 'Order')
+    OrderItem = apps.get_model('customer_app', 'OrderItem')
+    for order in Order.objects.filter(price_breakdown__isnull=True).iterator():
+        backfill_order(order, OrderItem)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_app', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='items_total',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='price_breakdown',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='tax',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='food_image',
+            field=models.CharField(blank=True, default='', max_length=500),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='food_name',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='orderitem',
+            name='line_total',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_price_snapshots, migrations.RunPython.noop),
+    ]
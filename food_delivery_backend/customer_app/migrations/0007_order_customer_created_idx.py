@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_account_token_version'),
+        ('auth_app', '0015_hot_query_indexes'),
+        ('customer_app', '0006_order_price_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', '-created_at'], name='customer_order_created_idx'),
+        ),
+    ]
@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:44
+
+import uuid
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+BACKFILL_BATCH_SIZE = 2000
+
+
+def snapshot_partner_id(snapshot):
+    if not isinstance(snapshot, dict) or not snapshot.get('id'):
+        return None
+    try:
+        return uuid.UUID(str(snapshot['id']))
+    except ValueError:
+        return None
+
+
+def link_assigned_partners(apps, schema_editor):
+    """
+    Point orders assigned through the JSON field at their DeliveryUser and
+    record one 'assigned' history row each, dated at the order. Snapshots
+    naming unknown partners are left alone.
+    """
+    Order = apps.get_model('customer_app', 'Order')
+    DeliveryUser = apps.get_model('delivery_auth', 'DeliveryUser')
+    OrderAssignment = apps.get_model('customer_app', 'OrderAssignment')
+    orders = Order.objects.filter(delivery_partner__isnull=False, assigned_partner__isnull=True)
+    orders = orders.only('pk', 'delivery_partner', 'status', 'created_at').order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(orders.filter(pk__gt=last_pk)[:BACKFILL_BATCH_SIZE])
+        if not batch:
+            return
+        last_pk = batch[-1].pk
+        wanted = {order.pk: snapshot_partner_id(order.delivery_partner) for order in batch}
+        known = set(DeliveryUser.objects.filter(id__in={pk for pk in wanted.values() if pk}).values_list('id', flat=True))
+        linked = [order for order in batch if wanted[order.pk] in known]
+        for order in linked:
+            order.assigned_partner_id = wanted[order.pk]
+        Order.objects.bulk_update(linked, ['assigned_partner'])
+        OrderAssignment.objects.bulk_create([
+            OrderAssignment(order_id=order.pk, partner_id=order.assigned_partner_id, action='assigned',
+                            status=order.status, created_at=order.created_at)
+            for order in linked
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_account_token_version'),
+        ('auth_app', '0015_hot_query_indexes'),
+        ('customer_app', '0007_order_customer_created_idx'),
+        ('delivery_auth', '0002_remove_deliveryuser_otp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('assigned', 'Partner assigned'), ('unassigned', 'Partner unassigned'), ('status', 'Status changed')], max_length=20)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='assigned_partner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_orders', to='delivery_auth.deliveryuser'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['assigned_partner', '-created_at'], name='partner_order_created_idx'),
+        ),
+        migrations.AddField(
+            model_name='orderassignment',
+            name='order',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='customer_app.order'),
+        ),
+        migrations.AddField(
+            model_name='orderassignment',
+            name='partner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assignment_history', to='delivery_auth.deliveryuser'),
+        ),
+        migrations.AddIndex(
+            model_name='orderassignment',
+            index=models.Index(fields=['order', 'created_at'], name='order_assignment_idx'),
+        ),
+        migrations.RunPython(link_assigned_partners, migrations.RunPython.noop),
+    ]
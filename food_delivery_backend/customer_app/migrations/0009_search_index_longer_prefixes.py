@@ -0,0 +1,53 @@
+from django.db import migrations
+
+# Copied from customer_app.search as it was when this migration was written,
+# so later changes to that module can't change what this migration does.
+VENDOR_TABLE = 'customer_search_vendor'
+FOOD_TABLE = 'customer_search_food'
+VENDOR_COLUMNS = ['restaurant_name', 'cuisine_type', 'address']
+FOOD_COLUMNS = ['name', 'category', 'description']
+TOKENIZER = "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3 4 5 6'"
+PREVIOUS_TOKENIZER = "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3'"
+BATCH_SIZE = 2000
+
+
+def recreate_search_tables(apps, schema_editor, tokenizer):
+    """FTS5 prefix indexes can't be altered: drop the tables and repopulate them."""
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for table, columns, model in (
+        (VENDOR_TABLE, VENDOR_COLUMNS, apps.get_model('auth_app', 'Vendor')),
+        (FOOD_TABLE, FOOD_COLUMNS, apps.get_model('auth_app', 'FoodListing')),
+    ):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {table}")
+        schema_editor.execute(f"CREATE VIRTUAL TABLE {table} USING fts5({', '.join(columns)}, {tokenizer})")
+        sql = f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES ({', '.join(['%s'] * (len(columns) + 1))})"
+        rows = model.objects.values_list('pk', *columns).iterator(chunk_size=BATCH_SIZE)
+        with schema_editor.connection.cursor() as cursor:
+            batch = []
+            for row in rows:
+                batch.append([row[0], *(value or '' for value in row[1:])])
+                if len(batch) >= BATCH_SIZE:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+
+
+def add_prefixes(apps, schema_editor):
+    recreate_search_tables(apps, schema_editor, TOKENIZER)
+
+
+def remove_prefixes(apps, schema_editor):
+    recreate_search_tables(apps, schema_editor, PREVIOUS_TOKENIZER)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_app', '0008_order_assigned_partner'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_prefixes, remove_prefixes),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 import random
 from auth_app.models import Vendor, FoodListing  # Import Vendor and FoodListing models from auth_app
 from accounts.models import Account, CustomerProfile
@@ -61,23 +62,65 @@ class Order(models.Model):
     delivery_address = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     current_location = models.CharField(max_length=255, null=True, blank=True)
-    delivery_partner = models.JSONField(null=True, blank=True)
+    delivery_partner = models.JSONField(null=True, blank=True)  # Display snapshot; assigned_partner is authoritative
+    assigned_partner = models.ForeignKey('delivery_auth.DeliveryUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_orders')
     estimated_delivery = models.DateTimeField(null=True, blank=True)
     payment_id = models.CharField(max_length=100, null=True, blank=True)
     payment_mode = models.CharField(max_length=10, choices=PAYMENT_MODE_CHOICES, default='COD')
     payment_status = models.CharField(max_length=20, default='pending')
     delivery_fee = models.DecimalField(max_digits=6, decimal_places=2, null=True, blank=True)
+    # Written once at checkout by customer_app.pricing; total_amount is the grand total
+    items_total = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    tax = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    price_breakdown = models.JSONField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # A customer's order history, newest first
+            models.Index(fields=['customer', '-created_at'], name='customer_order_created_idx'),
+            # A rider's orders, newest first (delivery_auth DeliveryOrderListView)
+            models.Index(fields=['assigned_partner', '-created_at'], name='partner_order_created_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.order_number:
             self.order_number = f"ORD{random.randint(10000, 99999)}"
         super().save(*args, **kwargs)
 
+class OrderAssignment(models.Model):
+    """One step of an order's delivery history (see customer_app.assignments)."""
+    ACTION_ASSIGNED = 'assigned'
+    ACTION_UNASSIGNED = 'unassigned'
+    ACTION_STATUS = 'status'
+    ACTION_CHOICES = [
+        (ACTION_ASSIGNED, 'Partner assigned'),
+        (ACTION_UNASSIGNED, 'Partner unassigned'),
+        (ACTION_STATUS, 'Status changed'),
+    ]
+
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='assignments')
+    partner = models.ForeignKey('delivery_auth.DeliveryUser', on_delete=models.SET_NULL, null=True, blank=True, related_name='assignment_history')
+    action = models.CharField(max_length=20, choices=ACTION_CHOICES)
+    status = models.CharField(max_length=20, blank=True)  # Order status after this step
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['order', 'created_at'], name='order_assignment_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.action} {self.partner_id or ''} {self.status}".strip()
+
 class OrderItem(models.Model):
     order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='order_items')
     food = models.ForeignKey(FoodListing, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField()
-    price = models.DecimalField(max_digits=10, decimal_places=2)
+    price = models.DecimalField(max_digits=10, decimal_places=2)  # Unit price at checkout
+    line_total = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    food_name = models.CharField(max_length=255, blank=True, default='')
+    food_image = models.CharField(max_length=500, blank=True, default='')
 
     def __str__(self):
-       return f"{self.quantity} x {self.food.name} for Order {self.order.order_number}"
+       return f"{self.quantity} x {self.food_name or self.food.name} for Order {self.order.order_number}"
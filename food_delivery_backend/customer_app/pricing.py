@@ -0,0 +1,103 @@
+"""
+Order pricing engine.
+
+Checkout prices every line from the authoritative ``FoodListing.price`` in
+``Decimal`` (client-sent prices and totals are never used), snapshots the
+unit price, name and image onto each OrderItem, and stores the finished
+breakdown on the Order row. Order reads (``OrderDetailView``) serve that
+breakdown as-is: no joins back to FoodListing and no arithmetic.
+"""
+import logging
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CENT = Decimal('0.01')
+
+PricedLine = namedtuple('PricedLine', ['food', 'quantity', 'unit_price', 'line_total'])
+OrderPricing = namedtuple('OrderPricing', ['lines', 'items_total', 'delivery_fee', 'tax', 'total'])
+
+
+def money(value):
+    """Decimal rounded to paise; floats go through str() to avoid binary noise."""
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value or 0))
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def tax_rate():
+    return Decimal(str(getattr(settings, 'ORDER_TAX_RATE', '0')))
+
+
+def price_order(order_lines, delivery_fee):
+    """Price checkout ``OrderLine``s (see ``customer_app.checkout``) plus a delivery fee."""
+    lines = []
+    items_total = Decimal('0')
+    for line in order_lines:
+        unit_price = money(line.food.price)
+        line_total = money(unit_price * line.quantity)
+        lines.append(PricedLine(line.food, line.quantity, unit_price, line_total))
+        items_total += line_total
+    items_total = money(items_total)
+    delivery_fee = money(delivery_fee)
+    tax = money(items_total * tax_rate())
+    return OrderPricing(lines, items_total, delivery_fee, tax, money(items_total + delivery_fee + tax))
+
+
+def first_image(food):
+    images = food.images or []
+    return images[0] if images else ''
+
+
+def build_order_items(order, pricing, order_item_model):
+    """Unsaved OrderItems carrying the price/name/image snapshot of each line."""
+    return [
+        order_item_model(
+            order=order, food=line.food, quantity=line.quantity, price=line.unit_price,
+            line_total=line.line_total, food_name=line.food.name or '', food_image=first_image(line.food),
+        )
+        for line in pricing.lines
+    ]
+
+
+def item_breakdown(item):
+    return {
+        'id': item.id,
+        'food_id': item.food_id,
+        'name': item.food_name,
+        'quantity': item.quantity,
+        'price': float(item.price),
+        'line_total': float(item.line_total),
+        'image': item.food_image or None,
+    }
+
+
+def breakdown(order, items):
+    """The JSON cached in ``Order.price_breakdown``; amounts are already rounded."""
+    return {
+        'subtotal': float(order.items_total),
+        'delivery_fee': float(order.delivery_fee or 0),
+        'tax': float(order.tax),
+        'total': float(order.total_amount),
+        'items': [item_breakdown(item) for item in items],
+    }
+
+
+def backfill_order(order, order_item_model):
+    """
+    Fill the snapshot columns and breakdown of an order placed before the
+    engine existed. Its recorded total_amount is kept as-is.
+    """
+    items = list(order_item_model.objects.filter(order=order).select_related('food').order_by('id'))
+    for item in items:
+        item.line_total = money(item.price * item.quantity)
+        item.food_name = item.food.name or ''
+        item.food_image = first_image(item.food)
+    order_item_model.objects.bulk_update(items, ['line_total', 'food_name', 'food_image'])
+    order.items_total = money(sum((item.line_total for item in items), Decimal('0')))
+    order.price_breakdown = breakdown(order, items)
+    order.save(update_fields=['items_total', 'price_breakdown'])
+    return order.price_breakdown
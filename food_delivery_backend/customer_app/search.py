@@ -0,0 +1,165 @@
+"""
+Full-text search over vendors and food listings.
+
+On SQLite the text lives in two FTS5 tables (created by the
+0005_search_index migration), keyed by the model's primary key and kept current from the
+post_save/post_delete signals in ``customer_app.signals``. The last query
+token is prefix-matched for typeahead, so "chicken bir" finds "Chicken
+Biryani", and results are ranked with BM25 (names weigh more than descriptions). Other database
+backends fall back to ``icontains`` filtering.
+
+Ranking is bounded: BM25 scores only the first ``RANK_CANDIDATES`` matches in
+index order, so a broad query like "chi" costs the same however many of the
+listings match. The top results are the best of that window, not of every
+match. Prefix indexes on 1-6 characters keep the typed prefix a single
+posting list rather than a merge over every term it expands to.
+
+Rebuild the tables with ``python manage.py rebuild_search_index``.
+"""
+import re
+import logging
+
+from django.db import connection
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+VENDOR_TABLE = 'customer_search_vendor'
+FOOD_TABLE = 'customer_search_food'
+
+# (column, BM25 weight), in table column order
+VENDOR_COLUMNS = [('restaurant_name', 10.0), ('cuisine_type', 4.0), ('address', 1.0)]
+FOOD_COLUMNS = [('name', 10.0), ('category', 4.0), ('description', 1.0)]
+
+MAX_QUERY_TOKENS = 8
+RANK_CANDIDATES = 500  # Matches scored per query; bounds the cost of broad queries
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_enabled(conn=None):
+    return (conn or connection).vendor == 'sqlite'
+
+
+def create_tables_sql():
+    tokenizer = "tokenize = 'unicode61 remove_diacritics 2', prefix = '1 2 3 4 5 6'"
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {VENDOR_TABLE} USING fts5("
+        f"{', '.join(c for c, _ in VENDOR_COLUMNS)}, {tokenizer})",
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FOOD_TABLE} USING fts5("
+        f"{', '.join(c for c, _ in FOOD_COLUMNS)}, {tokenizer})",
+    ]
+
+
+def drop_tables_sql():
+    return [f"DROP TABLE IF EXISTS {VENDOR_TABLE}", f"DROP TABLE IF EXISTS {FOOD_TABLE}"]
+
+
+def match_expression(text):
+    """
+    Turn free text into an FTS5 query: quoted tokens ANDed, the last one as a
+    prefix (the word still being typed). Prefix-expanding every token would
+    merge far larger posting lists for words that are already complete.
+    """
+    tokens = TOKEN_RE.findall(text.lower())[:MAX_QUERY_TOKENS]
+    if not tokens:
+        return None
+    return ' '.join([f'"{token}"' for token in tokens[:-1]] + [f'"{tokens[-1]}"*'])
+
+
+# --- Index maintenance ---
+def _row(instance, columns):
+    return [getattr(instance, column) or '' for column, _ in columns]
+
+
+def _upsert(cursor, table, columns, pk, values):
+    cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [pk])
+    placeholders = ', '.join(['%s'] * (len(columns) + 1))
+    cursor.execute(
+        f"INSERT INTO {table} (rowid, {', '.join(c for c, _ in columns)}) VALUES ({placeholders})",
+        [pk, *values],
+    )
+
+
+def index_vendor(vendor):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        _upsert(cursor, VENDOR_TABLE, VENDOR_COLUMNS, vendor.pk, _row(vendor, VENDOR_COLUMNS))
+
+
+def index_food(food):
+    if not fts_enabled():
+        return
+    with connection.cursor() as cursor:
+        _upsert(cursor, FOOD_TABLE, FOOD_COLUMNS, food.pk, _row(food, FOOD_COLUMNS))
+
+
+def remove_vendor(pk):
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {VENDOR_TABLE} WHERE rowid = %s", [pk])
+
+
+def remove_food(pk):
+    if fts_enabled():
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FOOD_TABLE} WHERE rowid = %s", [pk])
+
+
+def rebuild(vendor_model, food_model, conn=None, batch_size=2000):
+    """Repopulate both tables from the given models; returns (vendors, foods)."""
+    conn = conn or connection
+    counts = []
+    with conn.cursor() as cursor:
+        for table, columns, model in ((VENDOR_TABLE, VENDOR_COLUMNS, vendor_model), (FOOD_TABLE, FOOD_COLUMNS, food_model)):
+            cursor.execute(f"DELETE FROM {table}")
+            names = [c for c, _ in columns]
+            sql = f"INSERT INTO {table} (rowid, {', '.join(names)}) VALUES ({', '.join(['%s'] * (len(names) + 1))})"
+            batch, total = [], 0
+            for row in model.objects.values_list('pk', *names).iterator(chunk_size=batch_size):
+                batch.append([row[0], *(value or '' for value in row[1:])])
+                if len(batch) >= batch_size:
+                    cursor.executemany(sql, batch)
+                    total += len(batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+                total += len(batch)
+            counts.append(total)
+    return tuple(counts)
+
+
+# --- Queries ---
+def _ranked_ids(table, columns, text, limit, offset):
+    expression = match_expression(text)
+    if not expression:
+        return []
+    weights = ', '.join(str(weight) for _, weight in columns)
+    # Score only a window of matches: the inner LIMIT stops FTS5 walking the
+    # posting lists, and BM25 is computed for those rows alone
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM (SELECT rowid, bm25({table}, {weights}) AS score FROM {table} "
+            f"WHERE {table} MATCH %s LIMIT %s) ORDER BY score, rowid LIMIT %s OFFSET %s",
+            [expression, max(RANK_CANDIDATES, offset + limit), limit, offset],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _ordered(queryset, ids):
+    objects = queryset.in_bulk(ids)
+    return [objects[pk] for pk in ids if pk in objects]
+
+
+def search_vendors(queryset, text, limit, offset=0):
+    """Best-matching vendors of ``queryset``, best first; may be short by filtered rows."""
+    if not fts_enabled():
+        return list(queryset.filter(Q(restaurant_name__icontains=text) | Q(address__icontains=text)).order_by('-rating', 'id')[offset:offset + limit])
+    return _ordered(queryset, _ranked_ids(VENDOR_TABLE, VENDOR_COLUMNS, text, limit, offset))
+
+
+def search_foods(queryset, text, limit, offset=0):
+    """Best-matching food listings of ``queryset``, best first."""
+    if not fts_enabled():
+        return list(queryset.filter(Q(name__icontains=text) | Q(description__icontains=text)).order_by('id')[offset:offset + limit])
+    return _ordered(queryset, _ranked_ids(FOOD_TABLE, FOOD_COLUMNS, text, limit, offset))
@@ -0,0 +1,148 @@
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+import logging
+from auth_app.models import Vendor, FoodListing
+from auth_app import events
+from accounts.models import Account
+from .models import Banner, FoodCategory, Order, OrderAssignment
+from delivery_auth.models import DeliveryUser
+from .home_feed import bump_feed_version
+from . import search
+from . import autocomplete
+from .authentication import customer_principals
+from .assignments import partner_snapshot, snapshot_partner_id
+
+logger = logging.getLogger(__name__)
+
+
+# Every model rendered in the cached home-feed fragment
+@receiver([post_save, post_delete], sender=Banner)
+@receiver([post_save, post_delete], sender=FoodCategory)
+@receiver([post_save, post_delete], sender=FoodListing)
+@receiver([post_save, post_delete], sender=Vendor)
+def home_feed_source_changed(sender, **kwargs):
+    bump_feed_version()
+
+
+# Keep the full-text search tables in step (see customer_app.search)
+def _touches(update_fields, columns):
+    return update_fields is None or bool({c for c, _ in columns} & set(update_fields))
+
+
+@receiver(post_save, sender=Vendor)
+def vendor_search_saved(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, search.VENDOR_COLUMNS):
+        search.index_vendor(instance)
+
+
+@receiver(post_delete, sender=Vendor)
+def vendor_search_deleted(sender, instance, **kwargs):
+    search.remove_vendor(instance.pk)
+    autocomplete.bump_version()  # Deletes aren't visible to the updated_at delta
+
+
+@receiver(post_save, sender=FoodListing)
+def food_search_saved(sender, instance, update_fields=None, **kwargs):
+    if _touches(update_fields, search.FOOD_COLUMNS):
+        search.index_food(instance)
+
+
+@receiver(post_delete, sender=FoodListing)
+def food_search_deleted(sender, instance, **kwargs):
+    search.remove_food(instance.pk)
+    autocomplete.bump_version()
+
+
+# Drop this process's cached principal; other workers follow within its TTL
+@receiver([post_save, post_delete], sender=Account)
+def account_changed(sender, instance, **kwargs):
+    customer_principals.forget(instance.id)
+
+
+# Delivery-partner link and history (customer_app.assignments): whoever writes
+# the order, the foreign key and the JSON snapshot are kept in step and every
+# assignment and status change gets an OrderAssignment row.
+@receiver(post_init, sender=Order)
+def order_history_loaded(sender, instance, **kwargs):
+    # __dict__ so deferred fields are never loaded
+    instance._loaded_partner_id = instance.__dict__.get('assigned_partner_id')
+    instance._loaded_status = instance.__dict__.get('status')
+
+
+@receiver(pre_save, sender=Order)
+def order_partner_in_step(sender, instance, update_fields=None, **kwargs):
+    writes_link = update_fields is None or 'assigned_partner' in update_fields
+    writes_snapshot = update_fields is None or 'delivery_partner' in update_fields
+    deferred = {}  # Fields to write after the save, when update_fields leaves them out
+    if writes_link and instance.assigned_partner_id != instance.__dict__.get('_loaded_partner_id'):
+        # The foreign key was set: refresh the snapshot the tracking endpoint shows
+        if snapshot_partner_id(instance.delivery_partner) != instance.assigned_partner_id:
+            partner = instance.assigned_partner
+            instance.delivery_partner = partner_snapshot(partner) if partner else None
+            if not writes_snapshot:
+                deferred['delivery_partner'] = instance.delivery_partner
+    elif writes_snapshot:
+        # Legacy writers set only the JSON: resolve the foreign key from it
+        partner_id = snapshot_partner_id(instance.delivery_partner)
+        if partner_id is None or partner_id == instance.assigned_partner_id:
+            return
+        if not DeliveryUser.objects.filter(id=partner_id).exists():
+            logger.warning(f"Order {instance.order_number} names unknown delivery partner {partner_id}")
+            return
+        instance.assigned_partner_id = partner_id
+        if not writes_link:
+            deferred['assigned_partner_id'] = partner_id
+    if deferred:
+        instance._deferred_partner_fields = deferred
+
+
+@receiver(post_save, sender=Order)
+def order_history_recorded(sender, instance, created, update_fields=None, **kwargs):
+    deferred = instance.__dict__.pop('_deferred_partner_fields', None)
+    if deferred:
+        Order.objects.filter(pk=instance.pk).update(**deferred)
+    written = set(update_fields) if update_fields is not None else None
+    if written is not None and deferred:
+        written |= {'assigned_partner'} if 'assigned_partner_id' in deferred else {'delivery_partner'}
+
+    loaded_partner_id = instance.__dict__.get('_loaded_partner_id')
+    if (written is None or 'assigned_partner' in written) and instance.assigned_partner_id != loaded_partner_id:
+        if instance.assigned_partner_id:
+            OrderAssignment.objects.create(order=instance, partner_id=instance.assigned_partner_id,
+                                           action=OrderAssignment.ACTION_ASSIGNED, status=instance.status)
+        else:
+            OrderAssignment.objects.create(order=instance, partner_id=loaded_partner_id,
+                                           action=OrderAssignment.ACTION_UNASSIGNED, status=instance.status)
+        instance._loaded_partner_id = instance.assigned_partner_id
+    if (written is None or 'status' in written) and instance.status != instance.__dict__.get('_loaded_status'):
+        if not created:
+            OrderAssignment.objects.create(order=instance, partner_id=instance.assigned_partner_id,
+                                           action=OrderAssignment.ACTION_STATUS, status=instance.status)
+        instance._loaded_status = instance.status
+
+
+# Live order events (auth_app.events, auth_app.realtime)
+@receiver(post_init, sender=Order)
+def order_loaded(sender, instance, **kwargs):
+    events.track_status(instance)
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    event = events.status_event(instance, created)
+    if event:
+        channels = [events.vendor_channel(instance.vendor_id), events.customer_channel(instance.customer_id)]
+        if instance.assigned_partner_id:
+            channels.append(events.rider_channel(instance.assigned_partner_id))
+        events.publish_on_commit(channels, events.order_event(event, instance))
+
+
+@receiver(post_save, sender=OrderAssignment)
+def order_assignment_saved(sender, instance, created, **kwargs):
+    # Status rows are published by order_saved
+    if not created or instance.action == OrderAssignment.ACTION_STATUS or not instance.partner_id:
+        return
+    order = instance.order
+    event = 'order.assigned' if instance.action == OrderAssignment.ACTION_ASSIGNED else 'order.unassigned'
+    channels = [events.rider_channel(instance.partner_id), events.customer_channel(order.customer_id)]
+    events.publish_on_commit(channels, events.order_event(event, order))
@@ -1,3 +1,60 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import Account, CustomerProfile
+from auth_app.models import FoodListing, Vendor
+from . import search
+from .authentication import CustomerJWTAuthentication, customer_principals
+from .utils import get_jwt_tokens_for_customer
+
+
+class CustomerJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        customer_principals.clear()
+        self.addCleanup(customer_principals.clear)
+        account = Account.objects.create(email='asha@example.com', user_type='customer')
+        customer = CustomerProfile.objects.create(user=account, phone='9876543210')
+        self.token = get_jwt_tokens_for_customer(customer)['access']
+
+    def authenticate(self):
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f"Bearer {self.token}")
+        return CustomerJWTAuthentication().authenticate(request)[0]
+
+    def test_each_request_gets_its_own_account(self):
+        first = self.authenticate()
+        first.is_active = False
+        with self.assertNumQueries(0):
+            second = self.authenticate()
+        self.assertIsNot(first, second)
+        self.assertTrue(second.is_active)
+
+    def test_signing_key_is_read_per_request(self):
+        self.authenticate()
+        with override_settings(SIMPLE_JWT={'SIGNING_KEY': 'another-signing-key-of-at-least-32-bytes'}):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate()
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.vendor = Vendor.objects.create(
+            restaurant_name='Dosa Corner', address='1 Main Road', contact_number='9000000001', latitude=12.97, longitude=77.59,
+        )
+        for name in ['Masala Dosa', 'Chicken Biryani', 'Gulab Jamun', 'Dosa Masala Combo']:
+            FoodListing.objects.create(vendor=self.vendor, name=name, price=100, description='')
+
+    def names(self, text, **kwargs):
+        return [food.name for food in search.search_foods(FoodListing.objects.all(), text, 10, **kwargs)]
+
+    def test_last_token_is_a_prefix(self):
+        self.assertEqual(self.names('chicken bir'), ['Chicken Biryani'])
+        self.assertEqual(self.names('gulab'), ['Gulab Jamun'])
+        self.assertEqual(self.names('xyzzy'), [])
+
+    def test_pages_past_the_ranking_window(self):
+        with mock.patch.object(search, 'RANK_CANDIDATES', 1):
+            self.assertEqual(len(self.names('dosa')), 2)
+            self.assertEqual(len(self.names('dosa', offset=1)), 1)
@@ -21,6 +21,7 @@ urlpatterns = [
     path('nearby-restaurants/', NearbyRestaurantsView.as_view(), name='nearby-restaurants'),
     path('top-rated-restaurants/', TopRatedRestaurantsView.as_view(), name='top-rated-restaurants'),
     path('search/', SearchView.as_view(), name='search'),
+    path('api/autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
     path('popular-foods/', PopularFoodsView_test.as_view(), name='popular-foods'), # Review if test view is okay
 
     # Vendor / Food Details (use actual ID if that's what frontend gets/sends)
@@ -52,6 +53,7 @@ urlpatterns = [
     path('api/check-delivery/', CheckDeliveryView.as_view(), name='check-delivery'),
 
     # Delivery Fee (Use actual vendor ID)
+    path('api/delivery-fee/batch/', DeliveryFeeBatchView.as_view(), name='delivery-fee-batch'),
     path('api/delivery-fee/<int:vendor_id>/', DeliveryFeeView.as_view(), name='delivery-fee'),
     path('api/details/<str:user_id>/', CustomerDetailsView.as_view(), name='customer-details'),
 ]
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Keyset pagination for the restaurant list on the home feed.
+
+Restaurants are ordered by distance bucket (when a location is given), then
+rating, then id. Each page is read with ``ORDER BY rating DESC, id LIMIT n``
+per bucket, resuming from the cursor of the previous page, so a page costs
+about ``page_size`` rows however many vendors there are.
+"""
+import base64
+import json
+from collections import OrderedDict, namedtuple
+
+from django.db.models import Q
+
+from auth_app.geo import vendor_index, bounding_box
+
+DISTANCE_BUCKET_KM = 1.0
+
+VendorPage = namedtuple('VendorPage', ['vendors', 'total', 'next_cursor'])
+
+
+def encode_cursor(bucket, rating, vendor_id):
+    raw = json.dumps([bucket, rating, vendor_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (bucket, rating, id); raises ValueError for a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        bucket, rating, vendor_id = json.loads(raw)
+        return int(bucket), float(rating), int(vendor_id)
+    except Exception as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+
+def _distance_buckets(latitude, longitude, radius_km):
+    """``{bucket: [vendor ids]}`` from the spatial index, nearest bucket first."""
+    ids, distances = vendor_index.within(latitude, longitude, radius_km)
+    buckets = OrderedDict()
+    for vendor_id, bucket in zip(ids.tolist(), (distances // DISTANCE_BUCKET_KM).astype(int).tolist()):
+        buckets.setdefault(bucket, []).append(vendor_id)
+    return buckets
+
+
+def vendor_page(queryset, page_size, cursor=None, offset=0, latitude=None, longitude=None, radius_km=5,
+                count_from_index=True):
+    """
+    Return a VendorPage of ``queryset``.
+
+    Pass ``cursor`` (from a previous page's ``next_cursor``) for keyset
+    pagination; ``offset`` is still honoured for page-number clients. With a
+    location, only vendors within ``radius_km`` are listed and ``total`` is
+    taken from the spatial index instead of a COUNT; pass
+    ``count_from_index=False`` when ``queryset`` filters beyond is_active.
+    """
+    located = latitude is not None and longitude is not None
+    if located:
+        buckets = _distance_buckets(latitude, longitude, radius_km)
+        total = sum(len(ids) for ids in buckets.values()) if count_from_index else None
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+        # Drop rows that moved since the index was built, as nearby_vendors does
+        queryset = queryset.filter(latitude__range=(min_lat, max_lat), longitude__range=(min_lng, max_lng))
+    else:
+        buckets = OrderedDict([(0, None)])
+        total = None
+
+    after = decode_cursor(cursor) if cursor else None
+    rows = []  # (bucket, vendor)
+    for bucket, ids in buckets.items():
+        if after and bucket < after[0]:
+            continue
+        qs = queryset if ids is None else queryset.filter(id__in=ids)
+        qs = qs.order_by('-rating', 'id')
+        if after and bucket == after[0]:
+            qs = qs.filter(Q(rating__lt=after[1]) | Q(rating=after[1], id__gt=after[2]))
+        elif offset and ids is not None:
+            # Skip whole buckets; their size is known from the index unless filtered
+            size = len(ids) if count_from_index else qs.count()
+            if offset >= size:
+                offset -= size
+                continue
+        need = page_size + 1 - len(rows)  # One extra row tells us if there's a next page
+        rows.extend((bucket, vendor) for vendor in qs[offset:offset + need])
+        offset = 0
+        if len(rows) > page_size:
+            break
+
+    next_cursor = None
+    if len(rows) > page_size:
+        bucket, last = rows[page_size - 1]
+        next_cursor = encode_cursor(bucket, last.rating, last.id)
+    if total is None:
+        if located:  # Count only vendors in range
+            queryset = queryset.filter(id__in=[i for ids in buckets.values() for i in ids])
+        total = queryset.count()
+    return VendorPage([vendor for _, vendor in rows[:page_size]], total, next_cursor)
+
+
+def nearest_vendors(queryset, latitude, longitude, radius_km=5, limit=10):
+    """The ``limit`` vendors of ``queryset`` closest to the point, nearest first."""
+    ids, _ = vendor_index.within(latitude, longitude, radius_km)
+    ids = ids[:limit].tolist()
+    rank = {vendor_id: i for i, vendor_id in enumerate(ids)}
+    return sorted(queryset.filter(id__in=ids), key=lambda vendor: rank[vendor.id])
@@ -11,7 +11,7 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from django.db import transaction
 import traceback
 from rest_framework_simplejwt.tokens import RefreshToken
-from accounts.utils import OTPManager
+from accounts.otp import customer_otp, SENT, THROTTLED, MESSAGES as OTP_MESSAGES
 from django.db.models import Q
 from math import radians, cos, sin, asin, sqrt
 import logging
@@ -20,7 +20,8 @@ import razorpay
 from django.conf import settings
 import time
 from razorpay.errors import SignatureVerificationError, BadRequestError
-from geopy.distance import geodesic
+from auth_app.geo import nearby_vendors
+from auth_app.schedule import minute_of_week
 from auth_app.models import Vendor # Ensure Vendor is imported
 from auth_app.models import FoodListing
 from django.db import IntegrityError
@@ -31,13 +32,20 @@ from auth_app.models import Vendor, FoodListing # Ensure these are imported corr
 import logging
 import traceback # For detailed error logging
 from rest_framework_simplejwt.tokens import RefreshToken # Import for JWT generation
-from geopy.geocoders import Nominatim
+from auth_app.delivery_quotes import quote_vendor, quote_vendors, QuoteUnavailable, is_test_pincode, MAX_BATCH_VENDORS
 import re
-from auth_app.models import Notification
+from auth_app.models import Notification, OutboxMessage
+from auth_app import outbox
 from rest_framework_simplejwt.authentication import JWTAuthentication # If using JWT
 from rest_framework.generics import ListAPIView
 from accounts.models import CustomerProfile # Import CustomerProfile
 from customer_app.utils import get_jwt_tokens_for_customer
+from customer_app import home_feed, vendor_pages, search
+from customer_app.autocomplete import autocomplete_index
+from customer_app.checkout import validate_order_items, NOT_FOUND, WRONG_VENDOR, UNAVAILABLE
+from decimal import InvalidOperation
+from customer_app.pricing import price_order, build_order_items, backfill_order, money, breakdown as pricing_breakdown
+from django.utils.http import parse_etags, quote_etag
 from .serializers import FoodListingSerializer
 from django.utils import timezone
 
@@ -63,12 +71,12 @@ class SendOTP(APIView):
                 )
             
             # Generate OTP
-            otp, error = OTPManager.generate_otp(phone)
-            if error:
-                logger.error(f"OTP generation failed: {error}")
+            otp, outcome = customer_otp.generate(phone)
+            if outcome != SENT:
+                logger.error(f"OTP generation failed: {OTP_MESSAGES[outcome]}")
                 return Response(
-                    {'error': error}, 
-                    status=status.HTTP_400_BAD_REQUEST
+                    {'error': OTP_MESSAGES[outcome]}, 
+                    status=status.HTTP_429_TOO_MANY_REQUESTS if outcome == THROTTLED else status.HTTP_503_SERVICE_UNAVAILABLE
                 )
             
             # Log OTP (remove in production)
@@ -102,7 +110,7 @@ class VerifyOTP(APIView):
             if not all([phone, otp]):
                 return Response({'error': 'Phone and OTP are required'}, status=status.HTTP_400_BAD_REQUEST)
 
-            is_valid, message = OTPManager.verify_otp(phone, otp)
+            is_valid, message = customer_otp.verify(phone, otp)
             if not is_valid:
                 logger.warning(f"OTP verification failed for {phone}: {message}")
                 return Response({'error': message}, status=status.HTTP_400_BAD_REQUEST)
@@ -667,10 +675,11 @@ class HomeDataView(APIView):
     def get(self, request):
         try:
             # --- Pagination params ---
+            # Clients pass ?cursor= from the previous page's next_cursor; ?page= still works
             page = int(request.GET.get('page', 1))
-            page_size = int(request.GET.get('page_size', 10))
-            offset = (page - 1) * page_size
-            limit = offset + page_size
+            page_size = max(1, min(int(request.GET.get('page_size', 10)), 100))
+            cursor = request.GET.get('cursor')
+            offset = 0 if cursor else (page - 1) * page_size
 
             # --- Location filter (optional) ---
             lat = request.GET.get('lat')
@@ -678,61 +687,45 @@ class HomeDataView(APIView):
             location_filter = lat is not None and lng is not None
 
             vendors_qs = Vendor.objects.filter(is_active=True)
+            open_now = request.GET.get('open_now', '').lower() in ('1', 'true')
+            if open_now:
+                vendors_qs = vendors_qs.open_now()
             if location_filter:
                 try:
                     lat = float(lat)
                     lng = float(lng)
                 except (TypeError, ValueError):
                     return Response({'error': 'Invalid latitude or longitude'}, status=status.HTTP_400_BAD_REQUEST)
-                user_location = (lat, lng)
-                # Filter by distance (within 5km)
-                def within_5km(vendor):
-                    if vendor.latitude is None or vendor.longitude is None:
-                        return False
-                    return geodesic(user_location, (vendor.latitude, vendor.longitude)).km <= 5
-                vendors_qs = [v for v in vendors_qs if within_5km(v)]
             else:
-                vendors_qs = list(vendors_qs)
+                lat = lng = None
 
-            # --- Open/Closed status ---
-            now = timezone.now().time()
-            def is_open(vendor):
-                if not vendor.open_hours:
-                    return True # Assume open if not set
-                try:
-                    # Expect format: "09:00-22:00"
-                    open_str, close_str = vendor.open_hours.split('-')
-                    open_time = timezone.datetime.strptime(open_str.strip(), "%H:%M").time()
-                    close_time = timezone.datetime.strptime(close_str.strip(), "%H:%M").time()
-                    if open_time < close_time:
-                        return open_time <= now <= close_time
-                    else: # Overnight
-                        return now >= open_time or now <= close_time
-                except Exception:
-                    return True
+            # Within 5km (when located), ordered by distance bucket, rating, id
+            try:
+                vendor_page = vendor_pages.vendor_page(
+                    vendors_qs, page_size, cursor=cursor, offset=offset, latitude=lat, longitude=lng, radius_km=5,
+                    count_from_index=not open_now
+                )
+            except ValueError:
+                return Response({'error': 'Invalid cursor'}, status=status.HTTP_400_BAD_REQUEST)
+            if location_filter:
+                nearby = vendor_pages.nearest_vendors(vendors_qs, lat, lng, radius_km=5, limit=10)
+            else:
+                nearby = vendors_qs.order_by('id')[:10]
+
+            # --- Open/Closed status (compiled on save, see auth_app.schedule) ---
+            now = minute_of_week()
 
             # Add is_open to each vendor dict
-            paginated_vendors = vendors_qs[offset:limit]
+            paginated_vendors = vendor_page.vendors
             vendor_data = VendorSerializer(paginated_vendors, many=True, context={'request': request}).data
             for i, vendor in enumerate(paginated_vendors):
-                vendor_data[i]['is_open'] = is_open(vendor)
+                vendor_data[i]['is_open'] = vendor.is_open_now(now)
 
-            data = {
-                'banners': BannerSerializer(Banner.objects.filter(is_active=True), many=True, context={'request': request}).data,
-                'categories': FoodCategorySerializer(FoodCategory.objects.filter(is_active=True), many=True, context={'request': request}).data,
-                'food_categories': FoodCategorySerializer(FoodCategory.objects.filter(is_active=True), many=True, context={'request': request}).data,
-                'popular_foods': FoodListingSerializer(
-                    FoodListing.objects.filter(is_available=True).order_by('-created_at')[:10],
-                    many=True,
-                    context={'request': request}
-                ).data,
-                'top_rated_restaurants': VendorSerializer(
-                    sorted(vendors_qs, key=lambda v: v.rating, reverse=True)[:10],
-                    many=True,
-                    context={'request': request}
-                ).data,
+            # Location-specific part of the feed; everything else comes from
+            # the cached fragment (see customer_app.home_feed)
+            local_data = {
                 'nearby_restaurants': VendorSerializer(
-                    vendors_qs[:10],
+                    nearby,
                     many=True,
                     context={'request': request}
                 ).data,
@@ -740,11 +733,21 @@ class HomeDataView(APIView):
                 'pagination': {
                     'page': page,
                     'page_size': page_size,
-                    'total': len(vendors_qs),
-                    'total_pages': (len(vendors_qs) + page_size - 1) // page_size
+                    'total': vendor_page.total,
+                    'total_pages': (vendor_page.total + page_size - 1) // page_size,
+                    'next_cursor': vendor_page.next_cursor,
                 }
             }
-            return Response(data)
+            sections, sections_digest = home_feed.static_sections(request)
+            etag = quote_etag(f"{sections_digest}-{home_feed.digest(local_data)}")
+            headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            if if_none_match and etag in parse_etags(if_none_match):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            data = {**sections, **local_data}
+            return Response(data, headers=headers)
         except Exception as e:
             logger.error(f"Error in HomeDataView: {str(e)}\n{traceback.format_exc()}")
             return Response({'error': 'An internal error occurred'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -779,21 +782,17 @@ class NearbyRestaurantsView(APIView):
             print("[LOG] Invalid latitude or longitude")
             return Response({"error": "Invalid latitude or longitude"}, status=status.HTTP_400_BAD_REQUEST)
 
-        user_location = (lat, long)
         vendors = Vendor.objects.filter(is_active=True)
         nearby_restaurants = []
 
-        for vendor in vendors:
-            vendor_location = (vendor.latitude, vendor.longitude)
-            distance = geodesic(user_location, vendor_location).km
-            if distance <= 5:
-                nearby_restaurants.append({
-                    "id": vendor.id,
-                    "name": vendor.restaurant_name or "",
-                    "address": vendor.address or "",
-                    "rating": vendor.rating,
-                    "distance": round(distance, 2),
-                })
+        for vendor, distance in nearby_vendors(vendors, lat, long, radius_km=5):
+            nearby_restaurants.append({
+                "id": vendor.id,
+                "name": vendor.restaurant_name or "",
+                "address": vendor.address or "",
+                "rating": vendor.rating,
+                "distance": round(distance, 2),
+            })
         print("[LOG] NearbyRestaurantsView response:", nearby_restaurants)
         return Response(nearby_restaurants, status=status.HTTP_200_OK)
 
@@ -1594,8 +1593,8 @@ class PlaceOrderView(APIView):
             items_data = order_details.get('items', [])
             address_param = order_details.get('address')  # Can be either pincode or address ID
             vendor_id = order_details.get('vendor_id')
-            delivery_fee = order_details.get('delivery_fee')  # Optional delivery fee from request
-            total_price = order_details.get('total_price')  # Optional total price from request
+            delivery_fee = order_details.get('delivery_fee')  # Client's figure; the fee is quoted server-side
+            total_price = order_details.get('total_price')  # Client's figure; only compared with the computed total
             
             if not all([user_id, items_data, address_param, vendor_id]):
                 return Response(
@@ -1610,9 +1609,28 @@ class PlaceOrderView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
+            # Handle address - could be an address ID or a pincode
+            address_obj = None
+            delivery_pincode = None
+            delivery_address_str = None
+
+            # A saved address brings its customer (and user) along in the same query
+            try:
+                address_id = int(address_param)
+            except (TypeError, ValueError):
+                address_id = None
+            if address_id is not None:
+                address_obj = (
+                    Address.objects.select_related('customer__user')
+                    .filter(id=address_id, customer__user__id=user_id).first()
+                )
+
             # Get customer and vendor
             try:
-                customer = CustomerProfile.objects.get(user__id=user_id)
+                if address_obj is not None:
+                    customer = address_obj.customer
+                else:
+                    customer = CustomerProfile.objects.select_related('user').get(user__id=user_id)
                 vendor = Vendor.objects.get(vendor_id=vendor_id)
             except CustomerProfile.DoesNotExist:
                 return Response(
@@ -1624,153 +1642,81 @@ class PlaceOrderView(APIView):
                     {"error": "Vendor not found"},
                     status=status.HTTP_404_NOT_FOUND
                 )
-            
-            # Handle address - could be an address ID or a pincode
-            address_obj = None
-            delivery_pincode = None
-            delivery_address_str = None
-            
-            # Check if address is a numeric ID (for a saved address) or a pincode
-            try:
-                # Try to convert to int - if successful, it might be an address ID
-                address_id = int(address_param)
-                try:
-                    # Try to get the address object
-                    address_obj = Address.objects.get(id=address_id, customer=customer)
-                    delivery_pincode = address_obj.pincode
-                    delivery_address_str = f"{address_obj.address_line_1}, {address_obj.address_line_2 or ''}, {address_obj.city}, {address_obj.state}, {address_obj.pincode}"
-                except Address.DoesNotExist:
-                    # If address not found, assume it's a pincode
-                    delivery_pincode = address_param
-                    delivery_address_str = delivery_pincode
-            except ValueError:
-                # If conversion fails, use the value directly as pincode
+
+            if address_obj is not None:
+                delivery_pincode = address_obj.pincode
+                delivery_address_str = f"{address_obj.address_line_1}, {address_obj.address_line_2 or ''}, {address_obj.city}, {address_obj.state}, {address_obj.pincode}"
+            else:
+                # Not a saved address of this customer, so treat it as a pincode
                 delivery_pincode = address_param
                 delivery_address_str = delivery_pincode
-            
-            # Calculate items total and validate items
-            items_total = 0
-            order_items_to_create = []
-            unavailable_items = []
 
-            for item_data in items_data:
-                food_id = item_data.get('food_id')
-                quantity = item_data.get('quantity')
-                price = item_data.get('price')
-                
-                # Convert quantity to int if it's a string
-                if isinstance(quantity, str):
-                    try:
-                        quantity = int(quantity)
-                    except ValueError:
-                        return Response(
-                            {"error": f"Invalid quantity value: {quantity}"},
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-
-                if not food_id or not isinstance(quantity, int) or quantity <= 0:
-                    return Response(
-                        {"error": "Invalid item data. Each item must have food_id and positive integer quantity."},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-
-                try:
-                    food_listing = FoodListing.objects.get(id=food_id, vendor=vendor)
-                    if not food_listing.is_available:
-                        unavailable_items.append(food_listing.name)
-                        continue
-                    
-                    item_total = price * quantity
-                    items_total += item_total
-                    
-                    order_items_to_create.append({
-                        'food': food_listing,
-                        'quantity': quantity,
-                        'price': price
-                    })
-                except FoodListing.DoesNotExist:
-                    return Response(
-                        {"error": f"Food item with id {food_id} not found for this vendor."},
-                        status=status.HTTP_404_NOT_FOUND
-                    )
-
-            if unavailable_items:
+            # Resolve all items in one query and report every problem at once
+            order_lines, invalid_items = validate_order_items(items_data, vendor)
+            if invalid_items:
+                not_found = all(item['reason'] in (NOT_FOUND, WRONG_VENDOR) for item in invalid_items)
+                unavailable = [item['name'] for item in invalid_items if item['reason'] == UNAVAILABLE]
+                if unavailable and len(unavailable) == len(invalid_items):
+                    error = f"Some items are unavailable: {', '.join(unavailable)}"
+                elif len(invalid_items) == 1:
+                    error = invalid_items[0]['message']
+                else:
+                    error = f"{len(invalid_items)} item(s) cannot be ordered."
                 return Response(
-                    {"error": f"Some items are unavailable: {', '.join(unavailable_items)}"},
-                    status=status.HTTP_400_BAD_REQUEST
+                    {"error": error, "invalid_items": invalid_items},
+                    status=status.HTTP_404_NOT_FOUND if not_found else status.HTTP_400_BAD_REQUEST
                 )
 
-            if not order_items_to_create:
+            if not order_lines:
                 return Response(
                     {"error": "No valid items to order."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Use delivery_fee from request if provided, otherwise calculate
+            # The delivery fee is always quoted server-side
             distance = 0
-            if not delivery_fee:
-                try:
-                    # Get coordinates for delivery address using pincode
-                    geolocator = Nominatim(user_agent="food_delivery_app")
-                    delivery_location = geolocator.geocode(f"{delivery_pincode}, India")
-                    
-                    if not delivery_location:
-                        return Response(
-                            {"error": "Could not geocode delivery address. Please ensure the pincode is valid."},
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-                    
-                    # Get coordinates for vendor
-                    vendor_location = (vendor.latitude, vendor.longitude)
-                    delivery_coords = (delivery_location.latitude, delivery_location.longitude)
-                    
-                    # Calculate distance in kilometers
-                    distance = geodesic(vendor_location, delivery_coords).kilometers
-                    print(f"Distance: {distance} km")
-                    
-                    # Calculate delivery fee
-                    if distance <= 5: delivery_fee = 20.0
-                    else: delivery_fee = 20.0 + (distance - 5) * 5.0
-                    
-                    delivery_fee = round(delivery_fee, 2)
-                    
-                except Exception as e:
-                    logger.error(f"Error calculating delivery fee: {str(e)}")
+            try:
+                quote = quote_vendor(vendor, delivery_pincode)
+                if quote is None:
                     return Response(
-                        {"error": "Failed to calculate delivery fee"},
-                        status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                        {"error": "Vendor location is not available"},
+                        status=status.HTTP_400_BAD_REQUEST
                     )
+                distance = quote.distance_km
+            except QuoteUnavailable:
+                return Response(
+                    {"error": "Could not geocode delivery address. Please ensure the pincode is valid."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            except Exception as e:
+                logger.error(f"Error calculating delivery fee: {str(e)}")
+                return Response(
+                    {"error": "Failed to calculate delivery fee"},
+                    status=status.HTTP_500_INTERNAL_SERVER_ERROR
+                )
 
-            # Calculate total amount including delivery fee
-            # Use total_price from request if provided, otherwise calculate
-            if total_price:
-                total_amount = float(total_price)
-            else:
-                total_amount = items_total + delivery_fee
-
-            # Create the Order
-            order = Order.objects.create(
-                customer=customer, vendor=vendor, total_amount=total_amount,
-                delivery_address=delivery_address_str, payment_mode=payment_method,
-                payment_status=payment_status, payment_id=txn_id, status='placed',
-                delivery_fee=delivery_fee
-            )
+            # Price every line from FoodListing.price; client prices/totals are informational only
+            pricing = price_order(order_lines, quote.delivery_fee)
+            try:
+                client_total = money(total_price) if total_price else None
+            except (InvalidOperation, ValueError):
+                client_total = None
+            if client_total is not None and client_total != pricing.total:
+                logger.warning(f"Client total {total_price} differs from computed total {pricing.total} (delivery fee sent: {delivery_fee})")
+            items_total, delivery_fee, total_amount = pricing.items_total, pricing.delivery_fee, pricing.total
 
-            # Create OrderItems
-            order_item_instances = []
-            for item_info in order_items_to_create:
-                order_item_instances.append(
-                    OrderItem(
-                        order=order,
-                        food=item_info['food'],
-                        quantity=item_info['quantity'],
-                        price=item_info['price']
-                    )
+            with transaction.atomic():
+                order = Order.objects.create(
+                    customer=customer, vendor=vendor, total_amount=total_amount,
+                    delivery_address=delivery_address_str, payment_mode=payment_method,
+                    payment_status=payment_status, payment_id=txn_id, status='placed',
+                    delivery_fee=delivery_fee, items_total=items_total, tax=pricing.tax
                 )
-            OrderItem.objects.bulk_create(order_item_instances)
+                order_items = OrderItem.objects.bulk_create(build_order_items(order, pricing, OrderItem))
+                order.price_breakdown = pricing_breakdown(order, order_items)
+                order.save(update_fields=['price_breakdown'])
 
-            # Create notification for vendor
-            try:
+                # Notification, push and SMS are delivered by the outbox worker after commit
                 notification_body = f"""New Order Received!
 Order ID: {order.order_number}
 Customer: {customer.full_name}
@@ -1779,30 +1725,22 @@ Delivery Fee: ₹{delivery_fee}
 Total Amount: ₹{total_amount}
 Payment Mode: {payment_method}
 Delivery Address: {delivery_address_str}"""
-                
-                # Create database notification
-                notification = Notification.objects.create(
-                    vendor=vendor,
-                    title=f"New Order #{order.order_number}",
-                    body=notification_body
-                )
-                
-                # Send push notification if vendor has FCM token
-                if vendor.fcm_token:
-                    try:
-                        from auth_app.views import send_notification_to_device
-                        send_notification_to_device(
-                            vendor.fcm_token,
-                            f"New Order #{order.order_number}",
-                            f"New order received for ₹{total_amount}"
-                        )
-                    except Exception as e:
-                        logger.error(f"Failed to send push notification: {str(e)}")
-                
-                logger.info(f"Notification sent to vendor {vendor.vendor_id} for order {order.order_number}")
-            except Exception as e:
-                logger.error(f"Failed to send notification to vendor: {str(e)}")
-            
+                title = f"New Order #{order.order_number}"
+                messages = [
+                    (OutboxMessage.KIND_VENDOR_NOTIFICATION, {'vendor_id': vendor.id, 'title': title, 'body': notification_body}),
+                    (OutboxMessage.KIND_FCM_PUSH, {
+                        'vendor_id': vendor.id, 'title': title, 'body': f"New order received for ₹{total_amount}",
+                        'data': {'order_number': order.order_number},
+                    }),
+                ]
+                if settings.ORDER_CONFIRMATION_SMS and customer.phone:
+                    country_code = getattr(settings, 'DEFAULT_COUNTRY_CODE', '+91')
+                    messages.append((OutboxMessage.KIND_SMS, {
+                        'to': f"{country_code}{customer.phone}",
+                        'body': f"Your order {order.order_number} for ₹{total_amount} has been placed.",
+                    }))
+                outbox.enqueue_many(messages)
+
             # Calculate estimated delivery time (in minutes)
             estimated_delivery_time = 30  # Default 30 minutes
             
@@ -1811,9 +1749,10 @@ Delivery Address: {delivery_address_str}"""
                 "order_id": order.order_number,
                 "status": order.status,
                 "estimated_delivery_time": estimated_delivery_time,
-                "total_amount": total_amount,
-                "items_total": items_total,
-                "delivery_fee": delivery_fee,
+                "total_amount": float(total_amount),
+                "items_total": float(items_total),
+                "delivery_fee": float(delivery_fee),
+                "tax": float(pricing.tax),
                 "vendor": {
                     "id": vendor.vendor_id,
                     "name": vendor.restaurant_name or "",
@@ -1840,7 +1779,7 @@ Delivery Address: {delivery_address_str}"""
 class DeliveryFeeView(APIView):
     """
     Calculate delivery fee based on distance between restaurant and delivery address.
-    For testing purposes, uses a default fee of 20 when pincode is 123456.
+    For testing purposes, uses a default fee of 20 for settings.DELIVERY_TEST_PINCODE (123456 in DEBUG).
     """
     permission_classes = [AllowAny]  # Explicitly allow unauthenticated access
     
@@ -1901,50 +1840,29 @@ class DeliveryFeeView(APIView):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # For testing purposes, use a default delivery fee of 20 when pincode is 123456
-            if delivery_pincode == "123456":
-                print(f"DEBUG: Using default delivery fee for test pincode")
-                return Response({
-                    "delivery_fee": 20.0,
-                    "distance_km": 0.0,
-                    "note": "Using default delivery fee for testing"
-                }, status=status.HTTP_200_OK)
-            
-            # Get coordinates for delivery address using pincode
-            geolocator = Nominatim(user_agent="food_delivery_app")
-            delivery_location = geolocator.geocode(f"{delivery_pincode}, India")
-            
-            if not delivery_location:
+            # Cached per (vendor, pincode); see auth_app.delivery_quotes
+            try:
+                quote = quote_vendor(vendor, delivery_pincode)
+            except QuoteUnavailable:
                 print(f"DEBUG: Could not geocode delivery address for pincode {delivery_pincode}")
                 return Response(
                     {"error": "Could not geocode delivery address. Please ensure the pincode is valid."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            if quote is None:
+                return Response(
+                    {"error": "Vendor location is not available"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            print(f"DEBUG: Delivery quote: {quote}")
             
-            # Get coordinates for vendor
-            vendor_location = (vendor.latitude, vendor.longitude)
-            delivery_coords = (delivery_location.latitude, delivery_location.longitude)
-            
-            # Calculate distance in kilometers
-            distance = geodesic(vendor_location, delivery_coords).kilometers
-            print(f"DEBUG: Calculated distance: {distance} km")
-            
-            # Calculate delivery fee
-            # If distance is less than 5km, fee is 20
-            # Otherwise, fee is 20 + 5 per km beyond 5km
-            if distance <= 5:
-                delivery_fee = 20.0
-            else:
-                delivery_fee = 20.0 + (distance - 5) * 5.0
-            
-            # Round to 2 decimal places
-            delivery_fee = round(delivery_fee, 2)
-            print(f"DEBUG: Calculated delivery fee: {delivery_fee}")
-            
-            return Response({
-                "delivery_fee": delivery_fee,
-                "distance_km": round(distance, 2)
-            }, status=status.HTTP_200_OK)
+            response_data = {
+                "delivery_fee": quote.delivery_fee,
+                "distance_km": quote.distance_km
+            }
+            if is_test_pincode(delivery_pincode):
+                response_data["note"] = "Using default delivery fee for testing"
+            return Response(response_data, status=status.HTTP_200_OK)
             
         except Exception as e:
             logger.error(f"Error calculating delivery fee: {str(e)}")
@@ -1954,6 +1872,66 @@ class DeliveryFeeView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+class DeliveryFeeBatchView(APIView):
+    """
+    Quote delivery fees for many vendors to one pincode in a single request.
+
+    Query parameters:
+    - pin: The 6-digit delivery pincode (required)
+    - vendor_ids: Comma-separated vendor IDs (required, at most 100)
+
+    Returns:
+    {
+        "pincode": "560001",
+        "quotes": {"V001": {"delivery_fee": 20.0, "distance_km": 2.5}},
+        "unavailable": ["V002"]
+    }
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        delivery_pincode = request.query_params.get('pin')
+        vendor_ids = [v.strip() for v in request.query_params.get('vendor_ids', '').split(',') if v.strip()]
+        if not delivery_pincode or not re.match(r'^\d{6}$', delivery_pincode):
+            return Response(
+                {
+                    "error": "A 6-digit pincode is required as the 'pin' query parameter",
+                    "example": "/customer/api/delivery-fee/batch/?pin=123456&vendor_ids=V001,V002"
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not vendor_ids:
+            return Response({"error": "vendor_ids is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(vendor_ids) > MAX_BATCH_VENDORS:
+            return Response(
+                {"error": f"At most {MAX_BATCH_VENDORS} vendor_ids per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            quotes = quote_vendors(vendor_ids, delivery_pincode)
+        except QuoteUnavailable:
+            return Response(
+                {"error": "Could not geocode delivery address. Please ensure the pincode is valid."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        except Exception as e:
+            logger.error(f"Error calculating batch delivery fees: {str(e)}")
+            return Response(
+                {"error": "Failed to calculate delivery fee"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+        return Response({
+            "pincode": delivery_pincode,
+            "quotes": {
+                vendor_id: {"delivery_fee": quote.delivery_fee, "distance_km": quote.distance_km}
+                for vendor_id, quote in quotes.items() if quote
+            },
+            # Unknown vendors and vendors without a location
+            "unavailable": [v for v in vendor_ids if not quotes.get(v)],
+        }, status=status.HTTP_200_OK)
+
 # --- View for fetching specific order details ---
 class OrderDetailView(APIView):
     permission_classes = [IsAuthenticated]
@@ -1961,38 +1939,24 @@ class OrderDetailView(APIView):
     def get(self, request, order_number):
         print(f"Fetching details for order number: {order_number}")
         try:
-            # Fetch the order by its order_number
-            # Use prefetch_related for efficiency, using the correct related name
-            order = Order.objects.prefetch_related(
-                'orderitem_set',          # Correct related name (default)
-                'orderitem_set__food',    # Prefetch food within items
-                'vendor'
-            ).get(order_number=order_number)
-            print(order)
+            # One row: the price breakdown and item snapshots were stored at checkout
+            order = Order.objects.select_related('vendor').get(order_number=order_number)
             # --- Optional: Check if the requesting user owns this order ---
             # If using authentication:
             # if request.user.customer_profile.customer_id != order.customer.customer_id:
             #    return Response({"error": "Not authorized to view this order"}, status=status.HTTP_403_FORBIDDEN)
             # --- End Optional Check ---
 
-            # Serialize the order data
-            # You might need a more detailed OrderSerializer or build the dict manually
-            order_items = order.orderitem_set.all() # Use correct related name
-            
-            # Calculate subtotal robustly
-            subtotal = float(order.total_amount) # Default to total_amount
-            delivery_fee_value = 0.0
-            if order.delivery_fee is not None:
-                delivery_fee_value = float(order.delivery_fee)
-                # Prevent negative subtotal if data is inconsistent
-                subtotal = max(0.0, float(order.total_amount) )
-            
+            price_breakdown = order.price_breakdown
+            if price_breakdown is None:
+                # Created outside PlaceOrderView; snapshot it once
+                price_breakdown = backfill_order(order, OrderItem)
+
             # Manually construct the response dictionary matching frontend expectations
             response_data = {
                 'id': order.id,
                 'order_id': order.order_number, 
                 'order_number': order.order_number,
-                # 'total_amount': float(order.total_amount), # Internal field, not directly needed by frontend price details
                 'status': order.status,
                 'delivery_address': order.delivery_address,
                 'created_at': order.created_at.strftime('%Y-%m-%d %H:%M:%S') if order.created_at else None,
@@ -2000,10 +1964,10 @@ class OrderDetailView(APIView):
                 'payment_status': order.payment_status,
                 
                 # Fields for Price Details section
-                'subtotal': subtotal, 
-                'delivery_fee': delivery_fee_value,
-                'tax': 0.00, # Add tax if applicable
-                'total': float(order.total_amount )+ delivery_fee_value, # This is the final price customer paid
+                'subtotal': price_breakdown['subtotal'],
+                'delivery_fee': price_breakdown['delivery_fee'],
+                'tax': price_breakdown['tax'],
+                'total': price_breakdown['total'], # This is the final price customer paid
                 
                 'vendor': {
                     'id': order.vendor.id,
@@ -2016,16 +1980,15 @@ class OrderDetailView(APIView):
                  } if order.vendor else None,
                 'items': [
                     {
-                        'id': item.id,
-                        'food_id': item.food.id,
-                        'name': item.food.name or "",
-                        'quantity': item.quantity,
-                        'price': float(item.price),
+                        'id': item['id'],
+                        'food_id': item['food_id'],
+                        'name': item['name'],
+                        'quantity': item['quantity'],
+                        'price': item['price'],
                         'variations': None, # Add variations if your model supports it
-                         # Include image URL if available in FoodListing
-                        'image_url': request.build_absolute_uri(item.food.images[0]) if hasattr(item.food, 'images') and item.food.images else None 
+                        'image_url': request.build_absolute_uri(item['image']) if item['image'] else None
                     }
-                    for item in order_items
+                    for item in price_breakdown['items']
                 ]
             }
 
@@ -2053,13 +2016,21 @@ class SearchView(APIView):
         if not query:
             return Response({"error": "Query parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        vendors = Vendor.objects.filter(
-            Q(restaurant_name__icontains=query) | Q(address__icontains=query)
-        ).distinct()
-
-        foods = FoodListing.objects.filter(
-            Q(name__icontains=query) | Q(description__icontains=query)
-        ).distinct()
+        try:
+            page = max(1, int(request.GET.get('page', 1)))
+            page_size = max(1, min(int(request.GET.get('page_size', 20)), 50))
+        except ValueError:
+            return Response({"error": "page and page_size must be integers"}, status=status.HTTP_400_BAD_REQUEST)
+        offset = (page - 1) * page_size
+
+        # Ranked full-text lookups (see customer_app.search); one extra row detects a next page
+        vendor_qs = Vendor.objects.all()
+        if request.GET.get('open_now', '').lower() in ('1', 'true'):
+            vendor_qs = vendor_qs.open_now()
+        vendors = search.search_vendors(vendor_qs, query, page_size + 1, offset)
+        foods = search.search_foods(FoodListing.objects.all(), query, page_size + 1, offset)
+        has_more_restaurants, has_more_foods = len(vendors) > page_size, len(foods) > page_size
+        vendors, foods = vendors[:page_size], foods[:page_size]
 
         data = {
             "restaurants": [
@@ -2081,11 +2052,43 @@ class SearchView(APIView):
                 }
                 for food in foods
             ],
+            "pagination": {
+                "page": page,
+                "page_size": page_size,
+                "has_more_restaurants": has_more_restaurants,
+                "has_more_foods": has_more_foods,
+            },
         }
         print("[LOG] SearchView accessed by:", request.user)
         print("[LOG] SearchView response:", data)
         return Response(data, status=status.HTTP_200_OK)
 
+class AutocompleteView(APIView):
+    """
+    Typeahead suggestions from the in-memory index (customer_app.autocomplete).
+
+    Query parameters:
+    - query: What the user has typed so far (required)
+    - limit: Number of suggestions (default 10, max 20)
+    """
+    authentication_classes = []  # Public; skip JWT user lookups so no DB query is made
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.GET.get('query', '').strip()
+        if not query:
+            return Response({"error": "Query parameter is required"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = int(request.GET.get('limit', 10))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+        suggestions = [
+            {"text": text, "type": kind, "vendor_id": ref}
+            for text, kind, ref, _ in autocomplete_index.suggest(query, max(1, limit))
+        ]
+        return Response({"query": query, "suggestions": suggestions}, status=status.HTTP_200_OK)
+
 class CustomerProfileView(APIView):
     permission_classes = [IsAuthenticated]
     authentication_classes = [JWTAuthentication]
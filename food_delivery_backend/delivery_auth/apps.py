@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class DeliveryAuthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'delivery_auth'
+
+    def ready(self):
+        from . import signals  # noqa: F401  Register signal handlers
@@ -1,13 +1,48 @@
+import uuid
+import logging
+
 import jwt
 from django.conf import settings
 from rest_framework.authentication import BaseAuthentication
 from rest_framework import exceptions
 from .models import DeliveryUser
+from .denylist import deny_list
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryUserProxy:
+    """
+    The authenticated delivery partner, built from the token alone.
+    ``delivery_user`` loads the DeliveryUser row on first use for views that
+    need more than the id.
+    """
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, user_id, phone_number=None):
+        self.id = self.pk = user_id
+        self.phone_number = phone_number
+        self._delivery_user = None
+
+    @property
+    def delivery_user(self):
+        if self._delivery_user is None:
+            self._delivery_user = DeliveryUser.objects.get(id=self.id)
+        return self._delivery_user
+
+    def __str__(self):
+        return f"DeliveryUserProxy({self.id})"
+
 
 class DeliveryUserJWTAuthentication(BaseAuthentication):
     """
     Custom authentication class for DeliveryUser using JWT.
     Verifies the custom JWT token sent in the Authorization header.
+
+    No database access: deactivated or deleted partners are rejected through
+    the cached deny-list (delivery_auth.denylist), and request.user is a
+    DeliveryUserProxy.
     """
     def authenticate(self, request):
         auth_header = request.headers.get('Authorization')
@@ -36,7 +71,7 @@ class DeliveryUserJWTAuthentication(BaseAuthentication):
             raise exceptions.AuthenticationFailed('Invalid token')
         except Exception as e:
              # Log unexpected errors during decoding
-             print(f"JWT Decode Error: {e}")
+             logger.error(f"JWT Decode Error: {e}")
              raise exceptions.AuthenticationFailed('Could not decode token')
 
         # Check if it's our delivery user token
@@ -48,15 +83,12 @@ class DeliveryUserJWTAuthentication(BaseAuthentication):
             raise exceptions.AuthenticationFailed('Token missing user identifier')
 
         try:
-            # Retrieve the DeliveryUser using the id from the token
-            user = DeliveryUser.objects.get(id=user_id)
-        except DeliveryUser.DoesNotExist:
-            raise exceptions.AuthenticationFailed('Delivery user not found')
-        except ValueError:
+            user_id = str(uuid.UUID(user_id))
+        except (ValueError, TypeError, AttributeError):
              raise exceptions.AuthenticationFailed('Invalid user identifier in token') # If id is not valid UUID
 
-        if not user.is_active:
+        if user_id in deny_list:
             raise exceptions.AuthenticationFailed('User account is disabled')
 
         # Successfully authenticated
-        return (user, token) # Return user and token tuple 
\ No newline at end of file
+        return (DeliveryUserProxy(user_id, payload.get('phone_number')), token) # Return user and token tuple
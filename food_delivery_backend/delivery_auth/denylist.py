@@ -0,0 +1,171 @@
+"""
+Deny-list of deactivated delivery partners.
+
+``DeliveryUserJWTAuthentication`` never reads DeliveryUser: a token is valid
+unless its partner ID is in this set. Every process keeps a local snapshot
+that it re-reads at most once per ``DELIVERY_DENYLIST_REFRESH`` seconds, so
+authenticating a request is a signature check plus a set lookup.
+
+Where the snapshot comes from depends on the default cache:
+
+* django-redis - a Redis set (``DENYLIST_KEY``) shared by every process.
+  The DeliveryUser signals (``delivery_auth.signals``) add a partner when
+  they are deactivated or deleted and remove them when reactivated, each
+  one atomic SADD/SREM, so concurrent changes can't overwrite each other.
+  A missing set is rebuilt from the database on the next refresh.
+* any other cache - the database, one query per refresh interval.
+
+If Redis can't be read, the refresh falls back to the database rather than
+an empty set, so a Redis outage never lets deactivated partners back in.
+Deleted partners only live in the Redis set; if it is lost, their tokens
+pass until they expire, but match no orders.
+
+Bulk ``queryset.update(is_active=...)`` bypasses signals, so call
+``deny_list.publish()`` afterwards.
+"""
+import time
+import logging
+import threading
+
+from django.conf import settings
+
+from .models import DeliveryUser
+
+logger = logging.getLogger(__name__)
+
+DENYLIST_KEY = 'delivery_denylist:v2'
+# Member present once the set has been built, so an empty deny-list isn't mistaken for a missing one
+BUILT_MARKER = '-'
+
+
+def inactive_ids():
+    return {str(pk) for pk in DeliveryUser.objects.filter(is_active=False).values_list('id', flat=True)}
+
+
+class RedisDenyStore:
+    def __init__(self, connection=None):
+        if connection is None:
+            from django_redis import get_redis_connection
+            connection = get_redis_connection('default')
+        self._redis = connection
+
+    def _members(self):
+        return {member.decode() for member in self._redis.smembers(DENYLIST_KEY)}
+
+    def members(self):
+        """The denied IDs, or None if the set hasn't been built."""
+        ids = self._members()
+        if BUILT_MARKER not in ids:
+            return None
+        ids.discard(BUILT_MARKER)
+        return ids
+
+    def add(self, ids):
+        # Never adds the marker: an unbuilt set stays unbuilt until rebuild()
+        self._redis.sadd(DENYLIST_KEY, *ids)
+
+    def remove(self, ids):
+        self._redis.srem(DENYLIST_KEY, *ids)
+
+    def rebuild(self):
+        """Deny every inactive partner and allow reactivated ones; deleted partners stay denied."""
+        current = self._members() - {BUILT_MARKER}
+        reactivated = {
+            str(pk) for pk in DeliveryUser.objects.filter(id__in=current, is_active=True).values_list('id', flat=True)
+        }
+        if reactivated:
+            self.remove(reactivated)
+        self._redis.sadd(DENYLIST_KEY, BUILT_MARKER, *inactive_ids())
+        return self.members()
+
+
+class DatabaseDenyStore:
+    """No shared set: every refresh reads the inactive partners from the database."""
+
+    def members(self):
+        return inactive_ids()
+
+    def add(self, ids):
+        pass
+
+    def remove(self, ids):
+        pass
+
+    def rebuild(self):
+        return inactive_ids()
+
+
+class DenyList:
+    def __init__(self, refresh_interval, store=None):
+        self.refresh_interval = refresh_interval
+        self._store = store
+        self._ids = frozenset()
+        self._refresh_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        if self._store is None:
+            if settings.CACHES['default']['BACKEND'].startswith('django_redis'):
+                self._store = RedisDenyStore()
+            else:
+                self._store = DatabaseDenyStore()
+        return self._store
+
+    def __contains__(self, user_id):
+        if time.monotonic() >= self._refresh_at:
+            self.refresh()
+        return user_id in self._ids
+
+    def refresh(self):
+        """Re-read the shared set (building it if missing), or the database if that fails."""
+        with self._lock:
+            if time.monotonic() < self._refresh_at:
+                return  # Another thread just did it
+            try:
+                ids = self.store.members()
+                if ids is None:
+                    ids = self.store.rebuild()
+            except Exception as e:
+                logger.warning(f"Could not read the delivery deny-list, using the database: {e}")
+                try:
+                    ids = inactive_ids()
+                except Exception as e:
+                    # Keep serving the last snapshot rather than locking every partner out
+                    logger.error(f"Could not refresh the delivery deny-list: {e}")
+                    ids = self._ids
+            self._ids = frozenset(ids)
+            self._refresh_at = time.monotonic() + self.refresh_interval
+
+    def deny(self, user_id):
+        try:
+            self.store.add([str(user_id)])
+        except Exception as e:
+            logger.warning(f"Could not add delivery partner {user_id} to the deny-list: {e}")
+        with self._lock:
+            self._ids = self._ids | {str(user_id)}
+
+    def allow(self, user_id):
+        try:
+            self.store.remove([str(user_id)])
+        except Exception as e:
+            logger.warning(f"Could not remove delivery partner {user_id} from the deny-list: {e}")
+        with self._lock:
+            self._ids = self._ids - {str(user_id)}
+
+    def publish(self, also=()):
+        """Rebuild the shared set from the database, plus ``also`` (e.g. deleted partners)."""
+        if also:
+            self.store.add([str(pk) for pk in also])
+        ids = frozenset(self.store.rebuild()) | {str(pk) for pk in also}
+        with self._lock:
+            self._ids = ids
+        logger.info(f"Published delivery deny-list ({len(ids)} partners)")
+        return ids
+
+    def shared(self):
+        """The set as currently stored (bypasses the local snapshot)."""
+        return frozenset(self.store.members() or ())
+
+
+deny_list = DenyList(refresh_interval=settings.DELIVERY_DENYLIST_REFRESH)
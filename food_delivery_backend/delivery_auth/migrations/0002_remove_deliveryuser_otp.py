@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-17 21:25
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('delivery_auth', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='deliveryuser',
+            name='otp',
+        ),
+        migrations.RemoveField(
+            model_name='deliveryuser',
+            name='otp_expiry_time',
+        ),
+    ]
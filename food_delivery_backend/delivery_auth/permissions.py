@@ -1,15 +1,15 @@
 from rest_framework import permissions
-from .models import DeliveryUser
+from .authentication import DeliveryUserProxy
 
 class IsAuthenticatedDeliveryUser(permissions.BasePermission):
     """
     Allows access only to authenticated requests where request.user
-    is an instance of DeliveryUser.
+    is a DeliveryUserProxy.
     """
 
     def has_permission(self, request, view):
         # Check if the user attached by the authentication class
-        # is an instance of DeliveryUser.
+        # is a delivery partner.
         # Our DeliveryUserJWTAuthentication ensures request.user is set
         # if authentication is successful.
-        return isinstance(request.user, DeliveryUser) 
\ No newline at end of file
+        return isinstance(request.user, DeliveryUserProxy) 
\ No newline at end of file
@@ -0,0 +1,21 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import DeliveryUser
+from .denylist import deny_list
+
+
+@receiver(post_save, sender=DeliveryUser)
+def delivery_user_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is not None and 'is_active' not in update_fields:
+        return
+    if created and instance.is_active:
+        return
+    user_id, is_active = str(instance.id), instance.is_active
+    transaction.on_commit(lambda: deny_list.allow(user_id) if is_active else deny_list.deny(user_id))
+
+
+@receiver(post_delete, sender=DeliveryUser)
+def delivery_user_deleted(sender, instance, **kwargs):
+    user_id = str(instance.id)
+    transaction.on_commit(lambda: deny_list.deny(user_id))
@@ -9,11 +9,16 @@ from .serializers import (
 from django.conf import settings
 import jwt # Import PyJWT
 from datetime import datetime, timedelta, timezone # Import datetime and timezone
-from .authentication import DeliveryUserJWTAuthentication # Import custom authentication
+from .authentication import DeliveryUserJWTAuthentication, DeliveryUserProxy # Import custom authentication
 from customer_app.models import Order # Assuming Order model is here
 from .permissions import IsAuthenticatedDeliveryUser # Import custom permission
-from twilio.rest import Client as TwilioClient
-from twilio.base.exceptions import TwilioRestException
+from accounts.otp import delivery_otp, SENT, THROTTLED, MESSAGES as OTP_MESSAGES
+from auth_app import outbox
+from auth_app.models import OutboxMessage
+from auth_app.sms import send_sms, SMSError
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Custom JWT generation for DeliveryUser
 def generate_delivery_jwt(user: DeliveryUser):
@@ -51,50 +56,22 @@ def generate_delivery_jwt(user: DeliveryUser):
 
 def send_sms_via_twilio(recipient_phone_number: str, message_body: str):
     """
-    Sends an SMS using Twilio credentials from Django settings.
-    Handles basic error checking.
+    Sends an SMS right away through the configured SMS backend (auth_app.sms),
+    which reuses one pooled Twilio client per process. Views should enqueue
+    instead (see SendOTPView); this is for scripts and the shell.
 
     Args:
         recipient_phone_number: The full phone number to send to (including country code).
         message_body: The text message content.
 
     Returns:
-        bool: True if the API call was initiated without immediate error, False otherwise.
+        bool: True if the provider accepted the message, False otherwise.
     """
     try:
-        account_sid = settings.TWILIO_ACCOUNT_SID
-        auth_token = settings.TWILIO_AUTH_TOKEN
-        twilio_phone_number = settings.TWILIO_PHONE_NUMBER
-
-        if not all([account_sid, auth_token, twilio_phone_number]):
-            logger.error("Twilio credentials missing in Django settings!")
-            return False # Indicate configuration error
-
-        client = TwilioClient(account_sid, auth_token)
-
-        logger.info(f"Attempting to send SMS to {recipient_phone_number} via Twilio.") # Use logger
-
-        message = client.messages.create(
-            body=message_body,
-            from_=twilio_phone_number,
-            to=recipient_phone_number
-        )
-
-        logger.info(f"Twilio message initiated. SID: {message.sid}, Status: {message.status}") # Use logger
-
-        # Optional: More robust status checking if needed
-        if message.status in ['failed', 'undelivered']:
-             logger.warning(f"Twilio reported message status as {message.status} for SID {message.sid} to {recipient_phone_number}.")
-             # Depending on requirements, you might return False here
-
-        return True # API call initiated
-
-    except TwilioRestException as e:
-        logger.error(f"Twilio API Error sending SMS to {recipient_phone_number}: {e}")
-        return False
-    except AttributeError as e:
-        # Specifically catch missing settings attributes
-        logger.error(f"Configuration Error sending SMS: Missing Twilio setting - {e}")
+        send_sms(recipient_phone_number, message_body)
+        return True
+    except SMSError as e:
+        logger.error(f"Error sending SMS to {recipient_phone_number}: {e}")
         return False
     except Exception as e:
         logger.error(f"Unexpected Error sending SMS to {recipient_phone_number}: {e}")
@@ -109,39 +86,28 @@ class SendOTPView(generics.GenericAPIView):
         serializer.is_valid(raise_exception=True)
         phone_number = serializer.validated_data['phone_number']
 
-        # Get or create the delivery user entry
-        user, created = DeliveryUser.objects.get_or_create(phone_number=phone_number)
-
-        if not user.is_active:
+        # Read-only check; unknown numbers get a user row only once they verify
+        is_active = DeliveryUser.objects.filter(phone_number=phone_number).values_list('is_active', flat=True).first()
+        if is_active is False:
              return Response({"success": False, "message": "This account is inactive."}, status=status.HTTP_403_FORBIDDEN)
 
-        user.generate_otp()
-        otp = user.otp
+        _, outcome = delivery_otp.generate(phone_number)
+        if outcome != SENT:
+            # Throttling is the client's to wait out; a failed OTP store is ours
+            code = status.HTTP_429_TOO_MANY_REQUESTS if outcome == THROTTLED else status.HTTP_503_SERVICE_UNAVAILABLE
+            return Response({"success": False, "message": OTP_MESSAGES[outcome]}, status=code)
 
-        # --- Twilio SMS Sending Logic --- #
-        # --- Temporarily Disabled SMS Sending ---
-        message_body = f"Your Food on Door verification code is: {otp}"
+        # The outbox worker sends the SMS (auth_app.sms). The code itself stays
+        # in the OTP store; the worker reads it from there at send time.
         country_code = getattr(settings, 'DEFAULT_COUNTRY_CODE', '+91')
-        recipient_phone_number = f"{country_code}{phone_number}"
-
-        print(f"---- DEVELOPMENT: OTP for {phone_number} is {otp} ----") # Print OTP for testing
-        print(f"---- DEVELOPMENT: SMS sending to {recipient_phone_number} is currently disabled. ----")
-
-        # Comment out the actual sending call for now
-        # sms_sent = send_sms_via_twilio(recipient_phone_number, message_body)
-        # if not sms_sent:
-        #     # Decide how to handle SMS failure - for now, we proceed
-        #     print("---- DEVELOPMENT: SMS sending function indicated failure (or is commented out). ----")
-        #     # You might want to return an error here in production if SMS is critical
-        #     # return Response({"success": False, "message": "Failed to send OTP message."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        outbox.enqueue(OutboxMessage.KIND_SMS, {
+            'to': f"{country_code}{phone_number}",
+            'body': "Your Food on Door verification code is: {otp}",
+            'otp': {'actor': delivery_otp.actor, 'phone': phone_number},
+        })
 
-        # --- End Temporarily Disabled SMS Sending ---
-
-            # If Twilio call succeeds (doesn't raise exception), proceed
         return Response({"success": True, "message": "OTP sent successfully."}, status=status.HTTP_200_OK)
 
-        
-        # --- End Twilio SMS Sending Logic --- #
 
 class VerifyOTPView(generics.GenericAPIView):
     serializer_class = VerifyOTPSerializer
@@ -153,37 +119,35 @@ class VerifyOTPView(generics.GenericAPIView):
         phone_number = serializer.validated_data['phone_number']
         otp = serializer.validated_data['otp']
 
-        try:
-            user = DeliveryUser.objects.get(phone_number=phone_number)
-        except DeliveryUser.DoesNotExist:
-            return Response({"success": False, "message": "User not found."}, status=status.HTTP_404_NOT_FOUND)
+        is_valid, message = delivery_otp.verify(phone_number, otp)
+        if not is_valid:
+            return Response({"success": False, "message": message}, status=status.HTTP_400_BAD_REQUEST)
 
+        # First database write of the login flow
+        user, created = DeliveryUser.objects.get_or_create(phone_number=phone_number)
         if not user.is_active:
             return Response({"message": "This account is inactive."}, status=status.HTTP_403_FORBIDDEN)
 
-        if user.is_otp_valid(otp):
-            is_new_user = not user.is_registered
-
-            if is_new_user:
-                # Don't issue tokens yet, user needs to register
-                return Response({
-                    "success": True,
-                    "is_new_user": True,
-                    "message": "OTP verified. Please complete registration."
-                }, status=status.HTTP_200_OK)
-            else:
-                # Existing, registered user: Issue tokens using CUSTOM function
-                tokens = generate_delivery_jwt(user)
-                user_data = DeliveryUserSerializer(user).data
-                return Response({
-                    "success": True,
-                    "is_new_user": False,
-                    "access": tokens['access'],
-                    "refresh": tokens['refresh'],
-                    "user": user_data
-                }, status=status.HTTP_200_OK)
+        is_new_user = not user.is_registered
+
+        if is_new_user:
+            # Don't issue tokens yet, user needs to register
+            return Response({
+                "success": True,
+                "is_new_user": True,
+                "message": "OTP verified. Please complete registration."
+            }, status=status.HTTP_200_OK)
         else:
-            return Response({"success": False, "message": "Invalid or expired OTP."}, status=status.HTTP_400_BAD_REQUEST)
+            # Existing, registered user: Issue tokens using CUSTOM function
+            tokens = generate_delivery_jwt(user)
+            user_data = DeliveryUserSerializer(user).data
+            return Response({
+                "success": True,
+                "is_new_user": False,
+                "access": tokens['access'],
+                "refresh": tokens['refresh'],
+                "user": user_data
+            }, status=status.HTTP_200_OK)
 
 class RegisterView(generics.UpdateAPIView):
     serializer_class = RegisterSerializer
@@ -241,39 +205,26 @@ class DeliveryOrderListView(generics.ListAPIView):
     authentication_classes = [DeliveryUserJWTAuthentication]
     permission_classes = [IsAuthenticatedDeliveryUser]
 
-    def list(self, request, *args, **kwargs):
-        print(f"--- DeliveryOrderListView reached! Request Path: {request.path} ---") # DEBUG
-        print(f"--- Authenticated User: {request.user} ({type(request.user)}) ---") # DEBUG
-        queryset = self.get_queryset()
-        print(f"--- Queryset Count: {queryset.count()} ---") # DEBUG
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-
     def get_queryset(self):
         """
         This view should return a list of all the orders
         for the currently authenticated delivery user.
         It also supports filtering by status.
         """
-        print("--- DeliveryOrderListView.get_queryset called --- ") # DEBUG
         user = self.request.user
 
-        if not isinstance(user, DeliveryUser):
-             print("--- ERROR: request.user is NOT a DeliveryUser instance! ---") # DEBUG
+        if not isinstance(user, DeliveryUserProxy):
+             logger.error("request.user is not a delivery partner in DeliveryOrderListView")
              return Order.objects.none()
 
-        print(f"--- Filtering orders for DeliveryUser ID: {user.id} ---") # DEBUG
-        queryset = Order.objects.filter(delivery_partner__id=str(user.id))
+        logger.debug(f"Listing orders for delivery partner {user.id}")
+        # Range scan on partner_order_created_idx
+        queryset = Order.objects.filter(assigned_partner_id=user.id)
 
         status_param = self.request.query_params.get('status', None)
         if status_param:
             statuses = [s.strip() for s in status_param.split(',') if s.strip()]
             if statuses:
-                print(f"--- Filtering by status: {statuses} ---") # DEBUG
                 queryset = queryset.filter(status__in=statuses)
-            else:
-                 print("--- Status parameter present but empty after processing. ---") # DEBUG
-        else:
-             print("--- No status filter applied. ---") # DEBUG
 
         return queryset.order_by('-created_at')
@@ -2,6 +2,8 @@
 ASGI config for food_delivery_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP goes to Django; WebSocket connections go to the live order events
+endpoint (auth_app.realtime), whose server-sent-event twin is a normal URL.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -13,4 +15,12 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'food_delivery_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from auth_app.realtime import websocket_application  # noqa: E402  Needs the app registry set up above
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'websocket':
+        return await websocket_application(scope, receive, send)
+    return await django_application(scope, receive, send)
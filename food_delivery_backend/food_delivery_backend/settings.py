@@ -186,6 +186,71 @@ LOGGING = {
 RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID', 'your_razorpay_key_id')
 RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET', 'your_razorpay_key_secret')
 
+# Pincode that gets the flat base delivery fee, for the app's test builds
+# (auth_app.delivery_quotes). Empty turns it off; keep it off in production.
+DELIVERY_TEST_PINCODE = os.environ.get('DELIVERY_TEST_PINCODE', '123456' if DEBUG else '')
+
+# Pincode geocoding: the bundled gazetteer (auth_app/data/pincode_centroids.csv) is
+# always tried first; allow a live Nominatim lookup for pincodes it doesn't know.
+# Off by default: the lookup blocks the request (checkout, delivery fee) for seconds.
+PINCODE_NOMINATIM_FALLBACK = os.environ.get('PINCODE_NOMINATIM_FALLBACK', 'False') == 'True'
+
+# Geocode result cache (auth_app.geocoding): per-process LRU in front of the default cache.
+GEOCODE_CACHE = {
+    'LRU_SIZE': int(os.environ.get('GEOCODE_CACHE_LRU_SIZE', 4096)),
+    'POSITIVE_TTL': int(os.environ.get('GEOCODE_CACHE_POSITIVE_TTL', 60 * 60 * 24 * 30)),  # 30 days
+    'NEGATIVE_TTL': int(os.environ.get('GEOCODE_CACHE_NEGATIVE_TTL', 60 * 60)),  # 1 hour
+}
+
+# Time zone vendors' opening hours are written in (auth_app.schedule)
+VENDOR_SCHEDULE_TIME_ZONE = os.environ.get('VENDOR_SCHEDULE_TIME_ZONE', 'Asia/Kolkata')
+
+# Fraction of the items total charged as tax at checkout (customer_app.pricing)
+ORDER_TAX_RATE = os.environ.get('ORDER_TAX_RATE', '0')
+
+# Outbox worker (auth_app.outbox, `python manage.py run_outbox_worker`)
+OUTBOX = {
+    'BATCH_SIZE': int(os.environ.get('OUTBOX_BATCH_SIZE', 100)),
+    'MAX_ATTEMPTS': int(os.environ.get('OUTBOX_MAX_ATTEMPTS', 8)),
+    'BACKOFF_BASE': int(os.environ.get('OUTBOX_BACKOFF_BASE', 30)),  # seconds, doubled per attempt
+    'BACKOFF_MAX': int(os.environ.get('OUTBOX_BACKOFF_MAX', 60 * 60)),
+    'LEASE_SECONDS': int(os.environ.get('OUTBOX_LEASE_SECONDS', 5 * 60)),  # Reclaimed after a worker dies
+    'RETAIN_DONE_DAYS': int(os.environ.get('OUTBOX_RETAIN_DONE_DAYS', 7)),
+}
+
+# FCM push over the HTTP v1 API (auth_app.push); point FCM_ENDPOINT at a local stub server in tests
+FCM_ENDPOINT = os.environ.get('FCM_ENDPOINT', 'https://fcm.googleapis.com')
+FCM_PROJECT_ID = os.environ.get('FCM_PROJECT_ID', '')
+FCM_CREDENTIALS_FILE = os.environ.get('FCM_CREDENTIALS_FILE', '')  # Service-account JSON; needs google-auth
+FCM_TIMEOUT = float(os.environ.get('FCM_TIMEOUT', 10))
+FCM_POOL_SIZE = int(os.environ.get('FCM_POOL_SIZE', 10))  # Keep-alive connections / concurrent requests
+FCM_COALESCE_SECONDS = int(os.environ.get('FCM_COALESCE_SECONDS', 2))  # Pushes to one vendor within this window become one
+
+# OTP store (accounts.otp): 'redis' or 'locmem'; unset means Redis, and requires the default cache to be django-redis
+OTP_BACKEND = os.environ.get('OTP_BACKEND') or None
+
+# Order events (auth_app.events): 'redis' or 'local'; unset means Redis, and requires the default cache to be django-redis
+EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND') or None
+EVENTS_REDIS_URL = os.environ.get('EVENTS_REDIS_URL', CACHES['default']['LOCATION'])
+EVENTS_KEEPALIVE = float(os.environ.get('EVENTS_KEEPALIVE', 25))  # Seconds between pings on idle event streams
+
+# Vendor active-order board (auth_app.order_board): 'redis' or 'local'; unset means Redis, and requires the default cache to be django-redis
+ORDER_BOARD_BACKEND = os.environ.get('ORDER_BOARD_BACKEND') or None
+
+# SMS (auth_app.sms): TwilioBackend, ConsoleBackend (logs; the default) or LocMemBackend (tests)
+SMS_BACKEND = os.environ.get('SMS_BACKEND', 'auth_app.sms.ConsoleBackend')
+SMS_RATE_LIMIT = float(os.environ.get('SMS_RATE_LIMIT', 1))  # Messages per second per worker; 0 disables
+SMS_TIMEOUT = float(os.environ.get('SMS_TIMEOUT', 10))
+TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID', '')
+TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN', '')
+TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER', '')
+
+# Text the customer an order confirmation through the outbox
+ORDER_CONFIRMATION_SMS = os.environ.get('ORDER_CONFIRMATION_SMS', 'False') == 'True'
+
+# Seconds each process may serve its local copy of the deactivated delivery-partner set (delivery_auth.denylist)
+DELIVERY_DENYLIST_REFRESH = float(os.environ.get('DELIVERY_DENYLIST_REFRESH', 5))
+
 APPEND_SLASH = False
 
 # --- IMPORTANT: Define Custom User Model ---
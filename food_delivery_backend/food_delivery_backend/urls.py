@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from auth_app.realtime import event_stream, event_ticket
 
 # print("--- Loading food_delivery_backend/urls.py ---") # DEBUG
 
@@ -26,6 +27,8 @@ urlpatterns = [
     path('vendor_auth/', include('auth_app.urls')),
     path('customer/', include('customer_app.urls')),
     path('api/', include('delivery_auth.urls')),
+    path('events/<str:role>/ticket/', event_ticket, name='order-events-ticket'),  # One-time ?ticket= for WebSockets
+    path('events/<str:role>/', event_stream, name='order-events'),  # Server-sent events; WebSockets are routed in asgi.py
 ]
 
 # print(f"--- food_delivery_backend urlpatterns: {urlpatterns} ---") # DEBUG